@@ -32,12 +32,47 @@ class Settings(BaseSettings):
     openai_api_key: str
     openai_model: str = "gpt-4-1106-preview"
     
+    # Question Bank
+    question_bank_enabled: bool = True
+    question_bank_min_score: float = 0.45  # Below this a bank question is a worse fit than a generated one
+    question_bank_save_generated: bool = True
+    question_index_sync_seconds: int = 60  # Usage write-back and reload of rows changed by other processes
+    
+    question_dedup_enabled: bool = True
+    question_dedup_threshold: float = 0.75  # Content-word Jaccard similarity at which two questions are one
+    question_dedup_workers: int = 4  # Processes computing signatures in the batch deduplication job
+    
+    # Batch response analysis
+    analysis_batch_concurrency: int = 4
+    analysis_pack_max_chars: int = 600  # Responses up to this length may share a prompt
+    analysis_pack_size: int = 4
+    
+    # Evaluation cache
+    evaluation_cache_enabled: bool = True
+    evaluation_cache_ttl_seconds: int = 604800  # 7 days
+    evaluation_cache_max_size: int = 10000
+    evaluation_cache_persist: bool = False  # Also keep entries in the evaluation_cache table
+    
+    # Seen questions
+    seen_questions_enabled: bool = True
+    seen_questions_capacity: int = 2000  # Questions per user before the false positive rate climbs
+    seen_questions_error_rate: float = 0.01
+    seen_questions_near_duplicates: bool = True  # Also skip rephrasings of asked questions (SimHash)
+    
+    # Study plans
+    study_plan_cache_enabled: bool = True
+    study_plan_history_size: int = 10  # Performance entries that count towards the plan's input digest
+    
     # Redis
     redis_url: str = "redis://localhost:6379"
     
     # GitHub
     github_client_id: Optional[str] = None
     github_client_secret: Optional[str] = None
+    github_api_base_url: str = "https://api.github.com"
+    github_profile_refresh_seconds: int = 21600  # Digests older than this are refreshed in the background
+    github_profile_cache_ttl_seconds: int = 3600
+    github_profile_cache_size: int = 10000
     
     # CORS
     allowed_origins: list = ["http://localhost:3000", "https://localhost:3000"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Text, JSON, Integer, ForeignKey, Float, Enum
+from sqlalchemy import Column, String, DateTime, Boolean, Text, JSON, Integer, ForeignKey, Float, Enum, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -44,6 +44,9 @@ class User(Base):
     github_id = Column(String, nullable=True, unique=True)
     github_access_token = Column(Text, nullable=True)
     github_profile_data = Column(JSON, nullable=True)
+    github_profile_digest = Column(Text, nullable=True)  # Prompt-ready summary of github_profile_data
+    github_profile_validators = Column(JSON, nullable=True)  # ETag / Last-Modified per GitHub endpoint
+    github_profile_refreshed_at = Column(DateTime(timezone=True), nullable=True)
     
     # Profile Information
     experience_level = Column(Enum(DifficultyLevel), nullable=True)
@@ -51,6 +54,9 @@ class User(Base):
     target_companies = Column(JSON, nullable=True)  # Array of company names
     preferred_roles = Column(JSON, nullable=True)  # Array of role types
     
+    # Practice History
+    seen_question_filter = Column(LargeBinary, nullable=True)  # Bloom filter of asked question fingerprints
+    
     # Settings
     is_active = Column(Boolean, default=True)
     email_verified = Column(Boolean, default=False)
@@ -253,6 +259,7 @@ class QuestionBank(Base):
     # Status
     is_active = Column(Boolean, default=True)
     quality_score = Column(Float, nullable=True)  # Internal quality rating
+    duplicate_of_id = Column(UUID(as_uuid=True), ForeignKey("question_bank.id"), nullable=True)  # Set when merged into a canonical question
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -262,14 +269,19 @@ class AIAnalysisLog(Base):
     __tablename__ = "ai_analysis_logs"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    interview_id = Column(UUID(as_uuid=True), ForeignKey("interviews.id"), nullable=False)
+    interview_id = Column(UUID(as_uuid=True), ForeignKey("interviews.id"), nullable=True)  # Null for calls made outside an interview
     
     # AI Processing Details
     model_version = Column(String, nullable=False)
-    processing_type = Column(String, nullable=False)  # "question_generation", "response_analysis", etc.
+    provider = Column(String, nullable=True)  # "claude", "openai"
+    processing_type = Column(String, nullable=False, index=True)  # "question_generation", "response_analysis", etc.
+    turn_index = Column(Integer, nullable=True)
     input_tokens = Column(Integer, nullable=True)
+    cached_input_tokens = Column(Integer, nullable=True)  # Served from the provider's prompt cache
     output_tokens = Column(Integer, nullable=True)
+    time_to_first_token_ms = Column(Integer, nullable=True)
     processing_time_ms = Column(Integer, nullable=True)
+    outcome = Column(String, nullable=False, default="success")  # "success", "error", "timeout", "fallback"
     
     # Results
     analysis_result = Column(JSON, nullable=True)
@@ -280,4 +292,27 @@ class AIAnalysisLog(Base):
     raw_response = Column(Text, nullable=True)
     error_message = Column(Text, nullable=True)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class EvaluationCacheEntry(Base):
+    __tablename__ = "evaluation_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # SHA-256 of normalized question, response, criteria, model
+    model_version = Column(String, nullable=False)
+    analysis = Column(JSON, nullable=False)
+    hit_count = Column(Integer, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class StudyPlan(Base):
+    __tablename__ = "study_plans"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)  # Current plan only
+    input_digest = Column(String(64), nullable=False)  # SHA-256 of the inputs the plan was generated from
+    plan = Column(JSON, nullable=False)
+    model_version = Column(String, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,15 +1,115 @@
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable, AsyncIterator
 from openai import AsyncOpenAI
 from app.core.config import settings
 from app.models.database import InterviewType, DifficultyLevel
+from app.services.analysis_log import write_analysis_logs
+from app.services.interview_questions import attach_interview_question, mark_question_asked
+from app.services.question_retrieval import ensure_question_index, save_generated_questions
+from app.services.evaluation_cache import EvaluationCache, evaluation_cache_key
+from app.services.github_profile import GitHubProfileService, format_profile_digest
+from app.services.study_plans import StudyPlanStore, study_plan_digest
+from app.services.seen_questions import QuestionFingerprint, SeenQuestionStore
+from common.llm_metrics import LLMMetricsRecorder
+from common.prompt_builder import PromptBuilder
+from common.json_stream import IncrementalJSONArrayParser
 import json
+import uuid
 import asyncio
 
 
+ANALYSIS_FORMAT = """{
+            "overall_score": 85,
+            "criterion_scores": {
+                "Technical Accuracy": 90,
+                "Problem Solving": 85,
+                "Communication": 80
+            },
+            "strengths": [
+                "Clear explanation of core concepts",
+                "Good use of examples"
+            ],
+            "areas_for_improvement": [
+                "Could elaborate on edge cases",
+                "Consider scalability implications"
+            ],
+            "detailed_feedback": "The candidate demonstrated solid understanding...",
+            "key_points_covered": [
+                "Point 1",
+                "Point 2"
+            ],
+            "missed_opportunities": [
+                "Could have mentioned X",
+                "Opportunity to discuss Y"
+            ],
+            "confidence_assessment": 0.8,
+            "clarity_score": 0.85,
+            "relevance_score": 0.9,
+            "follow_up_suggestions": [
+                "Ask about handling at scale",
+                "Discuss alternative approaches"
+            ]
+        }"""
+
+
+# Extra questions requested from the LLM when the user's history may rule some out
+SEEN_QUESTION_SPARES = 2
+
+
 class AIInterviewEngine:
     def __init__(self):
         self.client = AsyncOpenAI(api_key=settings.openai_api_key)
         self.model = settings.openai_model
+        self.metrics = LLMMetricsRecorder(write_analysis_logs)
+        self._background_tasks = set()
+        self.evaluation_cache = EvaluationCache() if settings.evaluation_cache_enabled else None
+        self.seen_questions = SeenQuestionStore() if settings.seen_questions_enabled else None
+        self.github_profiles = GitHubProfileService()
+        self.study_plans = StudyPlanStore() if settings.study_plan_cache_enabled else None
+        self._study_plan_jobs: Dict[Tuple[str, str], asyncio.Task] = {}
+    
+    async def _complete(
+        self,
+        processing_type: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        interview_id: Optional[str] = None
+    ) -> str:
+        """Run a chat completion and record tokens, latency and outcome to ai_analysis_logs."""
+        tracker = self.metrics.start(processing_type, self.model, "openai", interview_id)
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        except Exception as e:
+            tracker.finish("error", error=e, prompt=user_prompt)
+            raise
+        
+        content = response.choices[0].message.content
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        tracker.finish(
+            "success",
+            usage.prompt_tokens if usage else None,
+            usage.completion_tokens if usage else None,
+            prompt=user_prompt,
+            response=content,
+            cached_input_tokens=(getattr(details, "cached_tokens", None) or 0) if details else None
+        )
+        return content
+    
+    def metrics_summary(self) -> Dict[str, Any]:
+        """LLM call metrics by processing type, plus how many analyses the evaluation cache answered."""
+        summary = self.metrics.summary()
+        summary["evaluation_cache"] = self.evaluation_cache.stats() if self.evaluation_cache else None
+        return summary
     
     async def generate_interview_questions(
         self, 
@@ -18,21 +118,297 @@ class AIInterviewEngine:
         target_role: str,
         skills: List[str],
         github_profile: Optional[Dict[str, Any]] = None,
-        num_questions: int = 5
+        num_questions: int = 5,
+        user_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Generate contextual interview questions based on user profile."""
+        """Generate contextual interview questions based on user profile.
         
-        # Build context from GitHub profile
-        github_context = ""
-        if github_profile:
-            github_context = f"""
-            GitHub Profile Analysis:
-            - Username: {github_profile.get('login', 'N/A')}
-            - Repositories: {github_profile.get('public_repos', 0)}
-            - Top Languages: {', '.join(github_profile.get('languages', [])[:3])}
-            - Recent Projects: {', '.join([repo.get('name', '') for repo in github_profile.get('recent_repos', [])[:2]])}
-            - Contribution Activity: {github_profile.get('contributions_summary', 'N/A')}
-            """
+        With user_id, questions the user has already been asked (or close rephrasings) are skipped,
+        and the user's stored GitHub digest is used when no github_profile is passed.
+        """
+        is_seen = await self._seen_question_check(user_id)
+        github_context = await self._github_context(github_profile, user_id)
+        
+        # Serve from the question bank; the LLM only fills whatever the bank can't cover
+        retrieved = []
+        if settings.question_bank_enabled:
+            index = await ensure_question_index()
+            result = index.search(
+                interview_type.value,
+                difficulty.value,
+                skills,
+                num_questions,
+                min_score=settings.question_bank_min_score,
+                is_seen=is_seen
+            )
+            retrieved = result.questions
+            index.record_usage(uuid.UUID(question["question_bank_id"]) for question in retrieved)
+            if len(retrieved) >= num_questions:
+                return self._number_questions(retrieved)
+            # Aim the generated questions at what the bank left uncovered
+            if result.uncovered_skills:
+                skills = result.uncovered_skills
+        
+        generated = await self._generate_questions_with_llm(
+            interview_type, difficulty, target_role, skills, github_context,
+            num_questions - len(retrieved), [question["question_text"] for question in retrieved], is_seen
+        )
+        if settings.question_bank_enabled and generated and generated[0].get("generated_by_ai"):
+            self._track(save_generated_questions(generated, interview_type, difficulty, skills))
+        return self._number_questions(retrieved + generated)
+    
+    async def _generate_questions_with_llm(
+        self,
+        interview_type: InterviewType,
+        difficulty: DifficultyLevel,
+        target_role: str,
+        skills: List[str],
+        github_context: str,
+        num_questions: int,
+        existing_questions: List[str],
+        is_seen: Optional[Callable[[QuestionFingerprint], bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """Ask the LLM for questions the bank could not supply."""
+        
+        # Ask for a few spares when some of the answers may turn out to be repeats
+        requested = num_questions + (SEEN_QUESTION_SPARES if is_seen else 0)
+        system_prompt, user_prompt = self._get_question_generation_prompts(
+            interview_type, difficulty, target_role, skills, github_context, requested, existing_questions
+        )
+        
+        try:
+            questions_json = await self._complete(
+                "question_generation",
+                system_prompt,
+                user_prompt,
+                temperature=0.7,
+                max_tokens=4000
+            )
+            questions = json.loads(questions_json)
+            
+            for question in questions:
+                question["generated_by_ai"] = True
+            
+            return self._prefer_unseen(questions, num_questions, is_seen)
+        
+        except Exception as e:
+            # Fallback to predefined questions if AI generation fails
+            return self._get_fallback_questions(interview_type, difficulty, num_questions)
+    
+    async def generate_interview_questions_progressive(
+        self,
+        interview_type: InterviewType,
+        difficulty: DifficultyLevel,
+        target_role: str,
+        skills: List[str],
+        github_profile: Optional[Dict[str, Any]] = None,
+        num_questions: int = 5,
+        interview_id: Optional[str] = None,
+        on_question: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        user_id: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], "asyncio.Task[List[Dict[str, Any]]]"]:
+        """Return the first question as soon as it exists; the rest are generated in the background.
+        
+        Every question, the first included, is passed to on_question in order; by default it is
+        attached to interview_id. The returned task resolves to the full numbered set.
+        The first question is marked asked once attached; call mark_question_asked for the rest
+        as they are put to the candidate.
+        """
+        if on_question is None and interview_id is not None:
+            on_question = lambda question: attach_interview_question(interview_id, question)
+        
+        first: asyncio.Future = asyncio.get_running_loop().create_future()
+        
+        async def produce() -> List[Dict[str, Any]]:
+            questions: List[Dict[str, Any]] = []
+            
+            async def emit(question: Dict[str, Any]):
+                question["sequence_number"] = len(questions) + 1
+                questions.append(question)
+                if not first.done():
+                    first.set_result(question)
+                if on_question is not None:
+                    try:
+                        await on_question(question)
+                    except Exception as e:
+                        # A failed attach must not hold back the remaining questions
+                        pass
+                # The first question goes to the candidate straight away; later ones when the caller asks them
+                if len(questions) == 1 and question.get("interview_question_id"):
+                    self._track(self.mark_question_asked(question["interview_question_id"]))
+            
+            try:
+                async for question in self._iter_questions(
+                    interview_type, difficulty, target_role, skills, github_profile, num_questions, interview_id, user_id
+                ):
+                    await emit(question)
+            except Exception as e:
+                # After the first question the caller keeps the partial set
+                print(f"Progressive question generation error: {e!r}")
+            if not questions:
+                # Same fallback as generate_interview_questions when nothing could be generated
+                for question in self._get_fallback_questions(interview_type, difficulty, num_questions):
+                    await emit(dict(question))
+            if not first.done():
+                first.set_exception(ValueError("No interview questions were generated"))
+            return questions
+        
+        task = asyncio.create_task(produce())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return await first, task
+    
+    async def _iter_questions(
+        self,
+        interview_type: InterviewType,
+        difficulty: DifficultyLevel,
+        target_role: str,
+        skills: List[str],
+        github_profile: Optional[Dict[str, Any]],
+        num_questions: int,
+        interview_id: Optional[str],
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield bank questions first (they are ready immediately), then stream LLM questions for the gaps."""
+        is_seen = await self._seen_question_check(user_id)
+        github_context = await self._github_context(github_profile, user_id)
+        retrieved = []
+        if settings.question_bank_enabled:
+            index = await ensure_question_index()
+            result = index.search(
+                interview_type.value,
+                difficulty.value,
+                skills,
+                num_questions,
+                min_score=settings.question_bank_min_score,
+                is_seen=is_seen
+            )
+            retrieved = result.questions
+            index.record_usage(uuid.UUID(question["question_bank_id"]) for question in retrieved)
+            if result.uncovered_skills:
+                skills = result.uncovered_skills
+        for question in retrieved:
+            yield question
+        if len(retrieved) >= num_questions:
+            return
+        
+        remaining = num_questions - len(retrieved)
+        system_prompt, user_prompt = self._get_question_generation_prompts(
+            interview_type, difficulty, target_role, skills, github_context,
+            remaining + (SEEN_QUESTION_SPARES if is_seen else 0),
+            [question["question_text"] for question in retrieved]
+        )
+        generated, repeats = [], []
+        parser = IncrementalJSONArrayParser()
+        chunks = self._stream_complete(
+            "question_generation",
+            system_prompt,
+            user_prompt,
+            temperature=0.7,
+            max_tokens=4000,
+            interview_id=interview_id
+        )
+        try:
+            async for chunk in chunks:
+                for question in parser.feed(chunk):
+                    if not isinstance(question, dict) or not question.get("question_text"):
+                        continue
+                    question["generated_by_ai"] = True
+                    if is_seen and is_seen(QuestionFingerprint.of(question["question_text"])):
+                        repeats.append(question)
+                        continue
+                    generated.append(question)
+                    yield question
+                    if len(generated) >= remaining:
+                        break
+                if len(generated) >= remaining:
+                    # Enough fresh questions; stop reading so the spares aren't generated and waited for
+                    break
+        except Exception as e:
+            # Keep whatever arrived before the stream failed; the failed call is also in the LLM metrics
+            print(f"Question generation stream error: {e!r}")
+        finally:
+            # Records the call even if the consumer stopped iterating early
+            await chunks.aclose()
+        
+        # A repeat is still better than a short interview
+        for question in repeats[:remaining - len(generated)]:
+            generated.append(question)
+            yield question
+        
+        if generated and settings.question_bank_enabled:
+            self._track(save_generated_questions(generated, interview_type, difficulty, skills))
+    
+    async def _stream_complete(
+        self,
+        processing_type: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        interview_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Streaming variant of _complete: yield content deltas and record time to first token."""
+        tracker = self.metrics.start(processing_type, self.model, "openai", interview_id)
+        content: List[str] = []
+        usage = None
+        failed = False
+        stream = None
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    if not content:
+                        tracker.first_token()
+                    content.append(delta)
+                    yield delta
+        except Exception as e:
+            failed = True
+            tracker.finish("error", error=e, prompt=user_prompt, response="".join(content))
+            raise
+        finally:
+            # Also reached when the consumer stops early, e.g. once it has every question it needs;
+            # closing the response ends the completion instead of leaving it to run to max_tokens
+            if stream is not None:
+                try:
+                    await stream.close()
+                except Exception:
+                    pass
+            if not failed:
+                details = getattr(usage, "prompt_tokens_details", None)
+                tracker.finish(
+                    "success",
+                    usage.prompt_tokens if usage else None,
+                    usage.completion_tokens if usage else None,
+                    prompt=user_prompt,
+                    response="".join(content),
+                    cached_input_tokens=(getattr(details, "cached_tokens", None) or 0) if details else None
+                )
+    
+    def _get_question_generation_prompts(
+        self,
+        interview_type: InterviewType,
+        difficulty: DifficultyLevel,
+        target_role: str,
+        skills: List[str],
+        github_context: str,
+        num_questions: int,
+        existing_questions: List[str]
+    ) -> Tuple[str, str]:
+        """Return (system, user) prompts for question generation."""
         
         system_prompt = self._get_question_generation_prompt(
             interview_type, difficulty, target_role, skills, github_context
@@ -46,7 +422,7 @@ class AIInterviewEngine:
         - Difficulty appropriate for {difficulty.value} level candidates
         - Cover key skills: {', '.join(skills)}
         - Include follow-up questions and evaluation criteria
-        
+        {self._existing_questions_context(existing_questions)}
         Return as JSON array with this structure:
         [
             {{
@@ -64,31 +440,72 @@ class AIInterviewEngine:
             }}
         ]
         """
-        
+        return system_prompt, user_prompt
+    
+    async def _seen_question_check(self, user_id: Optional[str]) -> Optional[Callable[[QuestionFingerprint], bool]]:
+        """Membership test against the user's seen-question filter, or None when there is nothing to skip."""
+        if self.seen_questions is None or user_id is None:
+            return None
+        seen = await self.seen_questions.get(user_id)
+        if not seen.count:
+            return None
+        near_duplicates = self.seen_questions.near_duplicates
+        return lambda fingerprint: seen.seen(fingerprint, near_duplicates)
+    
+    def _prefer_unseen(
+        self,
+        questions: List[Dict[str, Any]],
+        limit: int,
+        is_seen: Optional[Callable[[QuestionFingerprint], bool]]
+    ) -> List[Dict[str, Any]]:
+        """Drop questions the user has seen, topping up with them only if too few are left."""
+        if is_seen is None:
+            return questions[:limit]
+        fresh, repeats = [], []
+        for question in questions:
+            text = question.get("question_text", "")
+            (repeats if is_seen(QuestionFingerprint.of(text)) else fresh).append(question)
+        return (fresh + repeats)[:limit]
+    
+    async def mark_question_asked(self, interview_question_id: str) -> None:
+        """Record that a stored interview question was put to the candidate."""
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=4000
-            )
-            
-            questions_json = response.choices[0].message.content
-            questions = json.loads(questions_json)
-            
-            # Add sequence numbers
-            for i, question in enumerate(questions):
-                question["sequence_number"] = i + 1
-                question["generated_by_ai"] = True
-            
-            return questions
-        
+            asked = await mark_question_asked(interview_question_id)
         except Exception as e:
-            # Fallback to predefined questions if AI generation fails
-            return self._get_fallback_questions(interview_type, difficulty, num_questions)
+            print(f"Mark question asked error: {e}")
+            return
+        if asked is not None and self.seen_questions is not None:
+            user_id, question_text = asked
+            await self.seen_questions.record(user_id, [question_text])
+    
+    async def _github_context(self, github_profile: Optional[Dict[str, Any]], user_id: Optional[str]) -> str:
+        """Explicit profile data wins; otherwise the user's precomputed digest, served from cache."""
+        if github_profile:
+            return format_profile_digest(github_profile)
+        if user_id is None:
+            return ""
+        try:
+            return await self.github_profiles.get_digest(user_id)
+        except Exception as e:
+            return ""
+    
+    def _existing_questions_context(self, existing_questions: List[str]) -> str:
+        if not existing_questions:
+            return ""
+        listed = "\n".join(f"        - {text}" for text in existing_questions)
+        return f"- These questions are already in the set; do not repeat or overlap them:\n{listed}\n"
+    
+    def _number_questions(self, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add sequence numbers."""
+        for i, question in enumerate(questions):
+            question["sequence_number"] = i + 1
+        return questions
+    
+    def _track(self, coroutine) -> None:
+        """Run a background write without blocking the caller, keeping a reference until it finishes."""
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
     
     async def analyze_response(
         self,
@@ -100,7 +517,60 @@ class AIInterviewEngine:
     ) -> Dict[str, Any]:
         """Analyze candidate response and provide detailed feedback."""
         
-        system_prompt = f"""
+        # Context (interview ids etc.) is deliberately not part of the key so resubmissions hit
+        cache_key = None
+        if self.evaluation_cache:
+            cache_key = evaluation_cache_key(question, response, question_type, evaluation_criteria, self.model)
+            cached = await self.evaluation_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        system_prompt = self._get_analysis_system_prompt()
+        
+        user_prompt = PromptBuilder.for_call("response_analysis", system_prompt).add(
+            "question",
+            f"""
+        Analyze this interview response:
+        
+        Question: {question}
+        Question Type: {question_type}
+        """,
+            required=True
+        ).add(
+            "response", response, priority=100, header="\n        Candidate Response: "
+        ).add(
+            "criteria", self._format_criteria(evaluation_criteria), priority=80,
+            header="\n        \n        Evaluation Criteria:\n        "
+        ).add(
+            "context", json.dumps(context) if context else "", priority=20,
+            header="\n        \n        Additional Context: "
+        ).add(
+            "format", f"\n        \n        Provide analysis in this JSON format:\n        {ANALYSIS_FORMAT}\n        ",
+            required=True,
+            static=True
+        ).build()
+        
+        try:
+            analysis_json = await self._complete(
+                "response_analysis",
+                system_prompt,
+                user_prompt,
+                temperature=0.3,  # Lower temperature for more consistent analysis
+                max_tokens=2000,
+                interview_id=(context or {}).get("interview_id")
+            )
+            analysis = json.loads(analysis_json)
+            if cache_key:
+                self.evaluation_cache.set(cache_key, self.model, analysis)
+            
+            return analysis
+        
+        except Exception as e:
+            # Return basic analysis if AI fails
+            return self._get_fallback_analysis(response)
+    
+    def _get_analysis_system_prompt(self) -> str:
+        return """
         You are an expert technical interviewer analyzing candidate responses.
         
         Your role is to:
@@ -118,79 +588,148 @@ class AIInterviewEngine:
         
         Be fair but thorough in your assessment.
         """
-        
-        criteria_text = "\n".join([
+    
+    def _format_criteria(self, evaluation_criteria: List[Dict[str, Any]]) -> str:
+        return "\n".join([
             f"- {criterion['criterion']}: {criterion.get('description', 'No description')} (Weight: {criterion['weight']})"
             for criterion in evaluation_criteria
         ])
+    
+    async def analyze_responses_batch(
+        self,
+        items: List[Dict[str, Any]],
+        concurrency: Optional[int] = None,
+        pack_max_chars: Optional[int] = None,
+        pack_size: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Analyze many responses concurrently, yielding (item index, analysis) as each completes.
         
-        user_prompt = f"""
-        Analyze this interview response:
+        Each item has the analyze_response arguments: question, response, question_type,
+        evaluation_criteria and optionally context. Responses no longer than pack_max_chars
+        are packed pack_size to a prompt; items missing from a packed result are re-run alone.
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.analysis_batch_concurrency)
+        pack_max_chars = settings.analysis_pack_max_chars if pack_max_chars is None else pack_max_chars
+        pack_size = pack_size or settings.analysis_pack_size
         
-        Question: {question}
-        Question Type: {question_type}
+        keys: Dict[int, str] = {}
+        pending: List[int] = []
+        for index, item in enumerate(items):
+            if self.evaluation_cache:
+                keys[index] = evaluation_cache_key(
+                    item["question"],
+                    item["response"],
+                    item.get("question_type", "technical"),
+                    item.get("evaluation_criteria", []),
+                    self.model
+                )
+                cached = await self.evaluation_cache.get(keys[index])
+                if cached is not None:
+                    yield index, cached
+                    continue
+            pending.append(index)
         
-        Candidate Response: {response}
+        units: List[List[int]] = []
+        short: List[int] = []
+        for index in pending:
+            item = items[index]
+            if pack_size > 1 and len(item.get("response") or "") <= pack_max_chars:
+                short.append(index)
+                if len(short) == pack_size:
+                    units.append(short)
+                    short = []
+            else:
+                units.append([index])
+        if short:
+            units.append(short)
         
-        Evaluation Criteria:
-        {criteria_text}
+        async def analyze_one(index: int) -> List[Tuple[int, Dict[str, Any]]]:
+            item = items[index]
+            async with semaphore:
+                analysis = await self.analyze_response(
+                    item["question"],
+                    item["response"],
+                    item.get("question_type", "technical"),
+                    item.get("evaluation_criteria", []),
+                    item.get("context")
+                )
+            return [(index, analysis)]
+        
+        async def analyze_unit(unit: List[int]) -> List[Tuple[int, Dict[str, Any]]]:
+            if len(unit) == 1:
+                return await analyze_one(unit[0])
+            async with semaphore:
+                packed = await self._analyze_packed([items[index] for index in unit])
+            results = [(index, packed[position]) for position, index in enumerate(unit) if position in packed]
+            if self.evaluation_cache:
+                for index, analysis in results:
+                    self.evaluation_cache.set(keys[index], self.model, analysis)
+            # Per-item fallback for anything the packed call lost or mangled
+            missing = [index for position, index in enumerate(unit) if position not in packed]
+            for retried in await asyncio.gather(*[analyze_one(index) for index in missing]):
+                results.extend(retried)
+            return results
+        
+        tasks = [asyncio.create_task(analyze_unit(unit)) for unit in units]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                for index, analysis in await finished:
+                    yield index, analysis
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _analyze_packed(self, items: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """Analyze several short responses in one call; returns analyses by position in items."""
         
-        Additional Context: {json.dumps(context) if context else "None"}
+        sections = []
+        for position, item in enumerate(items):
+            sections.append(f"""
+        Item {position}:
+        Question: {item["question"]}
+        Question Type: {item.get("question_type", "technical")}
+        Candidate Response: {item["response"]}
+        Evaluation Criteria:
+        {self._format_criteria(item.get("evaluation_criteria", []))}
+        Additional Context: {json.dumps(item["context"]) if item.get("context") else "None"}
+        """)
         
-        Provide analysis in this JSON format:
+        user_prompt = f"""
+        Analyze each of these {len(items)} interview responses independently.
+        {"".join(sections)}
+        Provide analysis in this JSON format, with one entry per item:
         {{
-            "overall_score": 85,
-            "criterion_scores": {{
-                "Technical Accuracy": 90,
-                "Problem Solving": 85,
-                "Communication": 80
-            }},
-            "strengths": [
-                "Clear explanation of core concepts",
-                "Good use of examples"
-            ],
-            "areas_for_improvement": [
-                "Could elaborate on edge cases",
-                "Consider scalability implications"
-            ],
-            "detailed_feedback": "The candidate demonstrated solid understanding...",
-            "key_points_covered": [
-                "Point 1",
-                "Point 2"
-            ],
-            "missed_opportunities": [
-                "Could have mentioned X",
-                "Opportunity to discuss Y"
-            ],
-            "confidence_assessment": 0.8,
-            "clarity_score": 0.85,
-            "relevance_score": 0.9,
-            "follow_up_suggestions": [
-                "Ask about handling at scale",
-                "Discuss alternative approaches"
+            "results": [
+                {{
+                    "item_id": 0,
+                    "analysis": {ANALYSIS_FORMAT}
+                }}
             ]
         }}
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,  # Lower temperature for more consistent analysis
-                max_tokens=2000
+            packed_json = await self._complete(
+                "response_analysis_packed",
+                self._get_analysis_system_prompt(),
+                user_prompt,
+                temperature=0.3,
+                max_tokens=min(4000, 900 * len(items)),
+                interview_id=(items[0].get("context") or {}).get("interview_id")
             )
-            
-            analysis_json = response.choices[0].message.content
-            analysis = json.loads(analysis_json)
-            
-            return analysis
-        
+            results = json.loads(packed_json).get("results", [])
         except Exception as e:
-            # Return basic analysis if AI fails
-            return self._get_fallback_analysis(response)
+            return {}
+        
+        analyses = {}
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            position, analysis = result.get("item_id"), result.get("analysis")
+            if isinstance(position, int) and 0 <= position < len(items) and isinstance(analysis, dict) \
+                    and "overall_score" in analysis:
+                analyses[position] = analysis
+        return analyses
     
     async def generate_interview_summary(
         self,
@@ -199,6 +738,31 @@ class AIInterviewEngine:
     ) -> Dict[str, Any]:
         """Generate comprehensive interview summary and recommendations."""
         
+        system_prompt, user_prompt = self._get_interview_summary_prompts(interview_data, responses)
+        
+        try:
+            summary_json = await self._complete(
+                "interview_summary",
+                system_prompt,
+                user_prompt,
+                temperature=0.2,
+                max_tokens=2500,
+                interview_id=interview_data.get("id")
+            )
+            summary = json.loads(summary_json)
+            
+            return summary
+        
+        except Exception as e:
+            return self._get_fallback_summary()
+    
+    def _get_interview_summary_prompts(
+        self,
+        interview_data: Dict[str, Any],
+        responses: List[Dict[str, Any]]
+    ) -> Tuple[str, str]:
+        """Build system and user prompts for the interview summary."""
+        
         system_prompt = """
         You are a senior technical interviewer creating a comprehensive interview summary.
         
@@ -221,19 +785,19 @@ class AIInterviewEngine:
                 "score": response.get("ai_score", 0)
             })
         
-        user_prompt = f"""
+        header = f"""
         Interview Summary Analysis:
         
         Position: {interview_data.get('target_role', 'Software Engineer')}
         Level: {interview_data.get('difficulty_level', 'mid')}
         Type: {interview_data.get('interview_type', 'technical')}
         Duration: {interview_data.get('duration_minutes', 60)} minutes
+        """
         
-        Questions and Responses:
-        {json.dumps(questions_and_responses, indent=2)}
+        response_format = """
         
         Provide comprehensive summary in this JSON format:
-        {{
+        {
             "overall_score": 78,
             "performance_level": "Strong with areas for growth",
             "key_strengths": [
@@ -244,17 +808,17 @@ class AIInterviewEngine:
                 "System design scalability concepts",
                 "Advanced algorithmic optimization"
             ],
-            "skill_breakdown": {{
+            "skill_breakdown": {
                 "technical_knowledge": 85,
                 "problem_solving": 80,
                 "communication": 90,
                 "coding_ability": 75
-            }},
-            "readiness_assessment": {{
+            },
+            "readiness_assessment": {
                 "current_level": "Mid-level",
                 "target_level": "Senior",
                 "gap_analysis": "Strong foundation, needs experience with large-scale systems"
-            }},
+            },
             "recommendations": [
                 "Practice system design problems focusing on scalability",
                 "Study advanced data structures and algorithms",
@@ -266,36 +830,118 @@ class AIInterviewEngine:
                 "Prepare for system design deep dive"
             ],
             "interviewer_notes": "Candidate shows promise but needs more experience with enterprise-level challenges"
-        }}
+        }
+        """
+        
+        # Whole question/response pairs, as many as the budget allows
+        user_prompt = PromptBuilder.for_call("interview_summary", system_prompt).add(
+            "header", header, required=True
+        ).add_items(
+            "questions_and_responses",
+            [json.dumps(item, indent=2) for item in questions_and_responses],
+            priority=50,
+            keep="head",
+            header="\n        Questions and Responses:\n        ",
+            separator=",\n        "
+        ).add(
+            "format", response_format, required=True, static=True
+        ).build()
+        
+        return system_prompt, user_prompt
+    
+    async def generate_personalized_study_plan(
+        self,
+        user_profile: Dict[str, Any],
+        performance_history: List[Dict[str, Any]],
+        target_role: str,
+        target_companies: List[str],
+        user_id: Optional[str] = None,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """Create personalized study plan based on performance analysis.
+        
+        With user_id the plan is memoized: it is regenerated only when its inputs change, and
+        refresh=True regenerates it in the background while the current plan is returned.
         """
+        if user_id is None or self.study_plans is None:
+            plan = await self._generate_study_plan(user_profile, performance_history, target_role, target_companies)
+            return plan if plan is not None else self._get_fallback_study_plan()
+        
+        digest = study_plan_digest(user_profile, performance_history, target_role, target_companies, self.model)
+        current = await self.study_plans.get(user_id)
+        inputs = (user_profile, performance_history, target_role, target_companies)
+        if current is not None and current.input_digest == digest:
+            if refresh:
+                self._study_plan_job(user_id, digest, *inputs)
+            return current.plan
+        
+        # Shielded: a caller giving up doesn't cancel the run other callers may be sharing
+        plan = await asyncio.shield(self._study_plan_job(user_id, digest, *inputs))
+        if plan is not None:
+            return plan
+        # Better an outdated plan of theirs than a generic one
+        return current.plan if current is not None else self._get_fallback_study_plan()
+    
+    def _study_plan_job(
+        self,
+        user_id: str,
+        digest: str,
+        user_profile: Dict[str, Any],
+        performance_history: List[Dict[str, Any]],
+        target_role: str,
+        target_companies: List[str]
+    ) -> "asyncio.Task[Optional[Dict[str, Any]]]":
+        """Generate and store the plan for these inputs, sharing one run between concurrent requests."""
+        key = (str(user_id), digest)
+        job = self._study_plan_jobs.get(key)
+        if job is not None:
+            return job
+        
+        async def regenerate() -> Optional[Dict[str, Any]]:
+            plan = await self._generate_study_plan(user_profile, performance_history, target_role, target_companies)
+            if plan is not None:
+                await self.study_plans.save(user_id, digest, plan, self.model)
+            return plan
+        
+        job = asyncio.create_task(regenerate())
+        self._study_plan_jobs[key] = job
+        job.add_done_callback(lambda _: self._study_plan_jobs.pop(key, None))
+        return job
+    
+    async def _generate_study_plan(
+        self,
+        user_profile: Dict[str, Any],
+        performance_history: List[Dict[str, Any]],
+        target_role: str,
+        target_companies: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Run the study plan completion; None if it fails."""
+        
+        system_prompt, user_prompt = self._get_study_plan_prompts(
+            user_profile, performance_history, target_role, target_companies
+        )
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.2,
-                max_tokens=2500
+            plan_json = await self._complete(
+                "study_plan",
+                system_prompt,
+                user_prompt,
+                temperature=0.4,
+                max_tokens=3000
             )
-            
-            summary_json = response.choices[0].message.content
-            summary = json.loads(summary_json)
-            
-            return summary
+            return json.loads(plan_json)
         
         except Exception as e:
-            return self._get_fallback_summary()
+            return None
     
-    async def generate_personalized_study_plan(
+    def _get_study_plan_prompts(
         self,
         user_profile: Dict[str, Any],
         performance_history: List[Dict[str, Any]],
         target_role: str,
         target_companies: List[str]
-    ) -> Dict[str, Any]:
-        """Create personalized study plan based on performance analysis."""
+    ) -> Tuple[str, str]:
+        """Build system and user prompts for the study plan."""
         
         system_prompt = """
         You are a technical career coach creating personalized study plans for software engineers.
@@ -310,7 +956,7 @@ class AIInterviewEngine:
         Make the plan actionable, realistic, and tailored to their current level and goals.
         """
         
-        user_prompt = f"""
+        header = f"""
         Create study plan for:
         
         Profile:
@@ -318,75 +964,72 @@ class AIInterviewEngine:
         - Skills: {user_profile.get('skills', [])}
         - Target Role: {target_role}
         - Target Companies: {target_companies}
+        """
         
-        Recent Performance:
-        {json.dumps(performance_history[-3:], indent=2)}
+        response_format = """
         
         Provide study plan in this JSON format:
-        {{
+        {
             "study_plan_duration_weeks": 12,
             "priority_areas": [
-                {{
+                {
                     "area": "System Design",
                     "current_level": "Beginner",
                     "target_level": "Intermediate",
                     "urgency": "High"
-                }}
+                }
             ],
-            "weekly_schedule": {{
-                "week_1": {{
+            "weekly_schedule": {
+                "week_1": {
                     "focus": "Data Structures Review",
                     "goals": ["Master arrays and linked lists", "Practice 10 problems"],
                     "resources": ["LeetCode Arrays track", "System Design Primer"],
                     "time_commitment_hours": 15
-                }}
-            }},
+                }
+            },
             "milestones": [
-                {{
+                {
                     "week": 4,
                     "milestone": "Complete behavioral interview prep",
                     "success_criteria": "Confident in STAR format responses"
-                }}
+                }
             ],
             "practice_interviews": [
-                {{
+                {
                     "week": 2,
                     "type": "technical",
                     "focus": "Data structures and algorithms"
-                }}
+                }
             ],
             "recommended_resources": [
-                {{
+                {
                     "type": "book",
                     "title": "Cracking the Coding Interview",
                     "priority": "high"
-                }}
+                }
             ],
-            "company_specific_prep": {{
+            "company_specific_prep": {
                 "Google": ["Focus on algorithms", "System design at scale"],
                 "Amazon": ["Leadership principles", "Behavioral examples"]
-            }}
-        }}
+            }
+        }
         """
         
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.4,
-                max_tokens=3000
-            )
-            
-            plan_json = response.choices[0].message.content
-            plan = json.loads(plan_json)
-            
-            return plan
+        # Most recent performance first to go in, so older history is what gets trimmed
+        user_prompt = PromptBuilder.for_call("study_plan", system_prompt).add(
+            "header", header, required=True
+        ).add_items(
+            "performance_history",
+            [json.dumps(entry, indent=2, default=str) for entry in performance_history],
+            priority=50,
+            keep="tail",
+            header="\n        Recent Performance:\n        ",
+            separator=",\n        "
+        ).add(
+            "format", response_format, required=True, static=True
+        ).build()
         
-        except Exception as e:
-            return self._get_fallback_study_plan()
+        return system_prompt, user_prompt
     
     def _get_question_generation_prompt(
         self, 
@@ -0,0 +1,39 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any
+
+from app.core.database import SessionLocal
+from app.models.database import AIAnalysisLog
+
+_COLUMNS = {column.name for column in AIAnalysisLog.__table__.columns}
+
+
+def _to_mapping(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only AIAnalysisLog columns and coerce ids and timestamps."""
+    mapping = {key: value for key, value in row.items() if key in _COLUMNS and value is not None}
+    if isinstance(mapping.get("interview_id"), str):
+        try:
+            mapping["interview_id"] = uuid.UUID(mapping["interview_id"])
+        except ValueError:
+            mapping.pop("interview_id")
+    if isinstance(mapping.get("created_at"), str):
+        mapping["created_at"] = datetime.fromisoformat(mapping["created_at"])
+    return mapping
+
+
+def _bulk_insert(rows: List[Dict[str, Any]]) -> None:
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(AIAnalysisLog, [_to_mapping(row) for row in rows])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def write_analysis_logs(rows: List[Dict[str, Any]]) -> None:
+    """Log sink for LLMMetricsRecorder: bulk-insert a batch of call records off the event loop."""
+    await asyncio.to_thread(_bulk_insert, rows)
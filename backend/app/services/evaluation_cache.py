@@ -0,0 +1,136 @@
+import asyncio
+import copy
+import hashlib
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import EvaluationCacheEntry
+from common.ttl_cache import TTLCache
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?,;:]+$")
+
+
+def normalize_text(text: str) -> str:
+    """Case, whitespace and trailing punctuation differences don't change an evaluation."""
+    return _TRAILING_PUNCTUATION.sub("", " ".join((text or "").lower().split()))
+
+
+def evaluation_cache_key(
+    question: str,
+    response: str,
+    question_type: str,
+    evaluation_criteria: List[Dict[str, Any]],
+    model_version: str
+) -> str:
+    criteria = sorted(
+        (normalize_text(str(criterion.get("criterion", ""))), str(criterion.get("description", "")), float(criterion.get("weight", 0)))
+        for criterion in evaluation_criteria
+    )
+    material = json.dumps(
+        [normalize_text(question), normalize_text(response), question_type, criteria, model_version],
+        separators=(",", ":")
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    """LRU/TTL cache of response analyses, with an optional database tier shared across processes."""
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        persist: Optional[bool] = None
+    ):
+        self.ttl_seconds = ttl_seconds or settings.evaluation_cache_ttl_seconds
+        self.persist = settings.evaluation_cache_persist if persist is None else persist
+        self._memory: TTLCache[Dict[str, Any]] = TTLCache(
+            max_size=max_size or settings.evaluation_cache_max_size,
+            ttl_seconds=self.ttl_seconds
+        )
+        self._background_tasks = set()
+        self.persistent_hits = 0
+        self.misses = 0
+        self.persist_errors = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached analysis, so callers may modify it freely."""
+        analysis = self._memory.get(key)
+        if analysis is not None:
+            return copy.deepcopy(analysis)
+
+        if self.persist:
+            try:
+                analysis = await asyncio.to_thread(self._load, key)
+            except Exception as e:
+                self.persist_errors += 1
+                analysis = None
+            if analysis is not None:
+                self.persistent_hits += 1
+                self._memory.set(key, analysis)
+                return copy.deepcopy(analysis)
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, model_version: str, analysis: Dict[str, Any]) -> None:
+        # A copy of its own: the caller keeps the original, and the database write serializes this one later
+        analysis = copy.deepcopy(analysis)
+        self._memory.set(key, analysis)
+        if self.persist:
+            # The caller already has its answer; don't make it wait on the database
+            task = asyncio.create_task(self._store_in_background(key, model_version, analysis))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    async def _store_in_background(self, key: str, model_version: str, analysis: Dict[str, Any]) -> None:
+        try:
+            await asyncio.to_thread(self._store, key, model_version, analysis)
+        except Exception as e:
+            self.persist_errors += 1
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            entry = db.get(EvaluationCacheEntry, key)
+            if entry is None or entry.expires_at <= datetime.now(timezone.utc):
+                return None
+            analysis = entry.analysis
+            entry.hit_count = (entry.hit_count or 0) + 1
+            db.commit()
+            return analysis
+        finally:
+            db.close()
+
+    def _store(self, key: str, model_version: str, analysis: Dict[str, Any]) -> None:
+        db = SessionLocal()
+        try:
+            db.merge(EvaluationCacheEntry(
+                cache_key=key,
+                model_version=model_version,
+                analysis=analysis,
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        memory_hits = self._memory.hits
+        lookups = memory_hits + self.persistent_hits + self.misses
+        return {
+            "size": len(self._memory),
+            "memory_hits": memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": round((memory_hits + self.persistent_hits) / lookups, 4) if lookups else None,
+            "evictions": self._memory.evictions,
+            "persist_errors": self.persist_errors
+        }
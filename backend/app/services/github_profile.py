@@ -0,0 +1,253 @@
+import asyncio
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+import httpx
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import User
+from common.ttl_cache import TTLCache
+
+RECENT_REPOS = 3
+TOP_LANGUAGES = 3
+
+
+def format_profile_digest(profile: Dict[str, Any]) -> str:
+    """Render profile data as the compact block the question prompts embed."""
+    if not profile:
+        return ""
+    recent = [
+        f"{repo.get('name', '')} ({repo['language']})" if repo.get("language") else repo.get("name", "")
+        for repo in profile.get("recent_repos", [])[:RECENT_REPOS]
+    ]
+    lines = [
+        "GitHub Profile Analysis:",
+        f"- Username: {profile.get('login', 'N/A')}",
+        f"- Repositories: {profile.get('public_repos', 0)}",
+        f"- Top Languages: {', '.join(profile.get('languages', [])[:TOP_LANGUAGES])}",
+        f"- Recent Projects: {', '.join(name for name in recent if name)}",
+        f"- Contribution Activity: {profile.get('contributions_summary', 'N/A')}"
+    ]
+    return "\n".join(lines)
+
+
+def _profile_from_user(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "login": payload.get("login"),
+        "public_repos": payload.get("public_repos", 0),
+        "followers": payload.get("followers", 0)
+    }
+
+
+def _profile_from_repos(payload: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Languages and recent projects from the repository list, skipping forks."""
+    own = [repo for repo in payload if not repo.get("fork")]
+    languages = Counter(repo["language"] for repo in own if repo.get("language"))
+    recent = sorted(own, key=lambda repo: repo.get("pushed_at") or "", reverse=True)
+    cutoff = _days_ago(90)
+    active = sum(1 for repo in own if (repo.get("pushed_at") or "") >= cutoff)
+    return {
+        "languages": [language for language, _ in languages.most_common()],
+        "recent_repos": [
+            {"name": repo.get("name"), "language": repo.get("language"), "pushed_at": repo.get("pushed_at")}
+            for repo in recent[:RECENT_REPOS * 2]
+        ],
+        "contributions_summary": f"{active} of {len(own)} repositories pushed to in the last 90 days"
+    }
+
+
+def _days_ago(days: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _as_uuid(user_id: Union[str, uuid.UUID]) -> uuid.UUID:
+    return uuid.UUID(user_id) if isinstance(user_id, str) else user_id
+
+
+class GitHubProfileService:
+    """Prompt-ready GitHub digests per user: cached in memory, stored on the user, refreshed in the background.
+
+    Refreshes send the validators from the previous fetch (ETag / Last-Modified), so an unchanged
+    profile costs two 304 responses, which GitHub doesn't count against the rate limit.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        refresh_seconds: Optional[int] = None,
+        cache_ttl_seconds: Optional[int] = None
+    ):
+        self.base_url = (base_url or settings.github_api_base_url).rstrip("/")
+        self.refresh_interval = timedelta(seconds=refresh_seconds or settings.github_profile_refresh_seconds)
+        self._digests: TTLCache[str] = TTLCache(
+            max_size=settings.github_profile_cache_size,
+            ttl_seconds=cache_ttl_seconds or settings.github_profile_cache_ttl_seconds
+        )
+        self._refreshing: Dict[uuid.UUID, asyncio.Task] = {}
+        self.fetches = 0
+        self.not_modified = 0
+        self.refresh_errors = 0
+
+    async def get_digest(self, user_id: Union[str, uuid.UUID]) -> str:
+        """Digest for prompt building; never waits on GitHub, only schedules a refresh when stale."""
+        user_id = _as_uuid(user_id)
+        digest = self._digests.get(user_id)
+        if digest is not None:
+            return digest
+
+        stored = await asyncio.to_thread(self._load_digest, user_id)
+        if stored is None:
+            self._digests.set(user_id, "")  # No linked account; don't ask the database again
+            return ""
+        digest, refreshed_at = stored
+        self._digests.set(user_id, digest or "")
+        if refreshed_at is None or datetime.now(timezone.utc) - refreshed_at >= self.refresh_interval:
+            self.schedule_refresh(user_id)
+        return digest or ""
+
+    def schedule_refresh(self, user_id: Union[str, uuid.UUID], force: bool = False) -> asyncio.Task:
+        """Start a background refresh unless one is already running for this user."""
+        user_id = _as_uuid(user_id)
+        task = self._refreshing.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._refresh_in_background(user_id, force))
+            self._refreshing[user_id] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(user_id, None))
+        return task
+
+    async def _refresh_in_background(self, user_id: uuid.UUID, force: bool) -> None:
+        try:
+            await self.refresh(user_id, force)
+        except Exception as e:
+            self.refresh_errors += 1
+
+    async def refresh(self, user_id: Union[str, uuid.UUID], force: bool = False) -> Optional[str]:
+        """Re-fetch the profile if it changed and store the new digest; returns the current digest."""
+        user_id = _as_uuid(user_id)
+        state = await asyncio.to_thread(self._load_state, user_id)
+        if state is None or not state["username"]:
+            return None
+        validators = {} if force else dict(state["validators"] or {})
+        profile = dict(state["profile"] or {})
+
+        headers = {"Accept": "application/vnd.github+json"}
+        if state["token"]:
+            headers["Authorization"] = f"Bearer {state['token']}"
+        username = state["username"]
+        async with httpx.AsyncClient(base_url=self.base_url, headers=headers, timeout=10.0) as client:
+            user_payload, user_validators = await self._fetch(client, f"/users/{username}", validators.get("user"))
+            repos_payload, repos_validators = await self._fetch(
+                client, f"/users/{username}/repos", validators.get("repos"), params={"sort": "pushed", "per_page": 100}
+            )
+
+        changed = user_payload is not None or repos_payload is not None or not state["digest"]
+        if user_payload is not None:
+            profile.update(_profile_from_user(user_payload))
+        if repos_payload is not None:
+            profile.update(_profile_from_repos(repos_payload))
+        digest = format_profile_digest(profile) if changed else state["digest"]
+
+        await asyncio.to_thread(
+            self._store, user_id, profile if changed else None, digest if changed else None,
+            {"user": user_validators, "repos": repos_validators}
+        )
+        self._digests.set(user_id, digest or "")
+        return digest
+
+    async def _fetch(
+        self,
+        client: httpx.AsyncClient,
+        path: str,
+        validators: Optional[Dict[str, str]],
+        params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Any], Dict[str, str]]:
+        """GET with conditional headers; returns (payload or None when unchanged, validators to keep)."""
+        validators = validators or {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        self.fetches += 1
+        response = await client.get(path, params=params, headers=headers)
+        if response.status_code == 304:
+            self.not_modified += 1
+            return None, validators
+        response.raise_for_status()
+        fresh = {}
+        if response.headers.get("etag"):
+            fresh["etag"] = response.headers["etag"]
+        if response.headers.get("last-modified"):
+            fresh["last_modified"] = response.headers["last-modified"]
+        return response.json(), fresh
+
+    def _load_digest(self, user_id: uuid.UUID) -> Optional[Tuple[Optional[str], Optional[datetime]]]:
+        db = SessionLocal()
+        try:
+            row = (
+                db.query(User.github_username, User.github_profile_digest, User.github_profile_refreshed_at)
+                .filter(User.id == user_id)
+                .first()
+            )
+            if row is None or not row.github_username:
+                return None
+            return row.github_profile_digest, row.github_profile_refreshed_at
+        finally:
+            db.close()
+
+    def _load_state(self, user_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            user = db.get(User, user_id)
+            if user is None:
+                return None
+            return {
+                "username": user.github_username,
+                "token": user.github_access_token,
+                "profile": user.github_profile_data,
+                "digest": user.github_profile_digest,
+                "validators": user.github_profile_validators
+            }
+        finally:
+            db.close()
+
+    def _store(
+        self,
+        user_id: uuid.UUID,
+        profile: Optional[Dict[str, Any]],
+        digest: Optional[str],
+        validators: Dict[str, Dict[str, str]]
+    ) -> None:
+        db = SessionLocal()
+        try:
+            user = db.get(User, user_id)
+            if user is None:
+                return
+            if profile is not None:
+                user.github_profile_data = profile
+                user.github_profile_digest = digest
+            user.github_profile_validators = validators
+            user.github_profile_refreshed_at = datetime.now(timezone.utc)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def invalidate(self, user_id: Union[str, uuid.UUID]) -> None:
+        """Drop the cached digest, e.g. after the user links a different GitHub account."""
+        self._digests.pop(_as_uuid(user_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_digests": len(self._digests),
+            "refreshing": len(self._refreshing),
+            "fetches": self.fetches,
+            "not_modified": self.not_modified,
+            "refresh_errors": self.refresh_errors
+        }
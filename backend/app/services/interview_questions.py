@@ -0,0 +1,69 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Tuple, Union
+
+from app.core.database import SessionLocal
+from app.models.database import InterviewQuestion, DifficultyLevel
+
+
+def _to_row(interview_id: uuid.UUID, question: Dict[str, Any]) -> InterviewQuestion:
+    difficulty = question.get("difficulty")
+    return InterviewQuestion(
+        interview_id=interview_id,
+        question_text=question["question_text"],
+        question_type=question.get("question_type", "technical"),
+        difficulty=difficulty if isinstance(difficulty, DifficultyLevel) else DifficultyLevel(difficulty),
+        expected_duration_minutes=question.get("expected_duration_minutes", 5),
+        topics=question.get("topics"),
+        follow_up_questions=question.get("follow_up_questions"),
+        evaluation_criteria=question.get("evaluation_criteria"),
+        generated_by_ai=question.get("generated_by_ai", True),
+        sequence_number=question["sequence_number"]
+    )
+
+
+def _insert(interview_id: uuid.UUID, question: Dict[str, Any]) -> str:
+    db = SessionLocal()
+    try:
+        row = _to_row(interview_id, question)
+        db.add(row)
+        db.commit()
+        return str(row.id)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def attach_interview_question(interview_id: Union[str, uuid.UUID], question: Dict[str, Any]) -> None:
+    """Store a generated question against its interview as soon as it is available."""
+    if isinstance(interview_id, str):
+        interview_id = uuid.UUID(interview_id)
+    question["interview_question_id"] = await asyncio.to_thread(_insert, interview_id, question)
+
+
+def _mark_asked(question_id: uuid.UUID) -> Optional[Tuple[uuid.UUID, str]]:
+    db = SessionLocal()
+    try:
+        question = db.get(InterviewQuestion, question_id)
+        if question is None:
+            return None
+        if question.asked_at is None:
+            question.asked_at = datetime.now(timezone.utc)
+        asked = (question.interview.user_id, question.question_text)
+        db.commit()
+        return asked
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def mark_question_asked(question_id: Union[str, uuid.UUID]) -> Optional[Tuple[uuid.UUID, str]]:
+    """Set asked_at and return (user_id, question_text), or None for an unknown question."""
+    if isinstance(question_id, str):
+        question_id = uuid.UUID(question_id)
+    return await asyncio.to_thread(_mark_asked, question_id)
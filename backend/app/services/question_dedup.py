@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import hashlib
+import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Set, Iterable, Tuple
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import QuestionBank
+from app.services.seen_questions import content_words
+
+# 32 hash functions in 8 bands of 4 rows: pairs at Jaccard 0.75 become candidates ~95% of the
+# time, pairs at 0.5 ~40%; candidates are then verified exactly, so LSH only has to find them
+NUM_PERM = 32
+LSH_BANDS = 8
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+_MASK64 = (1 << 64) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(20240601)  # Fixed seed: signatures must agree across processes and restarts
+# Multiply-shift hash functions (odd multiplier, top 32 bits of the 64-bit product)
+_PERMUTATIONS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERM)]
+
+
+def shingles(text: str) -> Set[str]:
+    """Question text as a set of content words; word order and stopwords don't make a new question."""
+    return set(content_words(text))
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@lru_cache(maxsize=32768)
+def _word_hashes(word: str) -> array:
+    """All NUM_PERM hashes of one word; question vocabulary is small, so most words repeat."""
+    value = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big")
+    return array("I", [((a * value + b) & _MASK64) >> 32 for a, b in _PERMUTATIONS])
+
+
+def minhash(words: Iterable[str]) -> Tuple[int, ...]:
+    rows = [_word_hashes(word) for word in words]
+    if not rows:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(map(min, zip(*rows)))
+
+
+def _band_keys(signature: Tuple[int, ...]) -> List[int]:
+    return [hash((band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])) for band in range(LSH_BANDS)]
+
+
+class LSHIndex:
+    """Banded MinHash buckets; a lookup touches LSH_BANDS buckets regardless of how many questions are indexed."""
+
+    def __init__(self):
+        # Most buckets hold a single question, so store the id itself until a second one arrives
+        self._buckets: Dict[int, Any] = {}
+
+    def add(self, item_id: Any, signature: Tuple[int, ...]) -> None:
+        for key in _band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = item_id
+            elif isinstance(bucket, set):
+                bucket.add(item_id)
+            elif bucket != item_id:
+                self._buckets[key] = {bucket, item_id}
+
+    def remove(self, item_id: Any, signature: Tuple[int, ...]) -> None:
+        for key in _band_keys(signature):
+            bucket = self._buckets.get(key)
+            if isinstance(bucket, set):
+                bucket.discard(item_id)
+                if len(bucket) == 1:
+                    self._buckets[key] = next(iter(bucket))
+            elif bucket == item_id:
+                del self._buckets[key]
+
+    def candidates(self, signature: Tuple[int, ...]) -> Set[Any]:
+        found: Set[Any] = set()
+        for key in _band_keys(signature):
+            bucket = self._buckets.get(key)
+            if isinstance(bucket, set):
+                found |= bucket
+            elif bucket is not None:
+                found.add(bucket)
+        return found
+
+
+# Merging duplicates into a canonical row
+
+def _canonical_rank(row: QuestionBank) -> Tuple:
+    """Prefer curated over generated, then the most used, the best rated and the oldest."""
+    created = row.created_at.timestamp() if row.created_at else 0.0
+    return (row.source != "ai_generated", row.usage_count or 0, row.quality_score or 0.0, -created)
+
+
+def _weighted(a: Optional[float], a_weight: int, b: Optional[float], b_weight: int) -> Optional[float]:
+    if a is None or b is None:
+        return a if b is None else b
+    total = a_weight + b_weight
+    return (a * a_weight + b * b_weight) / total if total else (a + b) / 2
+
+
+def _union(a: Optional[List[Any]], b: Optional[List[Any]]) -> List[Any]:
+    merged = list(a or [])
+    merged.extend(item for item in (b or []) if item not in merged)
+    return merged
+
+
+def merge_duplicate(canonical: QuestionBank, duplicate: QuestionBank) -> None:
+    """Fold a duplicate's usage statistics and coverage into the canonical row and retire it."""
+    canonical_uses, duplicate_uses = canonical.usage_count or 0, duplicate.usage_count or 0
+    canonical.success_rate = _weighted(canonical.success_rate, canonical_uses, duplicate.success_rate, duplicate_uses)
+    average_response_time = _weighted(
+        canonical.average_response_time, canonical_uses, duplicate.average_response_time, duplicate_uses
+    )
+    canonical.average_response_time = round(average_response_time) if average_response_time is not None else None
+    canonical.usage_count = canonical_uses + duplicate_uses
+    canonical.skills_tested = _union(canonical.skills_tested, duplicate.skills_tested)
+    canonical.topics = _union(canonical.topics, duplicate.topics)
+    canonical.follow_up_questions = canonical.follow_up_questions or duplicate.follow_up_questions
+    canonical.evaluation_rubric = canonical.evaluation_rubric or duplicate.evaluation_rubric
+    if duplicate.quality_score is not None:
+        canonical.quality_score = max(canonical.quality_score or 0.0, duplicate.quality_score)
+
+    duplicate.is_active = False
+    duplicate.duplicate_of_id = canonical.id
+    duplicate.usage_count = 0
+
+
+def absorb_new_question(canonical: QuestionBank, question: Dict[str, Any]) -> None:
+    """Keep what a rejected duplicate would have added to coverage, without counting it as usage."""
+    canonical.skills_tested = _union(canonical.skills_tested, question.get("skills_tested"))
+    canonical.topics = _union(canonical.topics, question.get("topics"))
+    canonical.follow_up_questions = canonical.follow_up_questions or question.get("follow_up_questions")
+    canonical.evaluation_rubric = canonical.evaluation_rubric or question.get("evaluation_rubric")
+
+
+# Batch deduplication of the existing bank
+
+def _signatures(texts: List[str]) -> List[Tuple[int, ...]]:
+    return [minhash(shingles(text)) for text in texts]
+
+
+@dataclass
+class DedupReport:
+    scanned: int = 0
+    candidate_pairs: int = 0
+    clusters: int = 0
+    merged: int = 0
+    canonical_ids: List[str] = field(default_factory=list)
+
+
+def cluster_duplicates(
+    rows: List[Tuple[Any, str, str, str]],
+    signatures: List[Tuple[int, ...]],
+    threshold: float
+) -> Tuple[List[List[Any]], int]:
+    """Group (id, question_type, difficulty, text) rows, best canonical candidate first, around canonical questions.
+
+    Each row joins the most similar earlier canonical of the same type and difficulty whose content
+    words overlap it by at least threshold, or becomes a canonical itself. Rows are only compared with
+    canonicals, so A~B and B~C never pull A and C together unless C is also similar to A.
+    Returns the clusters of two or more ids (canonical first) and the number of candidate pairs verified.
+    """
+    words: Dict[Any, Set[str]] = {}
+    keys: Dict[Any, Tuple[str, str]] = {}
+    clusters: Dict[Any, List[Any]] = {}
+    index = LSHIndex()
+    verified = 0
+
+    for (row_id, question_type, difficulty, text), signature in zip(rows, signatures):
+        row_words = shingles(text)
+        key = (question_type, difficulty)
+        best, best_similarity = None, threshold
+        for canonical in index.candidates(signature):
+            if keys[canonical] != key:
+                continue
+            verified += 1
+            similarity = jaccard(row_words, words[canonical])
+            if similarity >= best_similarity:
+                best, best_similarity = canonical, similarity
+        if best is not None:
+            clusters[best].append(row_id)
+            continue
+        words[row_id] = row_words
+        keys[row_id] = key
+        clusters[row_id] = [row_id]
+        index.add(row_id, signature)
+
+    return [members for members in clusters.values() if len(members) > 1], verified
+
+
+def _load_bank() -> List[Tuple[Any, str, str, str]]:
+    """Active questions in canonical preference order, so clustering meets each cluster's canonical first."""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(
+                QuestionBank.id,
+                QuestionBank.question_type,
+                QuestionBank.difficulty,
+                QuestionBank.question_text,
+                QuestionBank.source,
+                QuestionBank.usage_count,
+                QuestionBank.quality_score,
+                QuestionBank.created_at
+            )
+            .filter(QuestionBank.is_active.is_(True))
+            .all()
+        )
+        rows = sorted(rows, key=_canonical_rank, reverse=True)
+        return [
+            (
+                row.id,
+                getattr(row.question_type, "value", row.question_type),
+                getattr(row.difficulty, "value", row.difficulty),
+                row.question_text
+            )
+            for row in rows
+        ]
+    finally:
+        db.close()
+
+
+def _merge_clusters(clusters: List[List[Any]], dry_run: bool) -> List[str]:
+    db = SessionLocal()
+    try:
+        canonical_ids = []
+        for members in clusters:
+            rows = db.query(QuestionBank).filter(QuestionBank.id.in_(members)).all()
+            # Every member was matched against the cluster's first id, not against each other
+            canonical = next(row for row in rows if row.id == members[0])
+            for row in rows:
+                if row is not canonical:
+                    merge_duplicate(canonical, row)
+            canonical_ids.append(str(canonical.id))
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        return canonical_ids
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def deduplicate_question_bank(
+    workers: Optional[int] = None,
+    threshold: Optional[float] = None,
+    chunk_size: int = 2000,
+    dry_run: bool = False
+) -> DedupReport:
+    """Merge near-duplicate active questions, computing MinHash signatures across worker processes."""
+    workers = workers or settings.question_dedup_workers
+    threshold = threshold or settings.question_dedup_threshold
+    rows = await asyncio.to_thread(_load_bank)
+    report = DedupReport(scanned=len(rows))
+
+    loop = asyncio.get_running_loop()
+    chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, _signatures, [text for *_, text in chunk]) for chunk in chunks
+        ))
+    signatures = [signature for result in results for signature in result]
+
+    clusters, report.candidate_pairs = await asyncio.to_thread(cluster_duplicates, rows, signatures, threshold)
+    report.clusters = len(clusters)
+    report.merged = sum(len(members) - 1 for members in clusters)
+    if clusters:
+        report.canonical_ids = await asyncio.to_thread(_merge_clusters, clusters, dry_run)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge near-duplicate questions in the question bank")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    result = asyncio.run(deduplicate_question_bank(args.workers, args.threshold, dry_run=args.dry_run))
+    print(f"Scanned {result.scanned} questions, verified {result.candidate_pairs} candidate pairs, "
+          f"merged {result.merged} duplicates into {result.clusters} canonical questions"
+          + (" (dry run)" if args.dry_run else ""))
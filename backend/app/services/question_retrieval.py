@@ -0,0 +1,508 @@
+import asyncio
+import heapq
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Set, Iterable, Tuple, Callable
+
+from sqlalchemy import event, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import QuestionBank, InterviewType, DifficultyLevel
+from app.services.seen_questions import QuestionFingerprint
+from app.services.question_dedup import LSHIndex, absorb_new_question, jaccard, minhash, shingles
+
+_DIFFICULTY_ORDER = [level.value for level in DifficultyLevel]
+
+# Score weights; skill overlap dominates so retrieval never trades relevance for polish
+SKILL_WEIGHT = 0.55
+DIFFICULTY_WEIGHT = 0.2
+QUALITY_WEIGHT = 0.15
+FRESHNESS_WEIGHT = 0.1
+
+# Rows committed by a transaction that started before the previous sync can carry an older timestamp
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+def normalize_term(term: str) -> str:
+    """Normalize a skill/topic so "Distributed Systems" and "distributed_systems" match."""
+    return " ".join(term.lower().replace("_", " ").replace("-", " ").split())
+
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+@dataclass
+class IndexedQuestion:
+    id: Any
+    question_text: str
+    question_type: str
+    difficulty: str
+    terms: frozenset
+    topics: List[str]
+    quality_score: Optional[float] = None
+    usage_count: int = 0
+    average_response_time: Optional[int] = None
+    follow_up_questions: Optional[List[str]] = None
+    evaluation_rubric: Optional[Any] = None
+    fingerprint: Optional[QuestionFingerprint] = None
+
+    @classmethod
+    def from_row(cls, row: QuestionBank) -> "IndexedQuestion":
+        skills = row.skills_tested or []
+        topics = row.topics or []
+        return cls(
+            id=row.id,
+            question_text=row.question_text,
+            question_type=_enum_value(row.question_type),
+            difficulty=_enum_value(row.difficulty),
+            terms=frozenset(normalize_term(term) for term in [*skills, *topics] if term),
+            topics=list(topics),
+            quality_score=row.quality_score,
+            usage_count=row.usage_count or 0,
+            average_response_time=row.average_response_time,
+            follow_up_questions=row.follow_up_questions,
+            evaluation_rubric=row.evaluation_rubric,
+            fingerprint=QuestionFingerprint.of(row.question_text)
+        )
+
+    def to_question(self) -> Dict[str, Any]:
+        """Shape a bank question like the LLM-generated ones."""
+        return {
+            "question_text": self.question_text,
+            "question_type": self.question_type,
+            "difficulty": self.difficulty,
+            "topics": self.topics,
+            "expected_duration_minutes": max(1, round(self.average_response_time / 60)) if self.average_response_time else 10,
+            "follow_up_questions": self.follow_up_questions or [],
+            "evaluation_criteria": self.evaluation_rubric or [],
+            "generated_by_ai": False,
+            "question_bank_id": str(self.id)
+        }
+
+
+@dataclass
+class RetrievalResult:
+    questions: List[Dict[str, Any]]
+    uncovered_skills: List[str] = field(default_factory=list)
+
+
+class QuestionIndex:
+    """In-memory inverted index (skill/topic -> question ids) over active QuestionBank rows."""
+
+    def __init__(self, usage_scale: float = 50.0):
+        self.usage_scale = usage_scale
+        self._questions: Dict[Any, IndexedQuestion] = {}
+        self._by_term: Dict[str, Set[Any]] = {}
+        self._by_type: Dict[str, Set[Any]] = {}
+        self._prior: Dict[Any, Tuple[float, str]] = {}  # id -> (static score, difficulty)
+        self._lsh = LSHIndex()  # Near-duplicate lookup over question text
+        # Usage recorded since the last write back to QuestionBank.usage_count
+        self._pending_usage: Counter = Counter()
+        # Writes come from SQLAlchemy commit hooks, which may run in worker threads
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.synced_at: Optional[datetime] = None  # Database time of the last load or refresh
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def load(self, questions: Iterable[IndexedQuestion], synced_at: Optional[datetime] = None) -> None:
+        with self._lock:
+            self._questions.clear()
+            self._by_term.clear()
+            self._by_type.clear()
+            self._prior.clear()
+            self._lsh = LSHIndex()
+            for question in questions:
+                self._add(question)
+            self.loaded = True
+            self.synced_at = synced_at
+
+    def upsert(self, question: IndexedQuestion) -> None:
+        with self._lock:
+            self._upsert(question)
+
+    def refresh(self, changes: Iterable[Tuple[Any, Optional[IndexedQuestion]]], synced_at: datetime) -> None:
+        """Apply rows changed in the database since the last sync; None removes a deactivated question."""
+        with self._lock:
+            for question_id, question in changes:
+                if question is None:
+                    self._remove(question_id)
+                else:
+                    self._upsert(question)
+            self.synced_at = synced_at
+
+    def remove(self, question_id: Any) -> None:
+        with self._lock:
+            self._remove(question_id)
+
+    def record_usage(self, question_ids: Iterable[Any]) -> None:
+        with self._lock:
+            for question_id in question_ids:
+                question = self._questions.get(question_id)
+                if question:
+                    question.usage_count += 1
+                    self._pending_usage[question_id] += 1
+                    self._prior[question_id] = (self._static_score(question), question.difficulty)
+
+    def take_usage(self) -> Dict[Any, int]:
+        """Usage increments not yet written back; the caller returns them with restore_usage if the write fails."""
+        with self._lock:
+            pending, self._pending_usage = dict(self._pending_usage), Counter()
+            return pending
+
+    def restore_usage(self, counts: Dict[Any, int]) -> None:
+        with self._lock:
+            self._pending_usage.update(counts)
+
+    def _upsert(self, question: IndexedQuestion) -> None:
+        # The row's usage_count doesn't include increments still waiting to be written back
+        question.usage_count += self._pending_usage.get(question.id, 0)
+        self._remove(question.id)
+        self._add(question)
+
+    def _add(self, question: IndexedQuestion) -> None:
+        self._questions[question.id] = question
+        self._prior[question.id] = (self._static_score(question), question.difficulty)
+        self._by_type.setdefault(question.question_type, set()).add(question.id)
+        for term in question.terms:
+            self._by_term.setdefault(term, set()).add(question.id)
+        self._lsh.add(question.id, minhash(shingles(question.question_text)))
+
+    def _remove(self, question_id: Any) -> None:
+        question = self._questions.pop(question_id, None)
+        if question is None:
+            return
+        del self._prior[question_id]
+        # Signatures aren't kept per question; recomputing one is cheaper than storing 100k of them
+        self._lsh.remove(question_id, minhash(shingles(question.question_text)))
+        self._by_type.get(question.question_type, set()).discard(question_id)
+        for term in question.terms:
+            postings = self._by_term.get(term)
+            if postings is not None:
+                postings.discard(question_id)
+                if not postings:
+                    del self._by_term[term]
+
+    def _static_score(self, question: IndexedQuestion) -> float:
+        """Query-independent part of the score, precomputed so a search only adds overlap and difficulty."""
+        quality = min(1.0, max(0.0, question.quality_score)) if question.quality_score is not None else 0.5
+        freshness = 1.0 / (1.0 + question.usage_count / self.usage_scale)
+        return QUALITY_WEIGHT * quality + FRESHNESS_WEIGHT * freshness
+
+    def search(
+        self,
+        interview_type: str,
+        difficulty: str,
+        skills: List[str],
+        limit: int,
+        min_score: float = 0.0,
+        exclude_ids: Optional[Set[Any]] = None,
+        is_seen: Optional[Callable[[QuestionFingerprint], bool]] = None
+    ) -> RetrievalResult:
+        """Pick up to `limit` questions, greedily favouring ones that cover skills not yet covered.
+
+        is_seen (e.g. the user's seen-question filter) is only consulted for questions that
+        would make the candidate pool, not for the whole posting list.
+        """
+        wanted = {normalize_term(skill) for skill in skills if skill}
+        exclude_ids = exclude_ids or set()
+        target = _DIFFICULTY_ORDER.index(difficulty) if difficulty in _DIFFICULTY_ORDER else None
+        difficulty_match = {
+            level: DIFFICULTY_WEIGHT * {0: 1.0, 1: 0.4}.get(abs(_DIFFICULTY_ORDER.index(level) - target), 0.0)
+            if target is not None else 0.0
+            for level in _DIFFICULTY_ORDER
+        }
+
+        with self._lock:
+            of_type = self._by_type.get(interview_type, set())
+            if wanted:
+                overlap = Counter()
+                for term in wanted:
+                    overlap.update(self._by_term.get(term, ()))
+            else:
+                overlap = dict.fromkeys(of_type, 0)
+            per_match = SKILL_WEIGHT / len(wanted) if wanted else 0.0
+            prior = self._prior
+            scored = (
+                (per_match * hits + prior[qid][0] + difficulty_match.get(prior[qid][1], 0.0), qid)
+                for qid, hits in overlap.items()
+                if qid in of_type and qid not in exclude_ids
+            )
+            # Only the best few can be picked; avoid sorting a large posting list
+            if is_seen is None:
+                top = heapq.nlargest(limit * 4, scored, key=lambda item: item[0])
+            else:
+                top = self._top_unseen(scored, limit * 4, is_seen)
+            pool = [(score, self._questions[qid]) for score, qid in top]
+
+        selected: List[IndexedQuestion] = []
+        uncovered = set(wanted)
+        while pool and len(selected) < limit:
+            best_index, best_score = 0, -1.0
+            for index, (score, question) in enumerate(pool):
+                bonus = SKILL_WEIGHT * len(question.terms & uncovered) / len(wanted) if wanted else 0.0
+                if score + bonus > best_score:
+                    best_index, best_score = index, score + bonus
+            score, question = pool.pop(best_index)
+            if score < min_score:
+                continue
+            selected.append(question)
+            uncovered -= question.terms
+
+        return RetrievalResult(
+            questions=[question.to_question() for question in selected],
+            uncovered_skills=sorted(skill for skill in skills if normalize_term(skill) in uncovered)
+        )
+
+    def find_duplicate(
+        self,
+        question_text: str,
+        question_type: str,
+        difficulty: str,
+        threshold: float
+    ) -> Optional[Tuple[IndexedQuestion, float]]:
+        """Return the most similar indexed question of the same type and difficulty at or above threshold."""
+        words = shingles(question_text)
+        signature = minhash(words)
+        best: Optional[Tuple[IndexedQuestion, float]] = None
+        with self._lock:
+            candidates = [self._questions[qid] for qid in self._lsh.candidates(signature) if qid in self._questions]
+        for candidate in candidates:
+            if candidate.question_type != question_type or candidate.difficulty != difficulty:
+                continue
+            similarity = jaccard(words, shingles(candidate.question_text))
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
+
+    def _top_unseen(
+        self,
+        scored: Iterable[Tuple[float, Any]],
+        size: int,
+        is_seen: Callable[[QuestionFingerprint], bool]
+    ) -> List[Tuple[float, Any]]:
+        """Like heapq.nlargest, but skipping seen questions among those good enough to enter the heap."""
+        heap: List[Tuple[float, Any]] = []
+        for score, qid in scored:
+            if len(heap) >= size and score <= heap[0][0]:
+                continue
+            if is_seen(self._questions[qid].fingerprint):
+                continue
+            if len(heap) < size:
+                heapq.heappush(heap, (score, qid))
+            else:
+                heapq.heapreplace(heap, (score, qid))
+        return sorted(heap, key=lambda item: item[0], reverse=True)
+
+
+question_index = QuestionIndex()
+_load_lock = asyncio.Lock()
+_sync_task: Optional[asyncio.Task] = None
+
+
+def _load_rows() -> Tuple[datetime, List[IndexedQuestion]]:
+    db = SessionLocal()
+    try:
+        synced_at = db.execute(select(func.now())).scalar()
+        rows = db.query(QuestionBank).filter(QuestionBank.is_active.is_(True)).all()
+        return synced_at, [IndexedQuestion.from_row(row) for row in rows]
+    finally:
+        db.close()
+
+
+def _load_changed_rows(since: datetime) -> Tuple[datetime, List[Tuple[Any, Optional[IndexedQuestion]]]]:
+    db = SessionLocal()
+    try:
+        synced_at = db.execute(select(func.now())).scalar()
+        rows = db.query(QuestionBank).filter(
+            or_(QuestionBank.created_at >= since, QuestionBank.updated_at >= since)
+        ).all()
+        return synced_at, [
+            (row.id, IndexedQuestion.from_row(row) if row.is_active is not False else None)
+            for row in rows
+        ]
+    finally:
+        db.close()
+
+
+def _write_usage(counts: Dict[Any, int]) -> None:
+    db = SessionLocal()
+    try:
+        by_increment: Dict[int, List[Any]] = {}
+        for question_id, count in counts.items():
+            by_increment.setdefault(count, []).append(question_id)
+        # One UPDATE per distinct increment; relative, so concurrent writers' increments add up
+        for count, question_ids in by_increment.items():
+            db.execute(
+                update(QuestionBank)
+                .where(QuestionBank.id.in_(question_ids))
+                .values(usage_count=func.coalesce(QuestionBank.usage_count, 0) + count)
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def load_question_index() -> None:
+    """Build the index from the database; call at startup (also done lazily on first use)."""
+    global _sync_task
+    async with _load_lock:
+        synced_at, questions = await asyncio.to_thread(_load_rows)
+        question_index.load(questions, synced_at)
+        if _sync_task is None or _sync_task.done():
+            _sync_task = asyncio.create_task(_sync_question_index())
+
+
+async def ensure_question_index() -> QuestionIndex:
+    if not question_index.loaded:
+        await load_question_index()
+    return question_index
+
+
+async def flush_question_usage() -> int:
+    """Write recorded usage back to QuestionBank.usage_count; returns how many uses were written."""
+    counts = question_index.take_usage()
+    if not counts:
+        return 0
+    try:
+        await asyncio.to_thread(_write_usage, counts)
+    except Exception:
+        question_index.restore_usage(counts)
+        raise
+    return sum(counts.values())
+
+
+async def refresh_question_index() -> None:
+    """Pick up rows added, changed or deactivated by other processes (workers, the dedup job)."""
+    async with _load_lock:
+        synced_at, changes = await asyncio.to_thread(_load_changed_rows, question_index.synced_at - SYNC_OVERLAP)
+        question_index.refresh(changes, synced_at)
+
+
+async def _sync_question_index() -> None:
+    while True:
+        await asyncio.sleep(settings.question_index_sync_seconds)
+        try:
+            # Usage first, so the refresh reads back counts that include this process's
+            await flush_question_usage()
+            await refresh_question_index()
+        except Exception as e:
+            print(f"Question index sync error: {e}")
+
+
+# Incremental updates: capture QuestionBank changes at flush, apply them only once committed
+
+_PENDING_KEY = "question_bank_changes"
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_question_changes(session, flush_context):
+    changes = session.info.setdefault(_PENDING_KEY, {})
+    for row in [*session.new, *session.dirty]:
+        if isinstance(row, QuestionBank):
+            changes[row.id] = IndexedQuestion.from_row(row) if row.is_active is not False else None
+    for row in session.deleted:
+        if isinstance(row, QuestionBank):
+            changes[row.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_question_changes(session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if not changes or not question_index.loaded:
+        return
+    for question_id, question in changes.items():
+        if question is None:
+            question_index.remove(question_id)
+        else:
+            question_index.upsert(question)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_question_changes(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _save_questions(rows: List[Dict[str, Any]], duplicates: Dict[Any, List[Dict[str, Any]]]) -> None:
+    db = SessionLocal()
+    try:
+        db.add_all([QuestionBank(**row) for row in rows])
+        for canonical_id, absorbed in duplicates.items():
+            canonical = db.get(QuestionBank, canonical_id)
+            if canonical is not None:
+                for row in absorbed:
+                    absorb_new_question(canonical, row)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def _split_duplicates(
+    rows: List[Dict[str, Any]],
+    question_type: str,
+    difficulty: str
+) -> Tuple[List[Dict[str, Any]], Dict[Any, List[Dict[str, Any]]]]:
+    """Separate new questions from near-duplicates of bank questions (or of each other)."""
+    index = await ensure_question_index()
+    threshold = settings.question_dedup_threshold
+    fresh: List[Tuple[Dict[str, Any], Set[str]]] = []
+    duplicates: Dict[Any, List[Dict[str, Any]]] = {}
+    for row in rows:
+        match = index.find_duplicate(row["question_text"], question_type, difficulty, threshold)
+        if match is not None:
+            duplicates.setdefault(match[0].id, []).append(row)
+            continue
+        words = shingles(row["question_text"])
+        twin = next((kept for kept, kept_words in fresh if jaccard(words, kept_words) >= threshold), None)
+        if twin is not None:
+            twin["skills_tested"] = list(dict.fromkeys([*twin["skills_tested"], *row["skills_tested"]]))
+            twin["topics"] = list(dict.fromkeys([*twin["topics"], *row["topics"]]))
+            continue
+        fresh.append((row, words))
+    return [row for row, _ in fresh], duplicates
+
+
+async def save_generated_questions(
+    questions: List[Dict[str, Any]],
+    interview_type: InterviewType,
+    difficulty: DifficultyLevel,
+    skills: List[str]
+) -> None:
+    """Add LLM-generated gap fillers to the bank so the next similar request is served from the index.
+
+    Near-duplicates of existing questions are not inserted; their skills and topics are merged
+    into the canonical question instead.
+    """
+    rows = [
+        {
+            "question_text": question["question_text"],
+            "question_type": interview_type,
+            "difficulty": difficulty,
+            "skills_tested": [skill for skill in skills if normalize_term(skill) in
+                              {normalize_term(topic) for topic in question.get("topics", [])}] or skills,
+            "topics": question.get("topics", []),
+            "source": "ai_generated",
+            "follow_up_questions": question.get("follow_up_questions"),
+            "evaluation_rubric": question.get("evaluation_criteria")
+        }
+        for question in questions if question.get("question_text")
+    ]
+    if not rows or not settings.question_bank_save_generated:
+        return
+    duplicates: Dict[Any, List[Dict[str, Any]]] = {}
+    if settings.question_dedup_enabled:
+        rows, duplicates = await _split_duplicates(rows, interview_type.value, difficulty.value)
+    if rows or duplicates:
+        await asyncio.to_thread(_save_questions, rows, duplicates)
@@ -0,0 +1,266 @@
+import asyncio
+import hashlib
+import math
+import re
+import struct
+import uuid
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import User
+from app.services.evaluation_cache import normalize_text
+from common.ttl_cache import TTLCache
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an the of to for in on at and or is are be can you your how what when why would do does did "
+    "with about between this that it its s me tell describe explain".split()
+)
+_HEADER = struct.Struct(">BIBI")  # version, bit count, hash count, items added
+_VERSION = 1
+
+# A 64-bit SimHash split into 4 bands of 16 bits: two questions within Hamming distance 2
+# always share at least two bands, which unrelated questions rarely do
+SIMHASH_BANDS = 4
+NEAR_DUPLICATE_BANDS = 2
+SIMHASH_MIN_FEATURES = 3
+
+
+def _hash_pair(material: str) -> Tuple[int, int]:
+    digest = hashlib.blake2b(material.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+
+
+def content_words(text: str) -> List[str]:
+    """Normalized words of a question minus stopwords, with plurals folded."""
+    return [
+        word[:-1] if len(word) > 3 and word.endswith("s") else word
+        for word in _WORD.findall(normalize_text(text)) if word not in _STOPWORDS
+    ]
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash over content words; None when the text is too short to be meaningful.
+
+    Unigrams rather than shingles: questions are short, and a reworded question keeps its
+    content words while changing most of its word pairs.
+    """
+    features = content_words(text)
+    if len(features) < SIMHASH_MIN_FEATURES:
+        return None
+    weights = [0] * 64
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+@dataclass(frozen=True)
+class QuestionFingerprint:
+    """Precomputed filter keys for one question: the exact text and its SimHash bands."""
+    exact: Tuple[int, int]
+    bands: Tuple[Tuple[int, int], ...] = ()
+
+    @classmethod
+    def of(cls, text: str) -> "QuestionFingerprint":
+        signature = simhash(text)
+        bands = ()
+        if signature is not None:
+            width = 64 // SIMHASH_BANDS
+            bands = tuple(
+                _hash_pair(f"band:{band}:{signature >> (band * width) & ((1 << width) - 1)}")
+                for band in range(SIMHASH_BANDS)
+            )
+        return cls(exact=_hash_pair(f"text:{normalize_text(text)}"), bands=bands)
+
+
+class SeenQuestionFilter:
+    """Bloom filter of question fingerprints; may report a new question as seen, never the reverse."""
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytearray] = None, count: int = 0):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+        self.count = count
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float) -> "SeenQuestionFilter":
+        """Size for `capacity` questions, each inserting its text key and SimHash bands."""
+        keys = max(1, capacity * (1 + SIMHASH_BANDS))
+        num_bits = math.ceil(-keys * math.log(error_rate) / math.log(2) ** 2)
+        num_hashes = max(1, round(num_bits / keys * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Optional["SeenQuestionFilter"]:
+        if not data or len(data) < _HEADER.size:
+            return None
+        version, num_bits, num_hashes, count = _HEADER.unpack_from(data)
+        bits = bytearray(data[_HEADER.size:])
+        if version != _VERSION or len(bits) != (num_bits + 7) // 8:
+            return None
+        return cls(num_bits, num_hashes, bits, count)
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(_VERSION, self.num_bits, self.num_hashes, self.count) + bytes(self.bits)
+
+    def _positions(self, key: Tuple[int, int]):
+        first, step = key
+        for i in range(self.num_hashes):
+            yield (first + i * step) % self.num_bits
+
+    def _add_key(self, key: Tuple[int, int]) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def _has_key(self, key: Tuple[int, int]) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def add(self, fingerprint: QuestionFingerprint) -> None:
+        self._add_key(fingerprint.exact)
+        for band in fingerprint.bands:
+            self._add_key(band)
+        self.count += 1
+
+    def seen(self, fingerprint: Optional[QuestionFingerprint], near_duplicates: bool = True) -> bool:
+        if fingerprint is None or not self.count:
+            return False
+        if self._has_key(fingerprint.exact):
+            return True
+        if near_duplicates and fingerprint.bands:
+            return sum(1 for band in fingerprint.bands if self._has_key(band)) >= NEAR_DUPLICATE_BANDS
+        return False
+
+    def compatible(self, other: "SeenQuestionFilter") -> bool:
+        return self.num_bits == other.num_bits and self.num_hashes == other.num_hashes
+
+    def union(self, other: "SeenQuestionFilter") -> None:
+        """Merge another copy of the same user's filter; same-shape Bloom filters combine by OR."""
+        bits = self.bits
+        for index, byte in enumerate(other.bits):
+            if byte:
+                bits[index] |= byte
+        self.count = max(self.count, other.count)
+
+
+def _as_uuid(user_id: Union[str, uuid.UUID]) -> uuid.UUID:
+    return uuid.UUID(user_id) if isinstance(user_id, str) else user_id
+
+
+class SeenQuestionStore:
+    """Per-user seen-question filters, cached in memory and persisted on users.seen_question_filter."""
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        error_rate: Optional[float] = None,
+        near_duplicates: Optional[bool] = None,
+        max_users: int = 5000
+    ):
+        self.capacity = capacity or settings.seen_questions_capacity
+        self.error_rate = error_rate or settings.seen_questions_error_rate
+        self.near_duplicates = settings.seen_questions_near_duplicates if near_duplicates is None else near_duplicates
+        self._shape = SeenQuestionFilter.for_capacity(self.capacity, self.error_rate)
+        self._filters: TTLCache[SeenQuestionFilter] = TTLCache(max_size=max_users, ttl_seconds=3600)
+        self._locks: Dict[uuid.UUID, asyncio.Lock] = {}
+        self._background_tasks = set()
+        self.persist_errors = 0
+        self.rotations = 0
+
+    def _new_filter(self) -> SeenQuestionFilter:
+        return SeenQuestionFilter(self._shape.num_bits, self._shape.num_hashes)
+
+    async def get(self, user_id: Union[str, uuid.UUID]) -> SeenQuestionFilter:
+        user_id = _as_uuid(user_id)
+        seen = self._filters.get(user_id)
+        if seen is not None:
+            return seen
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            seen = self._filters.peek(user_id)
+            if seen is None:
+                try:
+                    seen = await asyncio.to_thread(self._load, user_id)
+                except Exception as e:
+                    self.persist_errors += 1
+                    seen = None
+                # A filter sized under different settings can't be extended; start over
+                if seen is None or not seen.compatible(self._shape):
+                    seen = self._new_filter()
+                self._filters.set(user_id, seen)
+        self._locks.pop(user_id, None)
+        return seen
+
+    def _full(self, seen: SeenQuestionFilter) -> bool:
+        return seen.count >= self.capacity
+
+    def is_seen(self, seen: Optional[SeenQuestionFilter], question_text: str) -> bool:
+        return seen is not None and seen.seen(QuestionFingerprint.of(question_text), self.near_duplicates)
+
+    async def record(self, user_id: Union[str, uuid.UUID], question_texts: List[str]) -> None:
+        """Add asked questions to the user's filter and persist it without blocking the caller."""
+        user_id = _as_uuid(user_id)
+        seen = await self.get(user_id)
+        if self._full(seen):
+            # Past capacity the false positive rate climbs quickly; start over rather than over-fill
+            seen = self._new_filter()
+            self._filters.set(user_id, seen)
+            self.rotations += 1
+        for text in question_texts:
+            if text:
+                seen.add(QuestionFingerprint.of(text))
+        task = asyncio.create_task(self._store_in_background(user_id, seen))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _store_in_background(self, user_id: uuid.UUID, seen: SeenQuestionFilter) -> None:
+        try:
+            stored = await asyncio.to_thread(self._store, user_id, seen.to_bytes())
+        except Exception as e:
+            self.persist_errors += 1
+            return
+        # Another process may have recorded questions since we loaded; pick those up too
+        if stored is not None and stored.compatible(seen) and not self._full(stored):
+            seen.union(stored)
+
+    def _load(self, user_id: uuid.UUID) -> Optional[SeenQuestionFilter]:
+        db = SessionLocal()
+        try:
+            data = db.query(User.seen_question_filter).filter(User.id == user_id).scalar()
+            return SeenQuestionFilter.from_bytes(data) if data else None
+        finally:
+            db.close()
+
+    def _store(self, user_id: uuid.UUID, data: bytes) -> Optional[SeenQuestionFilter]:
+        """Write the union of our snapshot and the stored filter; return the stored one."""
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.id == user_id).with_for_update().first()
+            if user is None:
+                return None
+            merged = SeenQuestionFilter.from_bytes(data)
+            stored = SeenQuestionFilter.from_bytes(user.seen_question_filter) if user.seen_question_filter else None
+            # A full stored filter was rotated out by whoever wrote this one; don't merge it back
+            if stored is not None and stored.compatible(merged) and not self._full(stored):
+                merged.union(stored)
+            user.seen_question_filter = merged.to_bytes()
+            db.commit()
+            return stored
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_users": len(self._filters),
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "persist_errors": self.persist_errors,
+            "rotations": self.rotations
+        }
@@ -0,0 +1,120 @@
+import asyncio
+import copy
+import hashlib
+import json
+import uuid
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Union
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import StudyPlan
+from common.ttl_cache import TTLCache
+
+# Profile fields the study plan prompt actually uses
+PROFILE_FIELDS = ("experience_level", "skills")
+
+
+def study_plan_digest(
+    user_profile: Dict[str, Any],
+    performance_history: List[Dict[str, Any]],
+    target_role: str,
+    target_companies: List[str],
+    model_version: str,
+    history_size: Optional[int] = None
+) -> str:
+    """Hash of everything that would change the generated plan; equal digests mean an equal plan request."""
+    history_size = history_size or settings.study_plan_history_size
+    profile = {field: user_profile.get(field) for field in PROFILE_FIELDS}
+    if isinstance(profile.get("skills"), list):
+        profile["skills"] = sorted(str(skill).lower() for skill in profile["skills"])
+    material = json.dumps(
+        [
+            profile,
+            performance_history[-history_size:],
+            " ".join(target_role.lower().split()),
+            sorted(company.lower() for company in target_companies),
+            model_version
+        ],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class StoredStudyPlan:
+    input_digest: str
+    plan: Dict[str, Any]
+    model_version: str
+
+
+def _as_uuid(user_id: Union[str, uuid.UUID]) -> uuid.UUID:
+    return uuid.UUID(user_id) if isinstance(user_id, str) else user_id
+
+
+class StudyPlanStore:
+    """Each user's current study plan with the digest of the inputs it was generated from."""
+
+    def __init__(self, max_size: int = 5000, ttl_seconds: int = 3600):
+        self._memory: TTLCache[StoredStudyPlan] = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.persist_errors = 0
+
+    async def get(self, user_id: Union[str, uuid.UUID]) -> Optional[StoredStudyPlan]:
+        """Return the current plan (a copy of it), or None if the user has none yet."""
+        user_id = _as_uuid(user_id)
+        stored = self._memory.get(user_id)
+        if stored is None:
+            try:
+                stored = await asyncio.to_thread(self._load, user_id)
+            except Exception as e:
+                self.persist_errors += 1
+                return None
+            if stored is None:
+                return None
+            self._memory.set(user_id, stored)
+        return StoredStudyPlan(stored.input_digest, copy.deepcopy(stored.plan), stored.model_version)
+
+    async def save(self, user_id: Union[str, uuid.UUID], input_digest: str, plan: Dict[str, Any], model_version: str) -> None:
+        user_id = _as_uuid(user_id)
+        stored = StoredStudyPlan(input_digest, copy.deepcopy(plan), model_version)
+        self._memory.set(user_id, stored)
+        try:
+            await asyncio.to_thread(self._store, user_id, stored)
+        except Exception as e:
+            self.persist_errors += 1
+
+    def _load(self, user_id: uuid.UUID) -> Optional[StoredStudyPlan]:
+        db = SessionLocal()
+        try:
+            row = db.get(StudyPlan, user_id)
+            if row is None:
+                return None
+            return StoredStudyPlan(row.input_digest, row.plan, row.model_version)
+        finally:
+            db.close()
+
+    def _store(self, user_id: uuid.UUID, stored: StoredStudyPlan) -> None:
+        db = SessionLocal()
+        try:
+            db.merge(StudyPlan(
+                user_id=user_id,
+                input_digest=stored.input_digest,
+                plan=stored.plan,
+                model_version=stored.model_version
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_plans": len(self._memory),
+            "memory_hits": self._memory.hits,
+            "memory_misses": self._memory.misses,
+            "persist_errors": self.persist_errors
+        }
@@ -0,0 +1,7 @@
+"""Shared utilities
+
+Helpers used by both the API's services package and the app package (caches,
+LLM call metrics, prompt budgeting, streamed JSON parsing). They depend on
+nothing but the standard library and optional tokenizers, so either side can
+import them without pulling in the other
+"""
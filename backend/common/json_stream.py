@@ -0,0 +1,243 @@
+"""
+Incremental JSON Extraction
+Consumes LLM output as it streams and emits top-level fields of the first JSON
+object, or elements of the first JSON array, as soon as each one completes
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+_SCALAR_TERMINATORS = {",", "}", "]", " ", "\t", "\r", "\n"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self.preamble = ""           # Text the model wrote before the JSON object
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+
+        self._buffer: List[str] = []  # Characters of the object seen so far
+        self._started = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+
+        # Top-level member tracking (only meaningful at depth 1)
+        self._expect = "key"          # key | colon | value | comma
+        self._key_start: Optional[int] = None
+        self._current_key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+        # (position, stack snapshot) of every comma, used to trim truncated output
+        self._cut_points: List[Tuple[int, Tuple[str, ...]]] = []
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk of text and return fields completed by it"""
+        completed: List[Tuple[str, Any]] = []
+        for char in chunk:
+            if self.complete:
+                break
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._stack.append("{")
+                    self._buffer.append(char)
+                else:
+                    self.preamble += char
+                continue
+
+            position = len(self._buffer)
+            self._buffer.append(char)
+            self._consume(char, position, completed)
+        return completed
+
+    def _consume(self, char: str, position: int, completed: List[Tuple[str, Any]]):
+        depth = len(self._stack)
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if depth == 1 and self._expect == "key_string":
+                    self._current_key = json.loads("".join(self._buffer[self._key_start:position + 1]))
+                    self._expect = "colon"
+                elif depth == 1 and self._expect == "value":
+                    self._emit(position + 1, completed)
+            return
+
+        # A bare scalar (number, true, false, null) ends at the first terminator
+        if depth == 1 and self._expect == "value" and self._value_start is not None and char in _SCALAR_TERMINATORS:
+            self._emit(position, completed)
+
+        if char == '"':
+            self._in_string = True
+            if depth == 1 and self._expect == "key":
+                self._key_start = position
+                self._expect = "key_string"
+            elif depth == 1 and self._expect == "value_start":
+                self._value_start = position
+                self._expect = "value"
+        elif char in _CLOSERS:
+            if depth == 1 and self._expect == "value_start":
+                self._value_start = position
+                self._expect = "value"
+            self._stack.append(char)
+        elif char in ("}", "]"):
+            if self._stack:
+                self._stack.pop()
+            if len(self._stack) == 1 and self._expect == "value":
+                self._emit(position + 1, completed)
+            elif not self._stack:
+                self.complete = True
+        elif char == ":" and depth == 1 and self._expect == "colon":
+            self._expect = "value_start"
+        elif char == ",":
+            self._cut_points.append((position, tuple(self._stack)))
+            if depth == 1:
+                self._expect = "key"
+        elif depth == 1 and self._expect == "value_start" and not char.isspace():
+            self._value_start = position
+            self._expect = "value"
+
+    def _emit(self, end: int, completed: List[Tuple[str, Any]]):
+        text = "".join(self._buffer[self._value_start:end])
+        self._value_start = None
+        self._expect = "comma"
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return
+        self.fields[self._current_key] = value
+        completed.append((self._current_key, value))
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """Return the parsed object, repairing it if the stream was truncated"""
+        if not self._started:
+            return None
+
+        text = "".join(self._buffer)
+        if self.complete:
+            try:
+                return json.loads(text)
+            except ValueError:
+                pass
+
+        recovered = self._recover(text)
+        if recovered is not None:
+            return recovered
+        return dict(self.fields) if self.fields else None
+
+    def _recover(self, text: str) -> Optional[Dict[str, Any]]:
+        """Close any open string and containers, trimming back to earlier commas on failure"""
+        candidates = [(text + ('"' if self._in_string else ""), tuple(self._stack))]
+        for position, stack in reversed(self._cut_points[-8:]):
+            candidates.append((text[:position], stack))
+
+        for candidate, stack in candidates:
+            body = candidate.rstrip()
+            if body.endswith(":"):
+                continue
+            body = body.rstrip(",")
+            closers = "".join(_CLOSERS[opener] for opener in reversed(stack))
+            try:
+                data = json.loads(body + closers)
+            except ValueError:
+                continue
+            if isinstance(data, dict):
+                return data
+        return None
+
+class IncrementalJSONArrayParser:
+    """Emits each element of the first top-level JSON array as soon as it completes"""
+
+    def __init__(self):
+        self.preamble = ""
+        self.elements: List[Any] = []
+        self.complete = False
+
+        self._started = False
+        self._element: List[str] = []  # Characters of the element being read
+        self._depth = 0                # Nesting inside the current element
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume a chunk of text and return elements completed by it"""
+        completed: List[Any] = []
+        for char in chunk:
+            if self.complete:
+                break
+            if not self._started:
+                if char == "[":
+                    self._started = True
+                else:
+                    self.preamble += char
+                continue
+            self._consume(char, completed)
+        return completed
+
+    def _consume(self, char: str, completed: List[Any]):
+        if self._in_string:
+            self._element.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._depth == 0:
+                    self._emit(completed)
+            return
+
+        if self._depth == 0 and not self._element:
+            # Between elements
+            if char == "]":
+                self.complete = True
+            elif char in _CLOSERS:
+                self._element.append(char)
+                self._depth = 1
+            elif char == '"':
+                self._element.append(char)
+                self._in_string = True
+            elif char != "," and not char.isspace():
+                self._element.append(char)
+            return
+
+        if self._depth == 0:
+            # Inside a bare scalar (number, true, false, null)
+            if char in _SCALAR_TERMINATORS:
+                self._emit(completed)
+                if char == "]":
+                    self.complete = True
+            else:
+                self._element.append(char)
+            return
+
+        self._element.append(char)
+        if char == '"':
+            self._in_string = True
+        elif char in _CLOSERS:
+            self._depth += 1
+        elif char in ("}", "]"):
+            self._depth -= 1
+            if self._depth == 0:
+                self._emit(completed)
+
+    def _emit(self, completed: List[Any]):
+        text = "".join(self._element)
+        self._element = []
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return
+        self.elements.append(value)
+        completed.append(value)
+
+def extract_json_object(text: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Split text into (preamble, first balanced JSON object), recovering truncated objects"""
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.preamble.strip(), parser.finish()
@@ -0,0 +1,226 @@
+"""
+LLM Call Instrumentation
+Captures model, token counts, time to first token, latency and outcome for every
+LLM call, keeps in-process percentiles and hands records to a buffered writer
+that bulk-inserts them into ai_analysis_logs
+"""
+
+import os
+import time
+import asyncio
+from collections import defaultdict, deque
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+LogSink = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+@dataclass
+class LLMCallRecord:
+    processing_type: str
+    model_version: str
+    provider: Optional[str] = None
+    interview_id: Optional[str] = None
+    turn_index: Optional[int] = None
+    input_tokens: Optional[int] = None
+    cached_input_tokens: Optional[int] = None  # Input tokens served from the provider's prompt cache
+    output_tokens: Optional[int] = None
+    time_to_first_token_ms: Optional[int] = None
+    processing_time_ms: Optional[int] = None
+    outcome: str = "success"  # success, error, timeout, fallback
+    error_message: Optional[str] = None
+    prompt_used: Optional[str] = None
+    raw_response: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token estimate for providers that do not report usage on streams"""
+    return max(1, len(text) // 4) if text else 0
+
+class LLMCallTracker:
+    """Times one LLM call; created by LLMMetricsRecorder.start"""
+
+    def __init__(self, recorder: "LLMMetricsRecorder", record: LLMCallRecord):
+        self._recorder = recorder
+        self.record = record
+        self._started = time.monotonic()
+        self._finished = False
+
+    def first_token(self):
+        if self.record.time_to_first_token_ms is None:
+            self.record.time_to_first_token_ms = int((time.monotonic() - self._started) * 1000)
+
+    def finish(
+        self,
+        outcome: str = "success",
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+        error: Optional[BaseException] = None,
+        prompt: Optional[str] = None,
+        response: Optional[str] = None,
+        cached_input_tokens: Optional[int] = None
+    ):
+        if self._finished:
+            return
+        self._finished = True
+
+        record = self.record
+        record.processing_time_ms = int((time.monotonic() - self._started) * 1000)
+        if record.time_to_first_token_ms is None and outcome == "success":
+            record.time_to_first_token_ms = record.processing_time_ms
+        record.outcome = outcome
+        record.input_tokens = input_tokens
+        record.cached_input_tokens = cached_input_tokens
+        record.output_tokens = output_tokens
+        if error is not None:
+            record.error_message = f"{type(error).__name__}: {error}"[:1000]
+        if self._recorder.log_prompts:
+            record.prompt_used = prompt
+            record.raw_response = response
+        self._recorder.submit(record)
+
+class BufferedLogWriter:
+    """Non-blocking writer: records are queued and bulk-inserted in batches by a background task"""
+
+    def __init__(
+        self,
+        sink: Optional[LogSink],
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue: Optional[int] = None
+    ):
+        self._sink = sink
+        self.batch_size = batch_size or int(os.getenv("LLM_LOG_BATCH_SIZE", "100"))
+        self.flush_interval = flush_interval or float(os.getenv("LLM_LOG_FLUSH_SECONDS", "5"))
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue or int(os.getenv("LLM_LOG_MAX_QUEUE", "10000")))
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+
+    def put(self, row: Dict[str, Any]):
+        if self._sink is None:
+            return
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            # Never slow the interview path down for telemetry
+            self.dropped += 1
+            return
+        self._ensure_running()
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._run())
+            except RuntimeError:
+                pass  # No event loop yet; the next put from async code starts the writer
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._write(batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            await self._sink(batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed_batches += 1
+            print(f"Error writing AI analysis logs: {e}")
+
+    async def flush(self):
+        """Write everything queued so far, e.g. on shutdown"""
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+            if len(batch) >= self.batch_size:
+                await self._write(batch)
+                batch = []
+        if batch:
+            await self._write(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches
+        }
+
+class LLMMetricsRecorder:
+    def __init__(self, sink: Optional[LogSink] = None, window: Optional[int] = None):
+        self.writer = BufferedLogWriter(sink)
+        self.log_prompts = os.getenv("LLM_LOG_PROMPTS", "false").lower() == "true"
+        window = window or int(os.getenv("LLM_METRICS_WINDOW", "1000"))
+        self._latency: Dict[str, Deque[int]] = defaultdict(lambda: deque(maxlen=window))
+        self._ttft: Dict[str, Deque[int]] = defaultdict(lambda: deque(maxlen=window))
+        self._tokens: Dict[str, Deque[int]] = defaultdict(lambda: deque(maxlen=window))
+        self._outcomes: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # (input tokens, cached input tokens) per call, for prompt cache hit rates
+        self._cache: Dict[str, Deque[tuple]] = defaultdict(lambda: deque(maxlen=window))
+
+    def start(
+        self,
+        processing_type: str,
+        model_version: str,
+        provider: Optional[str] = None,
+        interview_id: Optional[str] = None,
+        turn_index: Optional[int] = None
+    ) -> LLMCallTracker:
+        return LLMCallTracker(self, LLMCallRecord(
+            processing_type=processing_type,
+            model_version=model_version,
+            provider=provider,
+            interview_id=interview_id,
+            turn_index=turn_index
+        ))
+
+    def submit(self, record: LLMCallRecord):
+        kind = record.processing_type
+        self._outcomes[kind][record.outcome] += 1
+        if record.outcome == "success":
+            self._latency[kind].append(record.processing_time_ms)
+            if record.time_to_first_token_ms is not None:
+                self._ttft[kind].append(record.time_to_first_token_ms)
+            self._tokens[kind].append((record.input_tokens or 0) + (record.output_tokens or 0))
+            if record.cached_input_tokens is not None:
+                self._cache[kind].append((record.input_tokens or 0, record.cached_input_tokens))
+        self.writer.put(asdict(record))
+
+    @staticmethod
+    def _percentiles(samples: Deque[int]) -> Dict[str, Optional[int]]:
+        if not samples:
+            return {"p50": None, "p90": None, "p99": None}
+        ordered = sorted(samples)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99)}
+
+    def summary(self) -> Dict[str, Any]:
+        """Recent latency percentiles and tokens per call, by processing type"""
+        by_type = {}
+        for kind, outcomes in self._outcomes.items():
+            tokens = self._tokens[kind]
+            cache = self._cache[kind]
+            input_tokens = sum(total for total, _ in cache)
+            by_type[kind] = {
+                "calls": dict(outcomes),
+                "latency_ms": self._percentiles(self._latency[kind]),
+                "time_to_first_token_ms": self._percentiles(self._ttft[kind]),
+                "avg_tokens_per_call": round(sum(tokens) / len(tokens)) if tokens else None,
+                "prompt_cache": {
+                    "calls_with_hit": sum(1 for _, cached in cache if cached),
+                    "calls_reported": len(cache),
+                    "cached_token_share": round(sum(cached for _, cached in cache) / input_tokens, 4) if input_tokens else None
+                }
+            }
+        return {"processing_types": by_type, "writer": self.writer.stats()}
@@ -0,0 +1,252 @@
+"""
+Token-Budgeted Prompt Builder
+Assembles prompt sections by priority into a fixed per-call-type token budget,
+trimming or dropping low-priority context instead of cutting at fixed character offsets,
+and lays out multi-turn prompts so stable prefixes can be cached by the provider
+"""
+
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # Heuristic counting is close enough for budgeting
+    tiktoken = None
+
+# Input token budgets per call type (excluding the expected completion)
+DEFAULT_BUDGETS = {
+    "response_analysis": 3000,
+    "interview_summary": 6000,
+    "question_generation": 1500,
+    "study_plan": 3000
+}
+
+# Joins the text blocks of one message when a provider takes plain string content
+BLOCK_SEPARATOR = "\n\n"
+
+# Smallest useful remainder of a trimmed text section
+MIN_TRIMMED_TOKENS = 16
+
+def budget_for(call_type: str) -> int:
+    """PROMPT_BUDGET_<CALL_TYPE> overrides the default budget"""
+    return int(os.getenv(f"PROMPT_BUDGET_{call_type.upper()}", DEFAULT_BUDGETS.get(call_type, 4000)))
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(os.getenv("PROMPT_TOKEN_ENCODING", "cl100k_base"))
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Roughly 4 characters per token for English prose and code
+    return (len(text) + 3) // 4
+
+@lru_cache(maxsize=256)
+def count_static_tokens(text: str) -> int:
+    """Token count for text that repeats verbatim across calls (system prompts, JSON formats)"""
+    return count_tokens(text)
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    """Cut text to max_tokens, keeping the start (head) or the end (tail)"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    max_tokens -= 1  # Room for the ellipsis
+    if max_tokens <= 0:
+        return ""
+
+    encoding = _encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        kept = tokens[:max_tokens] if keep == "head" else tokens[-max_tokens:]
+        cut = encoding.decode(kept)
+    else:
+        chars = max_tokens * 4
+        cut = text[:chars] if keep == "head" else text[-chars:]
+    return f"{cut}…" if keep == "head" else f"…{cut}"
+
+@dataclass
+class PromptSection:
+    name: str
+    text: str = ""
+    items: Optional[List[str]] = None  # Whole items are dropped rather than cut mid-way
+    priority: int = 0  # Higher is budgeted first
+    required: bool = False  # Never dropped; trimmed only if it alone exceeds the budget
+    keep: str = "head"  # Which end survives trimming: head keeps the start, tail the most recent items
+    static: bool = False
+    header: str = ""  # Emitted only when some of the section survives
+    separator: str = "\n"
+    rendered: str = ""
+    tokens: int = 0
+
+@dataclass
+class PromptReport:
+    budget: int
+    used: int = 0
+    sections: Dict[str, int] = field(default_factory=dict)
+    trimmed: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+class PromptBuilder:
+    def __init__(self, budget: int, reserved: int = 0):
+        """reserved covers text sent outside this prompt, e.g. the system prompt"""
+        self.budget = budget
+        self.reserved = reserved
+        self._sections: List[PromptSection] = []
+        self.report: Optional[PromptReport] = None
+
+    @classmethod
+    def for_call(cls, call_type: str, system_prompt: Optional[str] = None) -> "PromptBuilder":
+        return cls(budget_for(call_type), count_static_tokens(system_prompt) if system_prompt else 0)
+
+    def add(
+        self,
+        name: str,
+        text: str,
+        priority: int = 0,
+        required: bool = False,
+        keep: str = "head",
+        static: bool = False,
+        header: str = ""
+    ) -> "PromptBuilder":
+        self._sections.append(PromptSection(
+            name, text or "", priority=priority, required=required, keep=keep, static=static, header=header
+        ))
+        return self
+
+    def add_items(
+        self,
+        name: str,
+        items: List[str],
+        priority: int = 0,
+        keep: str = "tail",
+        header: str = "",
+        separator: str = "\n"
+    ) -> "PromptBuilder":
+        self._sections.append(PromptSection(
+            name, items=[item for item in items if item], priority=priority, keep=keep, header=header, separator=separator
+        ))
+        return self
+
+    def _count(self, section: PromptSection, text: str) -> int:
+        return count_static_tokens(text) if section.static else count_tokens(text)
+
+    def _fit(self, section: PromptSection, available: int, report: PromptReport):
+        header_tokens = count_static_tokens(section.header) if section.header else 0
+        available -= header_tokens
+
+        if section.items is not None:
+            ordered = section.items if section.keep == "head" else list(reversed(section.items))
+            kept, used = [], 0
+            for item in ordered:
+                cost = count_tokens(item) + 1
+                if used + cost > available:
+                    break
+                kept.append(item)
+                used += cost
+            if len(kept) < len(section.items):
+                report.trimmed.append(section.name)
+            body = section.separator.join(kept if section.keep == "head" else list(reversed(kept)))
+        else:
+            used = self._count(section, section.text)
+            body = section.text
+            if used > available:
+                # A few tokens of a cut-off section are noise rather than context
+                fits = available >= MIN_TRIMMED_TOKENS or section.required
+                body = truncate_to_tokens(section.text, available, section.keep) if fits else ""
+                used = count_tokens(body)
+                report.trimmed.append(section.name)
+
+        if body:
+            section.rendered, section.tokens = section.header + body, header_tokens + used
+        else:
+            section.rendered, section.tokens = "", 0
+
+    def build(self) -> str:
+        """Render sections in the order added, budgeted in priority order (required first)"""
+        report = PromptReport(budget=self.budget)
+        remaining = self.budget - self.reserved
+
+        for section in sorted(self._sections, key=lambda s: (not s.required, -s.priority)):
+            if remaining <= 0 and not section.required:
+                section.rendered, section.tokens = "", 0
+                report.dropped.append(section.name)
+                continue
+            # A required section overruns what is left rather than vanish; only the budget itself caps it
+            self._fit(section, max(remaining, self.budget) if section.required else max(remaining, 0), report)
+            if not section.rendered and (section.text or section.items):
+                report.dropped.append(section.name)
+            remaining -= section.tokens
+            report.sections[section.name] = section.tokens
+
+        report.used = self.budget - remaining
+        self.report = report
+        return "".join(section.rendered for section in self._sections)
+
+@dataclass
+class ChatPrompt:
+    """A prompt as system text plus messages of text blocks, laid out so earlier blocks stay
+    byte-identical across turns. cache_breakpoints lists (message, block) positions that end
+    a stable prefix worth caching provider-side; (-1, 0) marks the system prompt."""
+    system: Optional[str] = None
+    messages: List[Dict[str, Any]] = field(default_factory=list)  # {"role": ..., "blocks": [str, ...]}
+    cache_breakpoints: List[Tuple[int, int]] = field(default_factory=list)
+
+    @classmethod
+    def from_text(cls, prompt: str, system: Optional[str] = None) -> "ChatPrompt":
+        return cls(system=system, messages=[{"role": "user", "blocks": [prompt]}],
+                   cache_breakpoints=[(-1, 0)] if system else [])
+
+    def add(self, role: str, text: str, cache: bool = False) -> "ChatPrompt":
+        """Append a block, extending the last message when it has the same role"""
+        if self.messages and self.messages[-1]["role"] == role:
+            self.messages[-1]["blocks"].append(text)
+        else:
+            self.messages.append({"role": role, "blocks": [text]})
+        if cache:
+            self.cache_breakpoints.append((len(self.messages) - 1, len(self.messages[-1]["blocks"]) - 1))
+        return self
+
+    def text(self) -> str:
+        """Everything the model sees, flattened; for logging, estimates and the mock fallback"""
+        parts = [self.system] if self.system else []
+        parts.extend(BLOCK_SEPARATOR.join(message["blocks"]) for message in self.messages)
+        return "\n\n".join(parts)
+
+    def anthropic_request(self) -> Dict[str, Any]:
+        """system and messages kwargs with cache_control on each breakpoint block"""
+        request: Dict[str, Any] = {}
+        if self.system:
+            block = {"type": "text", "text": self.system}
+            if (-1, 0) in self.cache_breakpoints:
+                block["cache_control"] = {"type": "ephemeral"}
+            request["system"] = [block]
+        messages = []
+        for index, message in enumerate(self.messages):
+            content = []
+            for block_index, text in enumerate(message["blocks"]):
+                block = {"type": "text", "text": text}
+                if (index, block_index) in self.cache_breakpoints:
+                    block["cache_control"] = {"type": "ephemeral"}
+                content.append(block)
+            messages.append({"role": message["role"], "content": content})
+        request["messages"] = messages
+        return request
+
+    def openai_messages(self) -> List[Dict[str, str]]:
+        """OpenAI caches matching prefixes automatically; joining blocks keeps the prefix identical"""
+        messages = [{"role": "system", "content": self.system}] if self.system else []
+        messages.extend(
+            {"role": message["role"], "content": BLOCK_SEPARATOR.join(message["blocks"])}
+            for message in self.messages
+        )
+        return messages
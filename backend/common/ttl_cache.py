@@ -0,0 +1,96 @@
+"""
+TTL/LRU Cache
+Small in-process cache with per-entry expiry and least-recently-used eviction
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Iterator, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+class TTLCache(Generic[V]):
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = 3600, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        """Return a live entry and mark it most recently used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable) -> Optional[V]:
+        """Return a live entry without touching LRU order or hit counters"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+    def set(self, key: Hashable, value: V, ttl_seconds: Optional[float] = None):
+        """Insert or replace an entry, evicting the least recently used ones if full"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = self._clock() + ttl if ttl is not None else float("inf")
+
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else default
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry and return how many were removed"""
+        now = self._clock()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
+
+    def clear(self):
+        self._entries.clear()
+
+    def keys(self) -> Iterator[Hashable]:
+        return iter(list(self._entries.keys()))
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.peek(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters for health and metrics endpoints"""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate, 4)
+        }
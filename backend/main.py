@@ -26,6 +26,16 @@ from services.audio_processor import AudioProcessor
 from services.speech_to_text import SpeechToTextService
 from services.ai_interviewer import AIInterviewerService
 from services.database import DatabaseService
+from services.question_cache import parse_warm_keys
+from services.evaluation_aggregates import EvaluationAggregates
+from services.batch_pipeline import BatchPipeline, BatchTask, BatchJob, DatabaseBatchJobStore, COMPLETED, create_batch_executor
+from services.session_store import SessionStore, create_session_store
+from services.session_records import TranscriptEntry, ResponseRecord
+from services.ingest_queue import IngestQueues
+from services.connection_writer import ConnectionWriter
+from services.message_router import MessageRouter, create_message_router
+from services.session_checkpoint import SessionCheckpointer
+from services.wire_codec import OutboundMessage, SerializationStats, negotiate_codec
 from models.interview import Interview, InterviewQuestion, InterviewResponse, FeedbackSummary
 from routes import voice_interview
 
@@ -51,43 +61,205 @@ app.add_middleware(
 # Initialize services
 audio_processor = AudioProcessor()
 stt_service = SpeechToTextService()
-ai_interviewer = AIInterviewerService()
 db_service = DatabaseService()
+ai_interviewer = AIInterviewerService(log_sink=db_service.insert_ai_analysis_logs)
+# Jobs are kept in the database, so any worker can report them and they outlive the worker running them
+batch_pipeline = BatchPipeline(
+    create_batch_executor(ai_interviewer.complete_batch_job, ai_interviewer.clients.get("openai")),
+    store=DatabaseBatchJobStore(db_service)
+)
+
+async def spill_session_entries(session_id: str, field: str, start_index: int, items: List[Any]):
+    # Questions and responses are written to the database as they happen; only transcript chunks need a copy
+    if field == "transcript":
+        await db_service.add_transcript_entries(session_id, start_index, [item.to_dict() for item in items])
+
+# Session state is shared across workers (SESSION_STORE=redis) so any worker can serve any session
+session_store = create_session_store(on_spill=spill_session_entries)
+# Periodic on-disk copies of live sessions, so a reconnect after a worker restart resumes the interview
+checkpointer = SessionCheckpointer(session_store)
 
 # WebSocket connection manager
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, sessions: SessionStore, router: MessageRouter, checkpoints: SessionCheckpointer):
         self.active_connections: Dict[str, WebSocket] = {}
-        self.interview_sessions: Dict[str, Dict] = {}
+        # Each connection has its own outbound queue and writer task; nothing here awaits a client's send
+        self.writers: Dict[str, ConnectionWriter] = {}
+        # Id of each socket, also stored on the session, so a worker whose socket was replaced
+        # by a reconnect to another worker can tell it no longer owns the session
+        self.connection_ids: Dict[str, str] = {}
+        self.serialization = SerializationStats()
+        self.sessions = sessions
+        self.checkpoints = checkpoints
+        # Messages for sessions whose socket is held by another worker go through the router
+        self.router = router
+        self.router.set_deliver(self.deliver_local)
+        self.drain_timeout = float(os.getenv("WS_DRAIN_TIMEOUT_SECONDS", "2"))
+        self.closed_counts: Dict[str, int] = {}
 
-    async def connect(self, websocket: WebSocket, session_id: str):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, session_id: str) -> bool:
+        """Accept the socket; returns True if an interview in progress was resumed rather than started"""
+        codec, subprotocol = negotiate_codec(
+            websocket.scope.get("subprotocols", []),
+            websocket.query_params.get("encoding")
+        )
+        await websocket.accept(subprotocol=subprotocol)
+        previous = self.active_connections.get(session_id)
+        if previous is not None:
+            # The client reconnected before this worker saw the old socket drop; the new one takes over
+            await self.writers.pop(session_id).close()
+            try:
+                await previous.close(code=1000, reason="Replaced by a new connection")
+            except Exception:
+                pass
         self.active_connections[session_id] = websocket
-        self.interview_sessions[session_id] = {
-            "start_time": datetime.now(),
+        connection_id = self.connection_ids[session_id] = uuid.uuid4().hex
+        self.writers[session_id] = ConnectionWriter(
+            websocket,
+            on_slow=lambda reason: self.drop_slow_consumer(session_id, websocket, reason),
+            codec=codec,
+            serialization=self.serialization
+        )
+        await self.router.register(session_id)
+        self.checkpoints.track(session_id)
+        if await self.resume(session_id):
+            await self.sessions.set_field(session_id, "connection_id", connection_id)
+            return True
+        await self.sessions.create(session_id, {
+            "start_time": datetime.now().isoformat(),
             "transcript": [],
             "questions": [],
             "responses": [],
             "current_question_index": 0,
-            "audio_chunks": [],
-            "status": "active"
+            "aggregates": EvaluationAggregates().to_dict(),
+            "status": "active",
+            "connection_id": connection_id
+        })
+        return False
+
+    async def resume(self, session_id: str) -> bool:
+        # Still live in the store (reconnect to any worker), else rebuilt from the last checkpoint
+        status = await self.sessions.get_field(session_id, "status")
+        if status is None and await self.checkpoints.restore(session_id):
+            status = await self.sessions.get_field(session_id, "status")
+        return status == "active"
+
+    async def disconnect(self, session_id: str, websocket: Optional[WebSocket] = None, complete: bool = True) -> bool:
+        """Drop the session's connection, or only `websocket` if given and still current
+
+        Returns False if that socket had already been replaced by a reconnect, here or on
+        another worker; the session is then left to the new connection.
+        """
+        if websocket is not None and self.active_connections.get(session_id) is not websocket:
+            return False
+        connection_id = self.connection_ids.pop(session_id, None)
+        self.active_connections.pop(session_id, None)
+        writer = self.writers.pop(session_id, None)
+        await self.router.unregister(session_id)
+        if writer is not None:
+            await writer.close(self.drain_timeout)
+            for name, count in writer.counts.items():
+                self.closed_counts[name] = self.closed_counts.get(name, 0) + count
+        if websocket is not None:
+            owner = await self.sessions.get_field(session_id, "connection_id")
+            if owner is not None and owner != connection_id:
+                return False
+        # Completed sessions stay around briefly for the summary and late requests, then expire
+        if complete:
+            await self.sessions.complete(session_id)
+        return True
+
+    async def send_message(self, session_id: str, message: dict, deadline: Optional[float] = None):
+        writer = self.writers.get(session_id)
+        if writer is not None:
+            writer.send(message, deadline)
+            return
+        # Monotonic deadlines don't cross processes; the owning worker applies its own message TTLs
+        if not await self.router.publish(session_id, message):
+            print(f"No worker holds a WebSocket for session {session_id}; dropped {message.get('type')} message")
+
+    async def deliver_local(self, session_id: str, message: dict):
+        """Router delivery for a session whose socket this worker holds"""
+        writer = self.writers.get(session_id)
+        if writer is not None:
+            writer.send(message)
+
+    async def broadcast(self, message: dict, deadline: Optional[float] = None):
+        # Enqueue only; every writer sends concurrently, so one slow client doesn't hold up the rest.
+        # The message is encoded once per codec in use, not once per connection
+        outbound = OutboundMessage(message)
+        for writer in list(self.writers.values()):
+            writer.send(outbound, deadline)
+        await self.router.broadcast(message)
+
+    async def drop_slow_consumer(self, session_id: str, websocket: WebSocket, reason: str):
+        """Close a connection that can't keep up; its receive loop then cleans up as for any disconnect"""
+        print(f"Closing slow WebSocket consumer {session_id}: {reason}")
+        try:
+            await websocket.close(code=1013, reason="Client too slow")
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        counts = dict(self.closed_counts)
+        for writer in self.writers.values():
+            for name, count in writer.counts.items():
+                counts[name] = counts.get(name, 0) + count
+        return {
+            "connections": len(self.writers),
+            "queued": sum(writer.queued for writer in self.writers.values()),
+            **{name: counts.get(name, 0) for name in ("sent", "coalesced", "expired", "failed", "slow_consumer")}
         }
 
-    def disconnect(self, session_id: str):
-        if session_id in self.active_connections:
-            del self.active_connections[session_id]
-        if session_id in self.interview_sessions:
-            self.interview_sessions[session_id]["status"] = "completed"
+manager = ConnectionManager(session_store, create_message_router(), checkpointer)
+ingest_queues = IngestQueues()
 
-    async def send_message(self, session_id: str, message: dict):
-        if session_id in self.active_connections:
-            await self.active_connections[session_id].send_json(message)
+async def load_session(session_id: str) -> Optional[Dict[str, Any]]:
+    """Full session state with stored records turned back into the objects the services expect"""
+    session = await session_store.load(session_id)
+    if session is None:
+        return None
+    session["start_time"] = datetime.fromisoformat(session["start_time"])
+    session["aggregates"] = EvaluationAggregates.from_dict(session["aggregates"] or {})
+    session["transcript"] = [entry.to_dict() for entry in session["transcript"]]
+    session["responses"] = [response.to_dict() for response in session["responses"]]
+    return session
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections.values():
-            await connection.send_json(message)
+@app.on_event("startup")
+async def start_session_eviction():
+    """Periodically drop completed and abandoned sessions whose TTL has passed"""
+    interval = float(os.getenv("SESSION_EVICT_INTERVAL_SECONDS", "60"))
+    
+    async def evict_loop():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await session_store.evict_expired()
+            except Exception as e:
+                print(f"Session eviction error: {e}")
+    
+    asyncio.create_task(evict_loop())
 
-manager = ConnectionManager()
+@app.on_event("startup")
+async def start_session_checkpoints():
+    asyncio.create_task(checkpointer.run())
+
+@app.on_event("startup")
+async def recover_batch_jobs():
+    """Take over deferred summaries left unfinished by workers that stopped"""
+    try:
+        recovered = await batch_pipeline.recover()
+        if recovered:
+            print(f"Recovered {recovered} unfinished batch jobs")
+    except Exception as e:
+        print(f"Batch job recovery error: {e}")
+
+@app.on_event("startup")
+async def warm_question_cache():
+    """Pre-generate opening questions for the most common interview configurations"""
+    warm_keys = parse_warm_keys(os.getenv("QUESTION_CACHE_WARM_KEYS", ""))
+    if warm_keys:
+        asyncio.create_task(ai_interviewer.question_cache.warm(warm_keys))
 
 # Pydantic models for request/response
 class AudioChunk(BaseModel):
@@ -106,6 +278,7 @@ class InterviewStart(BaseModel):
 class InterviewEnd(BaseModel):
     session_id: str
     reason: str = "completed"
+    defer_summary: Optional[bool] = None  # Defaults to SUMMARY_DEFER
 
 class TranscriptResponse(BaseModel):
     text: str
@@ -117,6 +290,7 @@ class AIResponse(BaseModel):
     evaluation_json: Dict[str, Any]
     next_question: Optional[str] = None
     interview_complete: bool = False
+    fallback: bool = False  # Placeholder evaluation, not the model's
 
 # API Endpoints
 
@@ -167,8 +341,7 @@ async def start_interview(interview_data: InterviewStart):
 async def upload_audio_chunk(audio_chunk: AudioChunk):
     """Process audio chunk and return transcript"""
     try:
-        session = manager.interview_sessions.get(audio_chunk.session_id)
-        if not session:
+        if not await session_store.exists(audio_chunk.session_id):
             raise HTTPException(status_code=404, detail="Session not found")
         
         # Decode base64 audio data
@@ -188,11 +361,13 @@ async def upload_audio_chunk(audio_chunk: AudioChunk):
         transcript = await stt_service.transcribe(wav_data)
         
         # Add to session transcript
-        session["transcript"].append({
-            "text": transcript.text,
-            "timestamp": audio_chunk.timestamp,
-            "confidence": transcript.confidence
-        })
+        transcript_length = await session_store.append(audio_chunk.session_id, "transcript", TranscriptEntry(
+            text=transcript.text,
+            timestamp=audio_chunk.timestamp,
+            confidence=transcript.confidence
+        ))
+        # Chunks up to here are never re-transcribed when the client resends them after a reconnect
+        await session_store.set_field(audio_chunk.session_id, "last_chunk_index", audio_chunk.chunk_index)
         
         # Send transcript back via WebSocket if connected
         await manager.send_message(audio_chunk.session_id, {
@@ -205,7 +380,7 @@ async def upload_audio_chunk(audio_chunk: AudioChunk):
         })
         
         # Process with AI if we have enough transcript
-        if len(session["transcript"]) >= 3:  # Process every 3 chunks (~6 seconds)
+        if transcript_length >= 3:  # Process every 3 chunks (~6 seconds)
             await process_ai_response(audio_chunk.session_id)
         
         return {"status": "processed", "transcript": transcript.text}
@@ -215,30 +390,56 @@ async def upload_audio_chunk(audio_chunk: AudioChunk):
 
 async def process_ai_response(session_id: str):
     """Process accumulated transcript with AI interviewer"""
-    session = manager.interview_sessions.get(session_id)
-    if not session:
+    if not await session_store.exists(session_id):
         return
     
     # Get recent transcript
-    recent_transcript = " ".join([t["text"] for t in session["transcript"][-5:]])
+    recent_transcript = " ".join([t.text for t in await session_store.tail(session_id, "transcript", 5)])
     
     if not recent_transcript.strip():
         return
     
     # Get interview context from database
     interview = await db_service.get_interview_by_session(session_id)
-    current_question = session["questions"][-1] if session["questions"] else None
+    last_questions = await session_store.tail(session_id, "questions", 1)
+    current_question = last_questions[-1] if last_questions else None
+    aggregates = EvaluationAggregates.from_dict(await session_store.get_field(session_id, "aggregates") or {})
+    previous_offset, previous_responses = await session_store.window(session_id, "responses")
+    
+    async def forward_field(key: str, value: Any):
+        # Send the spoken reply as soon as it is complete, ahead of the evaluation
+        if key == "assistant_reply":
+            await manager.send_message(session_id, {
+                "type": "assistant_reply",
+                "data": {"text": value}
+            })
     
     # Get AI response
-    ai_response = await ai_interviewer.process_response(
+    ai_response = AIResponse(**await ai_interviewer.process_response(
         transcript=recent_transcript,
         current_question=current_question,
         interview_context={
             "position": interview.position,
             "type": interview.interview_type,
-            "previous_responses": session["responses"]
-        }
-    )
+            "interview_id": interview.id,
+            # Responses so far, spilled ones included: this turn's number in the LLM call logs
+            "turn_index": previous_offset + len(previous_responses),
+            "previous_responses": [r.to_dict() for r in previous_responses],
+            "aggregates": aggregates
+        },
+        on_field=forward_field
+    ))
+    
+    # Fold the evaluation into the session's running aggregates; re-read under the update so
+    # an evaluation stored by another worker in the meantime isn't lost
+    def fold_evaluation(data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        current = EvaluationAggregates.from_dict(data or {})
+        current.update(ai_response.evaluation_json)
+        return current.to_dict()
+    
+    # A placeholder evaluation would pull every average towards the defaults
+    if not ai_response.fallback:
+        await session_store.update_field(session_id, "aggregates", fold_evaluation)
     
     # Store response in database
     await db_service.add_response(
@@ -260,15 +461,23 @@ async def process_ai_response(session_id: str):
     })
     
     # Add to session responses
-    session["responses"].append({
-        "transcript": recent_transcript,
-        "ai_response": ai_response.dict(),
-        "timestamp": datetime.now().isoformat()
-    })
+    await session_store.append(session_id, "responses", ResponseRecord.from_ai_response(
+        recent_transcript, ai_response.dict(), datetime.now().isoformat()
+    ))
+    
+    # Summarize completed segments in the background so the final summary stays fast
+    transcript_offset, transcript_entries = await session_store.window(session_id, "transcript")
+    responses_offset, response_records = await session_store.window(session_id, "responses")
+    ai_interviewer.summarizer.observe(
+        session_id,
+        [entry.to_dict() for entry in transcript_entries],
+        [response.to_dict() for response in response_records],
+        {"transcript": transcript_offset, "responses": responses_offset}
+    )
     
     # If there's a next question, add it
     if ai_response.next_question and not ai_response.interview_complete:
-        session["questions"].append({
+        await session_store.append(session_id, "questions", {
             "id": str(uuid.uuid4()),
             "text": ai_response.next_question,
             "timestamp": datetime.now().isoformat()
@@ -282,13 +491,27 @@ async def process_ai_response(session_id: str):
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """WebSocket endpoint for real-time communication"""
-    await manager.connect(websocket, session_id)
+    resumed = await manager.connect(websocket, session_id)
+    last_chunk_index = await session_store.get_field(session_id, "last_chunk_index") if resumed else None
+    ingest = ingest_queues.open(
+        session_id,
+        process=upload_audio_chunk,
+        notify=lambda message: manager.send_message(session_id, message),
+        start_index=None if last_chunk_index is None else last_chunk_index + 1
+    )
     
     try:
         # Send initial connection confirmation
         await manager.send_message(session_id, {
             "type": "connection",
-            "data": {"status": "connected", "session_id": session_id}
+            "data": {
+                "status": "connected",
+                "session_id": session_id,
+                "resumed": resumed,
+                "encoding": manager.writers[session_id].codec.name,
+                # The client resumes sending audio from here
+                "next_chunk_index": ingest.next_index
+            }
         })
         
         while True:
@@ -296,17 +519,18 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             data = await websocket.receive_json()
             
             if data["type"] == "audio_chunk":
-                # Process audio chunk
+                # Only enqueue: the loop keeps reading (and answering pings) while chunks are processed
                 audio_chunk = AudioChunk(
                     session_id=session_id,
                     chunk_data=data["data"]["chunk"],
                     timestamp=data["data"]["timestamp"],
                     chunk_index=data["data"]["index"]
                 )
-                await upload_audio_chunk(audio_chunk)
+                await ingest.offer(audio_chunk.chunk_index, audio_chunk)
                 
             elif data["type"] == "end_interview":
-                # End interview
+                # Finish the chunks already received before summarizing
+                await ingest_queues.close(session_id, ingest)
                 await end_interview_session(session_id)
                 break
                 
@@ -314,32 +538,93 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                 # Keep connection alive
                 await manager.send_message(session_id, {"type": "pong"})
                 
-    except WebSocketDisconnect:
-        manager.disconnect(session_id)
-        await end_interview_session(session_id)
+    except WebSocketDisconnect as e:
+        await ingest_queues.close(session_id, ingest)
+        # 1012: this worker is restarting; keep the session for the client's reconnect
+        restarting = e.code == 1012
+        if await manager.disconnect(session_id, websocket, complete=not restarting):
+            if restarting:
+                await checkpointer.checkpoint(session_id)
+            else:
+                await end_interview_session(session_id)
+    finally:
+        # No-op unless the loop failed some other way; don't leave the processor running
+        await ingest_queues.close(session_id, ingest, drain=False)
 
 @app.post("/api/interview/end")
 async def end_interview(end_data: InterviewEnd):
     """End an interview session and generate summary"""
     try:
-        return await end_interview_session(end_data.session_id)
+        return await end_interview_session(end_data.session_id, end_data.defer_summary)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def end_interview_session(session_id: str):
+async def build_summary_batch_request(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # Session data is only needed to build the prompt; don't hold it until the batch completes
+    session = payload.pop("session")
+    prompt = await ai_interviewer.build_summary_prompt(
+        transcript=session["transcript"],
+        responses=session["responses"],
+        questions=session["questions"],
+        session_id=payload["session_id"],
+        aggregates=session["aggregates"],
+        offsets=session["offsets"]
+    )
+    return ai_interviewer.build_batch_request(prompt)
+
+async def store_batch_summary(job: BatchJob):
+    summary = job.result if job.status == COMPLETED else ai_interviewer._get_default_summary()
+    await db_service.add_feedback_summary(
+        interview_id=job.payload["interview_id"],
+        summary=summary
+    )
+    # The interview is only complete once its summary exists; until then the job can be recovered
+    await db_service.update_interview_status(job.payload["interview_id"], "completed")
+    ai_interviewer.summarizer.discard(job.payload["session_id"])
+    await checkpointer.discard(job.payload["session_id"])
+
+batch_pipeline.register("interview_summary", BatchTask(
+    build_request=build_summary_batch_request,
+    parse=lambda payload, content: ai_interviewer.parse_summary(content),
+    on_result=store_batch_summary
+))
+
+async def end_interview_session(session_id: str, defer_summary: Optional[bool] = None):
     """Helper function to end interview and generate summary"""
-    session = manager.interview_sessions.get(session_id)
+    session = await load_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     # Get interview from database
     interview = await db_service.get_interview_by_session(session_id)
     
+    if defer_summary is None:
+        defer_summary = os.getenv("SUMMARY_DEFER", "false").lower() == "true"
+    if defer_summary:
+        # Summary is produced off the interactive path and written back when the batch completes
+        job = await batch_pipeline.submit("interview_summary", {
+            "interview_id": interview.id,
+            "session_id": session_id,
+            "session": session
+        })
+        await manager.disconnect(session_id)
+        
+        return {
+            "status": "summary_pending",
+            "interview_id": interview.id,
+            "summary_job_id": job.id,
+            "duration": (datetime.now() - session["start_time"]).total_seconds()
+        }
+    
     # Generate final summary
     summary = await ai_interviewer.generate_summary(
         transcript=session["transcript"],
         responses=session["responses"],
-        questions=session["questions"]
+        questions=session["questions"],
+        session_id=session_id,
+        aggregates=session["aggregates"],
+        interview_id=interview.id,
+        offsets=session["offsets"]
     )
     
     # Store summary in database
@@ -352,7 +637,9 @@ async def end_interview_session(session_id: str):
     await db_service.update_interview_status(interview.id, "completed")
     
     # Clean up session
-    manager.disconnect(session_id)
+    ai_interviewer.summarizer.discard(session_id)
+    await checkpointer.discard(session_id)
+    await manager.disconnect(session_id)
     
     return {
         "status": "completed",
@@ -385,6 +672,14 @@ async def get_interview_report(interview_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/batch/{job_id}")
+async def get_batch_job(job_id: str):
+    """Poll the status of a deferred summary or analysis job"""
+    job = await batch_pipeline.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job.to_dict()
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
@@ -395,9 +690,59 @@ async def health_check():
             "database": await db_service.health_check(),
             "stt": stt_service.is_available(),
             "ai": ai_interviewer.is_available()
-        }
+        },
+        "ai_breakers": ai_interviewer.breaker_status(),
+        "question_cache": ai_interviewer.question_cache.stats(),
+        "batch": batch_pipeline.stats(),
+        "sessions": session_store.stats(),
+        "ingest": ingest_queues.stats(),
+        "websockets": manager.stats(),
+        "routing": manager.router.stats(),
+        "checkpoints": checkpointer.stats()
+    }
+
+@app.get("/api/metrics/llm")
+async def llm_metrics():
+    """Recent LLM latency percentiles and token usage by processing type"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "interviewer": ai_interviewer.metrics_summary()
+    }
+
+@app.get("/api/metrics/serialization")
+async def serialization_metrics():
+    """Outbound WebSocket encode time and size by message type and wire encoding"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "websockets": manager.serialization.stats()
+    }
+
+@app.get("/api/metrics/sessions")
+async def session_metrics():
+    """Memory held by live and recently completed sessions, largest first"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "store": session_store.stats(),
+        "memory": await session_store.memory_report()
     }
 
+@app.on_event("shutdown")
+async def flush_llm_logs():
+    await ai_interviewer.metrics.writer.flush()
+
+@app.on_event("shutdown")
+async def checkpoint_sessions():
+    """Last checkpoint of every session this worker holds, for the worker that picks them up"""
+    await checkpointer.checkpoint_all()
+
+@app.on_event("shutdown")
+async def close_session_store():
+    await session_store.close()
+
+@app.on_event("shutdown")
+async def close_message_router():
+    await manager.router.close()
+
 # Include voice interview routes
 app.include_router(voice_interview.router)
 
@@ -407,5 +752,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        # Negotiated with clients that offer it; pays off mainly on the large evaluation messages
+        ws_per_message_deflate=os.getenv("WS_PER_MESSAGE_DEFLATE", "true").lower() == "true"
     )
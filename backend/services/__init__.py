@@ -1,14 +1,25 @@
-"""Services package"""
-
-from .audio_processor import AudioProcessor
-from .speech_to_text import SpeechToTextService, TranscriptionResult
-from .ai_interviewer import AIInterviewerService
-from .database import DatabaseService
-
-__all__ = [
-    "AudioProcessor",
-    "SpeechToTextService",
-    "TranscriptionResult",
-    "AIInterviewerService",
-    "DatabaseService"
-]
+"""Services package
+
+The service classes are imported on first access, so importing one of the
+lightweight modules (services.session_store, services.batch_pipeline, ...) doesn't
+pull in the audio, database and AI provider dependencies
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    "AudioProcessor": ".audio_processor",
+    "SpeechToTextService": ".speech_to_text",
+    "TranscriptionResult": ".speech_to_text",
+    "AIInterviewerService": ".ai_interviewer",
+    "DatabaseService": ".database"
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
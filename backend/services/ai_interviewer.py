@@ -6,27 +6,87 @@ Integrates with Claude API for intelligent interview responses and evaluation
 import os
 import json
 import asyncio
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, List, Optional, AsyncIterator, Awaitable, Callable, Union
 from datetime import datetime
 import anthropic
 from openai import AsyncOpenAI
 
+from common.llm_metrics import LLMMetricsRecorder, LogSink, estimate_tokens
+from common.json_stream import IncrementalJSONParser, extract_json_object
+from common.prompt_builder import ChatPrompt, PromptBuilder, budget_for, count_static_tokens, count_tokens
+from .circuit_breaker import CircuitBreaker, Deadline
+from .evaluation_aggregates import EvaluationAggregates
+from .interview_summarizer import HierarchicalSummarizer
+from .question_cache import InitialQuestionCache
+
+SUMMARY_FORMAT = """{
+    "overall_performance": 0-100,
+    "technical_skills": 0-100,
+    "communication_skills": 0-100,
+    "problem_solving": 0-100,
+    "cultural_fit": 0-100,
+    "strengths": ["key", "strengths", "observed"],
+    "weaknesses": ["areas", "for", "improvement"],
+    "recommendation": "strong_yes|yes|maybe|no|strong_no",
+    "recommendation_reasoning": "Detailed explanation",
+    "suggested_next_steps": ["follow-up", "actions"],
+    "notable_responses": ["standout", "answers"],
+    "red_flags": ["any", "concerns"],
+    "additional_notes": "Any other observations"
+}"""
+
 class AIInterviewerService:
-    def __init__(self):
+    def __init__(self, log_sink: Optional[LogSink] = None):
         self.provider = os.getenv("AI_PROVIDER", "claude")  # claude or openai
         
-        if self.provider == "claude":
-            self.client = anthropic.AsyncAnthropic(
-                api_key=os.getenv("ANTHROPIC_API_KEY", "")
-            )
-            self.model = "claude-3-opus-20240229"
-        else:
-            self.client = AsyncOpenAI(
-                api_key=os.getenv("OPENAI_API_KEY", "")
-            )
-            self.model = "gpt-4-turbo-preview"
+        self.clients: Dict[str, Any] = {}
+        self.models: Dict[str, str] = {}
+        for provider in self._provider_order():
+            self.clients[provider], self.models[provider] = self._create_client(provider)
+        self.client = self.clients[self.provider]
+        self.model = self.models[self.provider]
+        
+        # Fail fast on degraded providers instead of waiting out client timeouts
+        self.breakers = {provider: CircuitBreaker(provider) for provider in self.clients}
+        self.turn_budget_seconds = float(os.getenv("AI_TURN_BUDGET_SECONDS", "12"))
+        self.summary_budget_seconds = float(os.getenv("AI_SUMMARY_BUDGET_SECONDS", "45"))
+        # Share of the remaining budget a provider may use while another one is still left to try
+        self.failover_budget_share = float(os.getenv("AI_FAILOVER_BUDGET_SHARE", "0.6"))
+        self.min_call_seconds = float(os.getenv("AI_MIN_CALL_SECONDS", "1"))
+        
+        self.metrics = LLMMetricsRecorder(log_sink)
+        
+        # Conversation history kept in the cached prompt prefix
+        self.history_budget_tokens = int(os.getenv("PROMPT_HISTORY_BUDGET", "2000"))
+        self.history_drop_block = int(os.getenv("PROMPT_HISTORY_DROP_BLOCK", "4"))
         
         self.system_prompt = self._get_system_prompt()
+        self.question_cache = InitialQuestionCache(self._generate_initial_question)
+        self.summary_mode = os.getenv("SUMMARY_MODE", "auto")  # auto, single, or hierarchical
+        self.summarizer = HierarchicalSummarizer(self._complete_without_system)
+    
+    def _provider_order(self) -> List[str]:
+        """Primary provider first, then the secondary used when the primary is failing"""
+        other = "openai" if self.provider == "claude" else "claude"
+        fallback = os.getenv("AI_FALLBACK_PROVIDER", "")
+        if not fallback:
+            # Only fail over to a provider that is actually configured
+            key = "OPENAI_API_KEY" if other == "openai" else "ANTHROPIC_API_KEY"
+            fallback = other if os.getenv(key) else "none"
+        return [self.provider] + ([fallback] if fallback in ("claude", "openai") and fallback != self.provider else [])
+    
+    def _create_client(self, provider: str):
+        # Base URLs let the service run against local stand-in servers (see standin/)
+        if provider == "claude":
+            return anthropic.AsyncAnthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY", ""),
+                base_url=os.getenv("ANTHROPIC_BASE_URL") or None
+            ), "claude-3-opus-20240229"
+        return AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY", ""),
+            base_url=os.getenv("OPENAI_BASE_URL") or None
+        ), "gpt-4-turbo-preview"
     
     def _get_system_prompt(self) -> str:
         """Get the system prompt for the AI interviewer"""
@@ -61,7 +121,21 @@ Maintain a conversational yet professional tone. Ask follow-up questions when an
 """
     
     async def get_initial_question(self, position: str, interview_type: str, difficulty: str) -> Dict[str, Any]:
-        """Generate the initial interview question"""
+        """Get an opening interview question, served from the pre-generated pool when possible"""
+        try:
+            return await self.question_cache.get(position, interview_type, difficulty)
+        except Exception as e:
+            print(f"Error generating initial question: {e}")
+            # Fallback question if generation fails
+            return {
+                "question": f"Thank you for joining us today. To start, could you tell me about your experience relevant to the {position} position?",
+                "type": "behavioral",
+                "expected_topics": ["experience", "skills", "motivation"],
+                "evaluation_criteria": ["communication", "relevance", "enthusiasm"]
+            }
+    
+    async def _generate_initial_question(self, position: str, interview_type: str, difficulty: str) -> Dict[str, Any]:
+        """Generate a single opening question variant with the LLM"""
         prompt = f"""Generate an appropriate opening interview question for:
 Position: {position}
 Interview Type: {interview_type}
@@ -75,45 +149,39 @@ Return a JSON object with:
     "evaluation_criteria": ["what", "to", "look", "for"]
 }}"""
         
-        response = await self._get_ai_response(prompt, is_system=False)
+        response = await self._get_ai_response(prompt, is_system=False, processing_type="question_generation")
+        _, question = extract_json_object(response)
         
-        try:
-            return json.loads(response)
-        except:
-            # Fallback question if parsing fails
-            return {
-                "question": f"Thank you for joining us today. To start, could you tell me about your experience relevant to the {position} position?",
-                "type": "behavioral",
-                "expected_topics": ["experience", "skills", "motivation"],
-                "evaluation_criteria": ["communication", "relevance", "enthusiasm"]
-            }
+        if not isinstance(question, dict) or not question.get("question"):
+            raise ValueError("AI response did not contain an opening question")
+        question.setdefault("type", interview_type)
+        return question
     
     async def process_response(
         self, 
         transcript: str, 
         current_question: Optional[Dict], 
-        interview_context: Dict
+        interview_context: Dict,
+        on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
-        """Process candidate's response and generate AI interviewer's response"""
+        """Process candidate's response and generate AI interviewer's response
         
-        # Build context for the AI
-        context = f"""
-Current Interview Context:
-- Position: {interview_context.get('position', 'Software Engineer')}
-- Interview Type: {interview_context.get('type', 'technical')}
-- Current Question: {current_question.get('text', 'N/A') if current_question else 'N/A'}
-
-Candidate's Response:
-{transcript}
-
-Previous Responses Summary:
-{self._summarize_previous_responses(interview_context.get('previous_responses', []))}
-
-Please evaluate this response and provide your next question or comment as the interviewer.
-Remember to return the structured JSON response as specified.
-"""
+        When on_field is given the reply is streamed and each top-level field is
+        passed to it as soon as it completes, so assistant_reply can be spoken
+        before evaluation_json has finished generating. The result's fallback flag is
+        set when evaluation_json is a placeholder rather than the model's evaluation.
+        """
+        
+        context = self._build_turn_prompt(transcript, current_question, interview_context)
+        
+        deadline = Deadline(self.turn_budget_seconds)
+        interview_id = interview_context.get("interview_id")
+        turn_index = interview_context.get("turn_index")
         
-        response = await self._get_ai_response(context)
+        if on_field:
+            return await self._process_response_streaming(context, transcript, on_field, deadline, interview_id, turn_index)
+        
+        response = await self._get_ai_response(context, deadline=deadline, interview_id=interview_id, turn_index=turn_index)
         
         # Parse the response
         try:
@@ -124,134 +192,508 @@ Remember to return the structured JSON response as specified.
             # Return a default response if parsing fails
             return self._get_default_response(transcript)
     
+    def _build_turn_prompt(self, transcript: str, current_question: Optional[Dict], interview_context: Dict) -> ChatPrompt:
+        """Lay out the turn as system prompt, interview metadata, previous turns in order, then this turn
+        
+        Everything before this turn is byte-identical to the previous call's prompt, so the
+        provider can serve it from its prompt cache instead of re-reading it.
+        """
+        chat = ChatPrompt(system=self.system_prompt, cache_breakpoints=[(-1, 0)])
+        chat.add("user", f"""Current Interview Context:
+- Position: {interview_context.get('position', 'Software Engineer')}
+- Interview Type: {interview_context.get('type', 'technical')}""")
+        
+        turns = self._history_turns(interview_context.get("previous_responses", []))
+        for index, (candidate, interviewer) in enumerate(turns):
+            chat.add("user", candidate)
+            chat.add("assistant", interviewer, cache=index == len(turns) - 1)
+        
+        # This turn gets whatever is left of the budget after the cached prefix
+        reserved = count_tokens(chat.text())
+        current = PromptBuilder(budget_for("response_analysis"), reserved).add(
+            "question",
+            f"- Current Question: {current_question.get('text', 'N/A') if current_question else 'N/A'}\n",
+            required=True
+        ).add(
+            "response", transcript, priority=90, header="\nCandidate's Response:\n"
+        ).add(
+            "previous_responses",
+            self._previous_responses_context(interview_context),
+            priority=50,
+            header="\n\nPrevious Responses Summary:\n"
+        ).add(
+            "instructions",
+            """
+
+Please evaluate this response and provide your next question or comment as the interviewer.
+Remember to return the structured JSON response as specified.
+""",
+            required=True,
+            static=True
+        ).build()
+        chat.add("user", current)
+        return chat
+    
+    def _history_turns(self, responses: List[Dict]) -> List[tuple]:
+        """Previous (candidate, interviewer) turns rendered deterministically
+        
+        When the history outgrows its budget the oldest turns are dropped a whole block at a
+        time, so the cached prefix only changes once per block rather than on every turn.
+        """
+        turns = []
+        for resp in responses:
+            ai_response = resp.get("ai_response") or {}
+            interviewer = json.dumps({
+                "assistant_reply": ai_response.get("assistant_reply", ""),
+                "evaluation_json": {"overall_score": (ai_response.get("evaluation_json") or {}).get("overall_score")},
+                "next_question": ai_response.get("next_question")
+            })
+            turns.append((f"Candidate's Response:\n{resp.get('transcript', '')}", interviewer))
+        
+        sizes = [count_static_tokens(candidate) + count_static_tokens(interviewer) for candidate, interviewer in turns]
+        start, total = 0, sum(sizes)
+        while total > self.history_budget_tokens and start < len(turns):
+            dropped = sizes[start:start + self.history_drop_block]
+            start += len(dropped)
+            total -= sum(dropped)
+        return turns[start:]
+    
+    async def _process_response_streaming(
+        self,
+        context: ChatPrompt,
+        transcript: str,
+        on_field: Callable[[str, Any], Awaitable[None]],
+        deadline: Optional[Deadline] = None,
+        interview_id: Optional[str] = None,
+        turn_index: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Stream the interviewer reply, forwarding fields as they complete"""
+        parser = IncrementalJSONParser()
+        
+        async for chunk in self._stream_ai_response(context, deadline=deadline, interview_id=interview_id, turn_index=turn_index):
+            for key, value in parser.feed(chunk):
+                try:
+                    await on_field(key, value)
+                except Exception as e:
+                    print(f"Error forwarding streamed field {key}: {e}")
+        
+        data = parser.finish()
+        if data is None:
+            return self._get_default_response(transcript)
+        return self._normalize_ai_response(data, parser.preamble.strip())
+    
     async def generate_summary(
         self, 
         transcript: List[Dict], 
         responses: List[Dict], 
-        questions: List[Dict]
+        questions: List[Dict],
+        session_id: Optional[str] = None,
+        aggregates: Optional[EvaluationAggregates] = None,
+        interview_id: Optional[str] = None,
+        offsets: Optional[Dict[str, int]] = None
     ) -> Dict[str, Any]:
         """Generate a comprehensive interview summary"""
         
-        # Prepare transcript summary
-        full_transcript = "\n".join([t.get("text", "") for t in transcript])
+        prompt = await self.build_summary_prompt(transcript, responses, questions, session_id, aggregates, offsets)
+        response = await self._get_ai_response(
+            prompt,
+            is_system=False,
+            deadline=Deadline(self.summary_budget_seconds),
+            processing_type="interview_summary",
+            interview_id=interview_id
+        )
+        return self.parse_summary(response)
+    
+    async def build_summary_prompt(
+        self,
+        transcript: List[Dict],
+        responses: List[Dict],
+        questions: List[Dict],
+        session_id: Optional[str] = None,
+        aggregates: Optional[EvaluationAggregates] = None,
+        offsets: Optional[Dict[str, int]] = None
+    ) -> str:
+        """Build the final summary prompt, shared by the interactive and batch paths
+        
+        `offsets` counts entries already dropped from the front of each list (spilled to the
+        database); only the segment summaries still cover those, so they force map-reduce.
+        """
+        offsets = offsets or {}
+        if any(offsets.values()) or self._use_hierarchical_summary(transcript, responses):
+            return await self._build_reduce_summary_prompt(session_id, transcript, responses, questions, aggregates, offsets)
         
-        prompt = f"""
+        builder = PromptBuilder.for_call("interview_summary").add(
+            "header",
+            f"""
 Based on this complete interview, provide a comprehensive summary:
 
 Questions Asked: {len(questions)}
 Total Responses: {len(responses)}
-
-Interview Transcript Summary:
-{full_transcript[:3000]}...  # Truncate for token limits
-
-Individual Response Evaluations:
-{json.dumps(responses[:5], indent=2)}  # Include first 5 responses
-
-Generate a final interview summary with:
-{{
-    "overall_performance": 0-100,
-    "technical_skills": 0-100,
-    "communication_skills": 0-100,
-    "problem_solving": 0-100,
-    "cultural_fit": 0-100,
-    "strengths": ["key", "strengths", "observed"],
-    "weaknesses": ["areas", "for", "improvement"],
-    "recommendation": "strong_yes|yes|maybe|no|strong_no",
-    "recommendation_reasoning": "Detailed explanation",
-    "suggested_next_steps": ["follow-up", "actions"],
-    "notable_responses": ["standout", "answers"],
-    "red_flags": ["any", "concerns"],
-    "additional_notes": "Any other observations"
-}}
-"""
-        
-        response = await self._get_ai_response(prompt, is_system=False)
-        
-        try:
-            return json.loads(response)
-        except:
+""",
+            required=True
+        )
+        if aggregates is not None:
+            builder.add(
+                "aggregates", aggregates.to_prompt_context(), priority=80,
+                header="\nRunning Evaluation Aggregates:\n"
+            )
+        else:
+            # Keep as many whole evaluations as fit, earliest first
+            builder.add_items(
+                "responses", [json.dumps(r, indent=2, default=str) for r in responses], priority=60, keep="head",
+                header="\nIndividual Response Evaluations:\n"
+            )
+        builder.add_items(
+            "transcript", [t.get("text", "") for t in transcript], priority=40, keep="head",
+            header="\n\nInterview Transcript Summary:\n"
+        ).add(
+            "format", f"\n\nGenerate a final interview summary with:\n{SUMMARY_FORMAT}\n", required=True, static=True
+        )
+        return builder.build()
+    
+    def parse_summary(self, response: str) -> Dict[str, Any]:
+        _, summary = extract_json_object(response)
+        if summary is None:
             # Return a basic summary if parsing fails
             return self._get_default_summary()
+        return summary
+    
+    def build_batch_request(self, prompt: str, is_system: bool = False) -> Dict[str, Any]:
+        """Chat completions request body for the batch pipeline (Batch API input lines are OpenAI-format)"""
+        messages = [{"role": "system", "content": self.system_prompt}] if is_system else []
+        messages.append({"role": "user", "content": prompt})
+        return {
+            "model": self.models.get("openai", "gpt-4-turbo-preview"),
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 1500
+        }
     
-    async def _get_ai_response(self, prompt: str, is_system: bool = True) -> str:
-        """Get response from AI provider"""
+    async def complete_batch_job(self, job) -> str:
+        """Local batch executor: run a queued request through the normal provider failover"""
+        messages = job.request["messages"]
+        return await self._get_ai_response(
+            messages[-1]["content"],
+            is_system=len(messages) > 1,
+            deadline=Deadline(self.summary_budget_seconds),
+            processing_type=f"batch_{job.kind}",
+            interview_id=job.payload.get("interview_id")
+        )
+    
+    def _use_hierarchical_summary(self, transcript: List[Dict], responses: List[Dict]) -> bool:
+        """Decide between a single summary prompt and map-reduce over segments"""
+        if self.summary_mode == "single":
+            return False
+        if self.summary_mode == "hierarchical":
+            return True
+        # auto: only long interviews would be truncated by the single prompt
+        transcript_chars = sum(len(t.get("text", "")) for t in transcript)
+        return len(responses) > self.summarizer.response_segment_size or transcript_chars > 3000
+    
+    async def _build_reduce_summary_prompt(
+        self,
+        session_id: Optional[str],
+        transcript: List[Dict],
+        responses: List[Dict],
+        questions: List[Dict],
+        aggregates: Optional[EvaluationAggregates] = None,
+        offsets: Optional[Dict[str, int]] = None
+    ) -> str:
+        """Reduce step: combine cached segment summaries into one summary prompt"""
+        key = session_id or f"adhoc-{id(responses)}"
+        offsets = offsets or {}
         try:
-            if self.provider == "claude":
-                if is_system:
-                    response = await self.client.messages.create(
-                        model=self.model,
-                        max_tokens=1500,
-                        temperature=0.7,
-                        system=self.system_prompt,
-                        messages=[
-                            {"role": "user", "content": prompt}
-                        ]
-                    )
-                else:
-                    response = await self.client.messages.create(
-                        model=self.model,
-                        max_tokens=1500,
-                        temperature=0.7,
-                        messages=[
-                            {"role": "user", "content": prompt}
-                        ]
-                    )
-                
-                return response.content[0].text
-                
-            else:  # OpenAI
-                messages = []
-                if is_system:
-                    messages.append({"role": "system", "content": self.system_prompt})
-                messages.append({"role": "user", "content": prompt})
-                
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=1500
+            segments = await self.summarizer.collect(key, transcript, responses, offsets)
+        finally:
+            self.summarizer.discard(key)
+        
+        return PromptBuilder.for_call("interview_summary").add(
+            "header",
+            f"""
+Based on this complete interview, provide a comprehensive summary.
+The interview was summarized in consecutive segments; combine them into one assessment.
+
+Questions Asked: {offsets.get("questions", 0) + len(questions)}
+Total Responses: {offsets.get("responses", 0) + len(responses)}
+""",
+            required=True
+        ).add_items(
+            "transcript_segments", [f"- {segment}" for segment in segments["transcript"]], priority=40, keep="head",
+            header="\nTranscript Segment Summaries (in order):\n"
+        ).add_items(
+            "response_segments", [f"- {segment}" for segment in segments["responses"]], priority=60, keep="head",
+            header="\n\nResponse Evaluation Segment Summaries (in order):\n"
+        ).add(
+            "aggregates", aggregates.to_prompt_context() if aggregates is not None else "", priority=80,
+            header="\n\nRunning Evaluation Aggregates:\n"
+        ).add(
+            "format", f"\n\nGenerate a final interview summary with:\n{SUMMARY_FORMAT}\n", required=True, static=True
+        ).build()
+    
+    async def _complete_without_system(self, prompt: str) -> str:
+        return await self._get_ai_response(prompt, is_system=False, processing_type="summary_segment")
+    
+    def _as_chat(self, prompt: Union[str, ChatPrompt], is_system: bool) -> ChatPrompt:
+        if isinstance(prompt, ChatPrompt):
+            return prompt
+        return ChatPrompt.from_text(prompt, self.system_prompt if is_system else None)
+    
+    async def _get_ai_response(
+        self,
+        prompt: Union[str, ChatPrompt],
+        is_system: bool = True,
+        deadline: Optional[Deadline] = None,
+        processing_type: str = "response_analysis",
+        interview_id: Optional[str] = None,
+        turn_index: Optional[int] = None
+    ) -> str:
+        """Get response from AI provider, failing over within the turn's latency budget"""
+        deadline = deadline or Deadline(self.turn_budget_seconds)
+        chat = self._as_chat(prompt, is_system)
+        prompt = chat.text()
+        
+        providers = list(self.clients)
+        for position, provider in enumerate(providers):
+            remaining = deadline.remaining()
+            if remaining < self.min_call_seconds:
+                break
+            breaker = self.breakers[provider]
+            if not breaker.allow_request():
+                continue
+            
+            is_last = position == len(providers) - 1
+            tracker = self.metrics.start(processing_type, self.models[provider], provider, interview_id, turn_index)
+            usage: Dict[str, int] = {}
+            started = time.monotonic()
+            try:
+                text = await asyncio.wait_for(
+                    self._call_provider(provider, chat, usage),
+                    timeout=remaining if is_last else remaining * self.failover_budget_share
                 )
-                
-                return response.choices[0].message.content
-                
-        except Exception as e:
-            print(f"AI API error: {e}")
-            # Return mock response for testing
-            return self._get_mock_response(prompt)
+                breaker.record_success(time.monotonic() - started)
+                tracker.finish(
+                    "success",
+                    usage.get("input_tokens"),
+                    usage.get("output_tokens"),
+                    prompt=prompt,
+                    response=text,
+                    cached_input_tokens=usage.get("cached_input_tokens")
+                )
+                return text
+            except Exception as e:
+                breaker.record_failure(time.monotonic() - started)
+                tracker.finish("timeout" if isinstance(e, asyncio.TimeoutError) else "error", error=e, prompt=prompt)
+                print(f"AI API error ({provider}): {e!r}")
+            except BaseException:
+                # Cancelled mid-call: nothing to record, but a half-open breaker must not stay blocked
+                breaker.release()
+                raise
+        
+        # Return deterministic mock response when no provider answered in time
+        self.metrics.start(processing_type, "mock", None, interview_id, turn_index).finish("fallback")
+        return self._get_mock_response(prompt)
+    
+    async def _call_provider(self, provider: str, chat: ChatPrompt, usage: Dict[str, int]) -> str:
+        """Make one completion call, filling usage with the provider-reported token counts"""
+        client = self.clients[provider]
+        model = self.models[provider]
+        
+        if provider == "claude":
+            response = await client.messages.create(
+                model=model,
+                max_tokens=1500,
+                temperature=0.7,
+                **chat.anthropic_request()
+            )
+            
+            self._read_anthropic_usage(getattr(response, "usage", None), usage)
+            return response.content[0].text
+            
+        else:  # OpenAI
+            response = await client.chat.completions.create(
+                model=model,
+                messages=chat.openai_messages(),
+                temperature=0.7,
+                max_tokens=1500
+            )
+            
+            self._read_openai_usage(getattr(response, "usage", None), usage)
+            return response.choices[0].message.content
+    
+    @staticmethod
+    def _read_anthropic_usage(reported: Any, usage: Dict[str, int]):
+        """Anthropic reports cache reads and writes separately from uncached input tokens"""
+        if not reported:
+            return
+        cache_read = getattr(reported, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(reported, "cache_creation_input_tokens", None) or 0
+        usage["input_tokens"] = reported.input_tokens + cache_read + cache_write
+        usage["cached_input_tokens"] = cache_read
+        if getattr(reported, "output_tokens", None) is not None:
+            usage["output_tokens"] = reported.output_tokens
+    
+    @staticmethod
+    def _read_openai_usage(reported: Any, usage: Dict[str, int]):
+        if not reported:
+            return
+        usage["input_tokens"] = reported.prompt_tokens
+        usage["output_tokens"] = reported.completion_tokens
+        details = getattr(reported, "prompt_tokens_details", None)
+        usage["cached_input_tokens"] = (getattr(details, "cached_tokens", None) or 0) if details else 0
+    
+    async def _stream_ai_response(
+        self,
+        prompt: Union[str, ChatPrompt],
+        is_system: bool = True,
+        deadline: Optional[Deadline] = None,
+        processing_type: str = "response_analysis",
+        interview_id: Optional[str] = None,
+        turn_index: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Stream response text from the AI provider as it is generated"""
+        deadline = deadline or Deadline(self.turn_budget_seconds)
+        chat = self._as_chat(prompt, is_system)
+        prompt = chat.text()
+        
+        providers = list(self.clients)
+        for position, provider in enumerate(providers):
+            remaining = deadline.remaining()
+            if remaining < self.min_call_seconds:
+                break
+            breaker = self.breakers[provider]
+            if not breaker.allow_request():
+                continue
+            
+            # The first token must arrive within this provider's share of the budget
+            is_last = position == len(providers) - 1
+            first_token_timeout = remaining if is_last else remaining * self.failover_budget_share
+            tracker = self.metrics.start(processing_type, self.models[provider], provider, interview_id, turn_index)
+            usage: Dict[str, int] = {}
+            chunks: List[str] = []
+            started = time.monotonic()
+            stream = self._open_stream(provider, chat, usage)
+            try:
+                while True:
+                    # Every chunk must arrive before the turn deadline
+                    timeout = deadline.remaining() if chunks else first_token_timeout - (time.monotonic() - started)
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), timeout=max(0.0, timeout))
+                    except StopAsyncIteration:
+                        break
+                    if not chunks:
+                        tracker.first_token()
+                    chunks.append(chunk)
+                    yield chunk
+                breaker.record_success(time.monotonic() - started)
+                text = "".join(chunks)
+                tracker.finish(
+                    "success",
+                    usage.get("input_tokens", estimate_tokens(prompt)),
+                    usage.get("output_tokens", estimate_tokens(text)),
+                    prompt=prompt,
+                    response=text,
+                    cached_input_tokens=usage.get("cached_input_tokens")
+                )
+                return
+            except Exception as e:
+                breaker.record_failure(time.monotonic() - started)
+                tracker.finish("timeout" if isinstance(e, asyncio.TimeoutError) else "error", error=e, prompt=prompt, response="".join(chunks))
+                print(f"AI API streaming error ({provider}): {e!r}")
+                # A stream cut off mid-way is recovered by the parser; only fail over when nothing arrived
+                if chunks:
+                    return
+            except BaseException:
+                # Cancelled, or the consumer closed the stream early
+                breaker.release()
+                raise
+            finally:
+                await stream.aclose()
+        
+        self.metrics.start(processing_type, "mock", None, interview_id, turn_index).finish("fallback")
+        yield self._get_mock_response(prompt)
+    
+    async def _open_stream(self, provider: str, chat: ChatPrompt, usage: Dict[str, int]) -> AsyncIterator[str]:
+        client = self.clients[provider]
+        model = self.models[provider]
+        
+        if provider == "claude":
+            stream = await client.messages.create(
+                model=model,
+                max_tokens=1500,
+                temperature=0.7,
+                stream=True,
+                **chat.anthropic_request()
+            )
+            async for event in stream:
+                if event.type == "message_start" and getattr(event.message, "usage", None):
+                    self._read_anthropic_usage(event.message.usage, usage)
+                elif event.type == "message_delta" and getattr(event, "usage", None):
+                    usage["output_tokens"] = event.usage.output_tokens
+                elif event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                    yield event.delta.text
+            
+        else:  # OpenAI
+            stream = await client.chat.completions.create(
+                model=model,
+                messages=chat.openai_messages(),
+                temperature=0.7,
+                max_tokens=1500,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    # Sent in a final chunk with no choices
+                    self._read_openai_usage(chunk.usage, usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    
+    def metrics_summary(self) -> Dict[str, Any]:
+        return self.metrics.summary()
+    
+    def breaker_status(self) -> Dict[str, Any]:
+        """Circuit breaker state per provider, in failover order"""
+        return {provider: breaker.status() for provider, breaker in self.breakers.items()}
     
     def _parse_ai_response(self, response: str) -> Dict[str, Any]:
         """Parse AI response to extract assistant reply and evaluation"""
-        # Try to parse as JSON first
-        try:
-            data = json.loads(response)
-            return {
-                "assistant_reply": data.get("assistant_reply", "Thank you for your response."),
-                "evaluation_json": data.get("evaluation_json", {}),
-                "next_question": data.get("next_question"),
-                "interview_complete": data.get("interview_complete", False)
-            }
-        except:
-            # Try to extract JSON from text
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                try:
-                    data = json.loads(json_match.group())
-                    return {
-                        "assistant_reply": response.split(json_match.group())[0].strip(),
-                        "evaluation_json": data,
-                        "next_question": None,
-                        "interview_complete": False
-                    }
-                except:
-                    pass
+        preamble, data = extract_json_object(response)
+        
+        if data is not None:
+            return self._normalize_ai_response(data, preamble)
         
         # If all parsing fails, return the response as assistant reply
         return {
             "assistant_reply": response,
             "evaluation_json": self._get_default_evaluation(),
             "next_question": None,
-            "interview_complete": False
+            "interview_complete": False,
+            "fallback": True
+        }
+    
+    def _normalize_ai_response(self, data: Dict[str, Any], preamble: str = "") -> Dict[str, Any]:
+        """Map a parsed JSON object onto the interviewer response structure
+        
+        fallback is set when the evaluation is a placeholder rather than the model's own
+        (the mock response, or a reply without evaluation_json), so it can be kept out of scoring.
+        """
+        if "assistant_reply" in data or "evaluation_json" in data:
+            evaluation = data.get("evaluation_json")
+            return {
+                "assistant_reply": data.get("assistant_reply") or preamble or "Thank you for your response.",
+                "evaluation_json": evaluation or self._get_default_evaluation(),
+                "next_question": data.get("next_question"),
+                "interview_complete": data.get("interview_complete", False),
+                "fallback": bool(data.get("fallback")) or not evaluation
+            }
+        
+        # The model wrote its reply as prose followed by a bare evaluation object
+        return {
+            "assistant_reply": preamble or "Thank you for your response.",
+            "evaluation_json": data,
+            "next_question": None,
+            "interview_complete": False,
+            "fallback": False
         }
     
     def _get_mock_response(self, prompt: str) -> str:
@@ -273,7 +715,8 @@ Generate a final interview summary with:
                 "positive_indicators": ["Structured thinking", "Relevant experience"]
             },
             "next_question": "How would you approach debugging a performance issue in production?",
-            "interview_complete": False
+            "interview_complete": False,
+            "fallback": True
         })
     
     def _get_default_response(self, transcript: str) -> Dict[str, Any]:
@@ -282,7 +725,8 @@ Generate a final interview summary with:
             "assistant_reply": "Thank you for your response. Let me ask you another question.",
             "evaluation_json": self._get_default_evaluation(),
             "next_question": "Can you tell me about a challenging project you've worked on?",
-            "interview_complete": False
+            "interview_complete": False,
+            "fallback": True
         }
     
     def _get_default_evaluation(self) -> Dict[str, Any]:
@@ -320,6 +764,13 @@ Generate a final interview summary with:
             "additional_notes": "Standard interview completed"
         }
     
+    def _previous_responses_context(self, interview_context: Dict) -> str:
+        """Use the session's running aggregates when available instead of re-walking responses"""
+        aggregates = interview_context.get("aggregates")
+        if aggregates is not None:
+            return aggregates.to_prompt_context()
+        return self._summarize_previous_responses(interview_context.get("previous_responses", []))
+    
     def _summarize_previous_responses(self, responses: List[Dict]) -> str:
         """Summarize previous responses for context"""
         if not responses:
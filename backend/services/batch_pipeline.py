@@ -0,0 +1,388 @@
+"""
+Batch Pipeline
+Queues non-interactive LLM work (post-interview summaries, analyses, study plans),
+submits it in bulk through the OpenAI Batch API or a local batched executor, and
+writes results back through per-kind handlers once they are ready. Jobs are saved
+to a job store so any worker can report their status; the worker running a job
+holds a lease on it, and jobs whose worker stopped renewing are taken over at startup
+"""
+
+import os
+import io
+import json
+import time
+import uuid
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from common.ttl_cache import TTLCache
+
+QUEUED = "queued"
+SUBMITTED = "submitted"
+COMPLETED = "completed"
+FAILED = "failed"
+
+@dataclass
+class BatchJob:
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str = QUEUED
+    request: Optional[Dict[str, Any]] = None  # Chat completions request body
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    batch_id: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    completed_at: Optional[str] = None
+    worker_id: Optional[str] = None  # Worker holding the job while it is unfinished
+    lease_until: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "batch_id": self.batch_id,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "completed_at": self.completed_at
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        """Row for the job store, including the request needed to run it after a restart"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "payload": self.payload,
+            "request": self.request,
+            "result": self.result,
+            "error": self.error,
+            "batch_id": self.batch_id,
+            "created_at": self.created_at,
+            "completed_at": self.completed_at,
+            "worker_id": self.worker_id,
+            "lease_until": self.lease_until
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "BatchJob":
+        return cls(**{name: record.get(name) for name in cls.__dataclass_fields__ if name in record})
+
+@dataclass
+class BatchTask:
+    """How one kind of job is turned into a request, parsed and written back"""
+    build_request: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+    parse: Callable[[Dict[str, Any], str], Any]
+    on_result: Optional[Callable[[BatchJob], Awaitable[None]]] = None
+
+class LocalBatchExecutor:
+    """Runs a batch through an async completion function with bounded concurrency"""
+
+    def __init__(self, complete: Callable[[BatchJob], Awaitable[str]], concurrency: Optional[int] = None):
+        self._complete = complete
+        self.concurrency = concurrency or int(os.getenv("BATCH_LOCAL_CONCURRENCY", "2"))
+
+    async def run(self, jobs: List[BatchJob], on_submitted: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Return job id -> response text, or the exception raised for that job"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(job: BatchJob):
+            async with semaphore:
+                return await self._complete(job)
+
+        results = await asyncio.gather(*[run_one(job) for job in jobs], return_exceptions=True)
+        return {job.id: result for job, result in zip(jobs, results)}
+
+class OpenAIBatchExecutor:
+    """Submits a batch as a JSONL file to the OpenAI Batch API and polls until it finishes"""
+
+    def __init__(self, client, poll_seconds: Optional[float] = None):
+        self._client = client
+        self.poll_seconds = poll_seconds or float(os.getenv("BATCH_POLL_SECONDS", "60"))
+
+    async def run(self, jobs: List[BatchJob], on_submitted: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
+        lines = [
+            json.dumps({"custom_id": job.id, "method": "POST", "url": "/v1/chat/completions", "body": job.request})
+            for job in jobs
+        ]
+        upload = await self._client.files.create(
+            file=("batch.jsonl", io.BytesIO("\n".join(lines).encode("utf-8"))),
+            purpose="batch"
+        )
+        batch = await self._client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        for job in jobs:
+            job.batch_id = batch.id
+        if on_submitted is not None:
+            # Saved with the jobs, so a worker taking them over resumes polling instead of resubmitting
+            await on_submitted(batch.id)
+        return await self._collect(batch, jobs)
+
+    async def resume(self, batch_id: str, jobs: List[BatchJob]) -> Dict[str, Any]:
+        """Wait for a batch submitted by a worker that has since stopped"""
+        return await self._collect(await self._client.batches.retrieve(batch_id), jobs)
+
+    async def _collect(self, batch, jobs: List[BatchJob]) -> Dict[str, Any]:
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(self.poll_seconds)
+            batch = await self._client.batches.retrieve(batch.id)
+
+        results: Dict[str, Any] = {
+            job.id: RuntimeError(f"Batch {batch.id} ended with status {batch.status}") for job in jobs
+        }
+        if batch.output_file_id:
+            output = await self._client.files.content(batch.output_file_id)
+            for line in output.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+                else:
+                    results[record["custom_id"]] = RuntimeError(json.dumps(record.get("error") or response.get("body")))
+        return results
+
+class BatchJobStore:
+    """Jobs by id in this process only; finished jobs stay pollable for a day"""
+
+    def __init__(self):
+        self._jobs: TTLCache[BatchJob] = TTLCache(max_size=100000, ttl_seconds=86400)
+
+    async def save(self, job: BatchJob):
+        self._jobs.set(job.id, job)
+
+    async def get(self, job_id: str) -> Optional[BatchJob]:
+        return self._jobs.peek(job_id)
+
+    async def claim_unfinished(self, worker_id: str, lease_until: float) -> List[BatchJob]:
+        """Take over unfinished jobs whose lease has run out; nothing outlives this process here"""
+        return []
+
+    async def renew(self, job_ids: List[str], worker_id: str, lease_until: float):
+        pass
+
+    def statuses(self) -> Dict[str, int]:
+        statuses: Dict[str, int] = {}
+        for key in self._jobs.keys():
+            job = self._jobs.peek(key)
+            if job:
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+        return statuses
+
+class DatabaseBatchJobStore(BatchJobStore):
+    """Writes every job through to the batch_jobs table, so jobs outlive the worker and any worker can poll them"""
+
+    def __init__(self, db):
+        super().__init__()
+        self._db = db
+
+    async def save(self, job: BatchJob):
+        await super().save(job)
+        await self._db.save_batch_job(job.to_record())
+
+    async def get(self, job_id: str) -> Optional[BatchJob]:
+        # The local copy is current for jobs this worker runs; any other job is read from the table
+        job = await super().get(job_id)
+        if job is None:
+            record = await self._db.get_batch_job(job_id)
+            job = BatchJob.from_record(record) if record else None
+        return job
+
+    async def claim_unfinished(self, worker_id: str, lease_until: float) -> List[BatchJob]:
+        records = await self._db.claim_batch_jobs(worker_id, lease_until, time.time())
+        jobs = [BatchJob.from_record(record) for record in records]
+        for job in jobs:
+            await super().save(job)
+        return jobs
+
+    async def renew(self, job_ids: List[str], worker_id: str, lease_until: float):
+        await self._db.renew_batch_jobs(job_ids, worker_id, lease_until)
+
+class BatchPipeline:
+    def __init__(
+        self,
+        executor,
+        store: Optional[BatchJobStore] = None,
+        max_batch_size: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        lease_seconds: Optional[float] = None
+    ):
+        self.executor = executor
+        self.store = store or BatchJobStore()
+        self.max_batch_size = max_batch_size or int(os.getenv("BATCH_MAX_SIZE", "50"))
+        self.flush_seconds = flush_seconds or float(os.getenv("BATCH_FLUSH_SECONDS", "30"))
+        # A job whose lease isn't renewed for this long is taken over by the next worker to start
+        self.lease_seconds = lease_seconds or float(os.getenv("BATCH_LEASE_SECONDS", "300"))
+        self.worker_id = uuid.uuid4().hex[:12]
+        self._tasks: Dict[str, BatchTask] = {}
+        self._queue: List[BatchJob] = []
+        # Queued and in-flight jobs, whose leases this worker keeps renewing
+        self._held: Dict[str, BatchJob] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._renewer: Optional[asyncio.Task] = None
+        self._in_flight: set = set()
+        self._wake = asyncio.Event()
+        self.recovered = 0
+
+    def register(self, kind: str, task: BatchTask):
+        self._tasks[kind] = task
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> BatchJob:
+        """Queue a job; the request is built now so later session changes cannot leak in"""
+        task = self._tasks[kind]
+        job = BatchJob(id=str(uuid.uuid4()), kind=kind, payload=payload)
+        job.request = await task.build_request(payload)
+        await self._hold(job)
+        self._enqueue([job])
+        return job
+
+    async def get(self, job_id: str) -> Optional[BatchJob]:
+        return await self.store.get(job_id)
+
+    async def recover(self) -> int:
+        """Take over unfinished jobs left by stopped workers: resume submitted provider batches, requeue the rest"""
+        jobs = await self.store.claim_unfinished(self.worker_id, time.time() + self.lease_seconds)
+        queued: List[BatchJob] = []
+        batches: Dict[str, List[BatchJob]] = {}
+        for job in jobs:
+            if job.kind not in self._tasks:
+                print(f"Skipping batch job {job.id} of unknown kind {job.kind}")
+                continue
+            self._held[job.id] = job
+            if job.status == SUBMITTED and job.batch_id and hasattr(self.executor, "resume"):
+                batches.setdefault(job.batch_id, []).append(job)
+            else:
+                # Local executor jobs (or jobs never submitted) simply run again
+                job.status = QUEUED
+                job.batch_id = None
+                queued.append(job)
+        for batch_id, batch_jobs in batches.items():
+            self._start(batch_jobs, batch_id)
+        self._enqueue(queued)
+        self._keep_leases()
+        recovered = len(queued) + sum(len(batch_jobs) for batch_jobs in batches.values())
+        self.recovered += recovered
+        return recovered
+
+    async def _hold(self, job: BatchJob):
+        job.worker_id = self.worker_id
+        job.lease_until = time.time() + self.lease_seconds
+        await self.store.save(job)
+        self._held[job.id] = job
+        self._keep_leases()
+
+    def _keep_leases(self):
+        if self._held and (self._renewer is None or self._renewer.done()):
+            self._renewer = asyncio.create_task(self._renew_leases())
+
+    async def _renew_leases(self):
+        while self._held:
+            await asyncio.sleep(self.lease_seconds / 3)
+            lease_until = time.time() + self.lease_seconds
+            try:
+                await self.store.renew(list(self._held), self.worker_id, lease_until)
+                for job in list(self._held.values()):
+                    job.lease_until = lease_until
+            except Exception as e:
+                print(f"Error renewing batch job leases: {e}")
+
+    def _enqueue(self, jobs: List[BatchJob]):
+        if not jobs:
+            return
+        self._queue.extend(jobs)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+        if len(self._queue) >= self.max_batch_size:
+            self._wake.set()
+
+    async def _run(self):
+        while self._queue:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Submit everything queued, in batches of at most max_batch_size"""
+        while self._queue:
+            jobs, self._queue = self._queue[:self.max_batch_size], self._queue[self.max_batch_size:]
+            for job in jobs:
+                job.status = SUBMITTED
+            self._start(jobs)
+
+    def _start(self, jobs: List[BatchJob], batch_id: Optional[str] = None):
+        # Batches can take hours with the provider; run each one independently
+        submission = asyncio.create_task(self._execute(jobs, batch_id))
+        self._in_flight.add(submission)
+        submission.add_done_callback(self._in_flight.discard)
+
+    async def _execute(self, jobs: List[BatchJob], batch_id: Optional[str] = None):
+        async def submitted(provider_batch_id: str):
+            for job in jobs:
+                try:
+                    await self.store.save(job)
+                except Exception as e:
+                    print(f"Error saving batch job {job.id}: {e}")
+
+        try:
+            if batch_id is not None:
+                results = await self.executor.resume(batch_id, jobs)
+            else:
+                results = await self.executor.run(jobs, on_submitted=submitted)
+        except Exception as e:
+            results = {job.id: e for job in jobs}
+
+        for job in jobs:
+            outcome = results.get(job.id, RuntimeError("Missing batch result"))
+            task = self._tasks[job.kind]
+            if isinstance(outcome, BaseException):
+                job.status = FAILED
+                job.error = str(outcome)
+            else:
+                try:
+                    job.result = task.parse(job.payload, outcome)
+                    job.status = COMPLETED
+                except Exception as e:
+                    job.status = FAILED
+                    job.error = f"Could not parse batch result: {e}"
+            job.completed_at = datetime.now().isoformat()
+
+            if task.on_result:
+                try:
+                    await task.on_result(job)
+                except Exception as e:
+                    print(f"Error writing back batch job {job.id}: {e}")
+            # Saved as finished only once written back, so a restart in between runs the job again
+            job.worker_id = None
+            job.lease_until = None
+            try:
+                await self.store.save(job)
+            except Exception as e:
+                print(f"Error saving batch job {job.id}: {e}")
+            self._held.pop(job.id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "queued": len(self._queue),
+            "held": len(self._held),
+            "batches_in_flight": len(self._in_flight),
+            "recovered": self.recovered,
+            "jobs": self.store.statuses()
+        }
+
+def create_batch_executor(complete: Callable[[BatchJob], Awaitable[str]], openai_client=None):
+    """BATCH_EXECUTOR=openai uses the provider's Batch API (about half the on-demand price), local runs in-process"""
+    if os.getenv("BATCH_EXECUTOR", "local") == "openai" and openai_client is not None:
+        return OpenAIBatchExecutor(openai_client)
+    return LocalBatchExecutor(complete)
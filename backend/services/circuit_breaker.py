@@ -0,0 +1,148 @@
+"""
+Circuit Breaker
+Per-provider breaker over a rolling window of call outcomes and latencies, with a
+half-open probe, plus a deadline helper for per-turn latency budgets
+"""
+
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class Deadline:
+    """Absolute deadline shared by every call made while serving one turn"""
+
+    def __init__(self, budget_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.budget_seconds = budget_seconds
+        self.expires_at = clock() + budget_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window_seconds: Optional[float] = None,
+        min_calls: Optional[int] = None,
+        failure_rate_threshold: Optional[float] = None,
+        slow_call_seconds: Optional[float] = None,
+        slow_call_rate_threshold: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.window_seconds = window_seconds or float(os.getenv("AI_BREAKER_WINDOW_SECONDS", "60"))
+        self.min_calls = min_calls or int(os.getenv("AI_BREAKER_MIN_CALLS", "5"))
+        self.failure_rate_threshold = failure_rate_threshold or float(os.getenv("AI_BREAKER_FAILURE_RATE", "0.5"))
+        self.slow_call_seconds = slow_call_seconds or float(os.getenv("AI_BREAKER_SLOW_CALL_SECONDS", "8"))
+        self.slow_call_rate_threshold = slow_call_rate_threshold or float(os.getenv("AI_BREAKER_SLOW_CALL_RATE", "0.8"))
+        self.open_seconds = open_seconds or float(os.getenv("AI_BREAKER_OPEN_SECONDS", "30"))
+        self._clock = clock
+
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._calls: Deque[Tuple[float, bool, float]] = deque()  # (timestamp, ok, latency)
+        self.total_calls = 0
+        self.total_failures = 0
+        self.total_rejected = 0
+        self.times_opened = 0
+
+    def allow_request(self) -> bool:
+        """Whether a call may be attempted now; half-open admits a single probe"""
+        if self.state == OPEN:
+            if self._clock() - self.opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            else:
+                self.total_rejected += 1
+                return False
+
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                self.total_rejected += 1
+                return False
+            self._probe_in_flight = True
+
+        return True
+
+    def release(self):
+        """A call ended without an outcome (cancelled); give back the half-open probe it may hold"""
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record_success(self, latency: float):
+        self._record(True, latency)
+
+    def record_failure(self, latency: float):
+        self._record(False, latency)
+
+    def _record(self, ok: bool, latency: float):
+        now = self._clock()
+        self.total_calls += 1
+        if not ok:
+            self.total_failures += 1
+
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+            if ok and latency < self.slow_call_seconds:
+                self.state = CLOSED
+                self._calls.clear()
+            else:
+                self._trip(now)
+            return
+
+        self._calls.append((now, ok, latency))
+        self._evict(now)
+
+        if len(self._calls) >= self.min_calls:
+            failure_rate, slow_rate = self._rates()
+            if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                self._trip(now)
+
+    def _trip(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self._calls.clear()
+
+    def _evict(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def _rates(self) -> Tuple[float, float]:
+        if not self._calls:
+            return 0.0, 0.0
+        failures = sum(1 for _, ok, _ in self._calls if not ok)
+        slow = sum(1 for _, _, latency in self._calls if latency >= self.slow_call_seconds)
+        return failures / len(self._calls), slow / len(self._calls)
+
+    def status(self) -> Dict[str, Any]:
+        """Breaker state for the health endpoint"""
+        self._evict(self._clock())
+        failure_rate, slow_rate = self._rates()
+        latencies = sorted(latency for _, _, latency in self._calls)
+        return {
+            "state": self.state,
+            "window_calls": len(self._calls),
+            "failure_rate": round(failure_rate, 3),
+            "slow_call_rate": round(slow_rate, 3),
+            "p50_latency_ms": round(latencies[len(latencies) // 2] * 1000) if latencies else None,
+            "max_latency_ms": round(latencies[-1] * 1000) if latencies else None,
+            "open_for_seconds": round(max(0.0, self.open_seconds - (self._clock() - self.opened_at)), 1) if self.state == OPEN else 0,
+            "total_calls": self.total_calls,
+            "total_failures": self.total_failures,
+            "total_rejected": self.total_rejected,
+            "times_opened": self.times_opened
+        }
@@ -0,0 +1,146 @@
+"""
+WebSocket Connection Writer
+Per-connection outbound queue drained by its own writer task, so sending to one
+client never waits on another. Messages can carry a deadline and are dropped once
+stale; queued transcript updates are merged instead of piling up. A client that
+can't keep up (send timeout or full queue) is reported as a slow consumer. Each
+connection sends in the wire encoding it negotiated
+"""
+
+import os
+import time
+import asyncio
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Union
+
+from .wire_codec import JSON, OutboundMessage, SerializationStats
+
+# Queued messages of these types are merged into the next one of the same type
+COALESCED_TYPES = ("transcript",)
+
+def default_message_ttls() -> Dict[str, float]:
+    """Seconds after which an unsent message is no longer worth sending"""
+    control_ttl = float(os.getenv("WS_CONTROL_TTL_SECONDS", "5"))
+    return {
+        "transcript": float(os.getenv("WS_TRANSCRIPT_TTL_SECONDS", "5")),
+        "pong": control_ttl,
+        "backpressure": control_ttl
+    }
+
+def merge_transcripts(queued: Dict[str, Any], latest: Dict[str, Any]) -> Dict[str, Any]:
+    """One transcript update covering both: joined text, latest timestamp, lowest confidence"""
+    earlier, later = queued.get("data") or {}, latest.get("data") or {}
+    text = " ".join(part for part in (earlier.get("text", ""), later.get("text", "")) if part)
+    confidences = [c for c in (earlier.get("confidence"), later.get("confidence")) if c is not None]
+    return {
+        **latest,
+        "data": {**later, "text": text, "confidence": min(confidences) if confidences else None}
+    }
+
+class ConnectionWriter:
+    def __init__(
+        self,
+        websocket,
+        on_slow: Optional[Callable[[str], Awaitable[None]]] = None,
+        max_queue: Optional[int] = None,
+        send_timeout: Optional[float] = None,
+        message_ttls: Optional[Dict[str, float]] = None,
+        codec=JSON,
+        serialization: Optional[SerializationStats] = None
+    ):
+        self.websocket = websocket
+        self.codec = codec
+        self.serialization = serialization
+        self._on_slow = on_slow
+        self.max_queue = max_queue or int(os.getenv("WS_OUTBOUND_QUEUE_SIZE", "64"))
+        self.send_timeout = send_timeout or float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+        self.message_ttls = default_message_ttls() if message_ttls is None else message_ttls
+
+        self._queue: Deque[list] = deque()  # [deadline, OutboundMessage]
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.counts: Counter = Counter()
+        self._slow_task: Optional[asyncio.Task] = None
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def send(self, message: Union[Dict[str, Any], OutboundMessage], deadline: Optional[float] = None) -> bool:
+        """Queue a message without waiting; False if the connection is closed or too far behind
+
+        Pass an OutboundMessage when sending the same message to many connections.
+        """
+        if self.closed:
+            return False
+        if not isinstance(message, OutboundMessage):
+            message = OutboundMessage(message)
+        message_type = message.type
+        if deadline is None and message_type in self.message_ttls:
+            deadline = time.monotonic() + self.message_ttls[message_type]
+
+        if message_type in COALESCED_TYPES and self._queue and self._queue[-1][1].type == message_type:
+            entry = self._queue[-1]
+            entry[1] = OutboundMessage(merge_transcripts(entry[1].message, message.message))
+            entry[0] = deadline
+            self.counts["coalesced"] += 1
+            return True
+
+        if len(self._queue) >= self.max_queue:
+            self._slow(f"outbound queue full ({self.max_queue} messages)")
+            return False
+        self._queue.append([deadline, message])
+        self._ready.set()
+        return True
+
+    async def _run(self):
+        try:
+            while True:
+                if not self._queue:
+                    if self.closed:
+                        return
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+
+                deadline, message = self._queue.popleft()
+                if deadline is not None and time.monotonic() > deadline:
+                    self.counts["expired"] += 1
+                    continue
+                payload = message.encode(self.codec, self.serialization)
+                send = self.websocket.send_bytes if self.codec.binary else self.websocket.send_text
+                try:
+                    await asyncio.wait_for(send(payload), timeout=self.send_timeout)
+                    self.counts["sent"] += 1
+                except asyncio.TimeoutError:
+                    self._slow(f"send took longer than {self.send_timeout}s")
+                    return
+                except Exception:
+                    # The socket is gone; the receive loop will see the disconnect
+                    self.counts["failed"] += 1
+                    self.closed = True
+                    return
+        finally:
+            self._queue.clear()
+
+    def _slow(self, reason: str):
+        if self.closed:
+            return
+        self.closed = True
+        self.counts["slow_consumer"] += 1
+        self._ready.set()
+        if self._on_slow is not None:
+            self._slow_task = asyncio.create_task(self._on_slow(reason))
+
+    async def close(self, drain_timeout: Optional[float] = None):
+        """Stop taking messages; give queued ones up to drain_timeout to go out"""
+        self.closed = True
+        self._ready.set()
+        if drain_timeout:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                pass
+        if not self._task.done():
+            self._task.cancel()
@@ -526,6 +526,96 @@ class DatabaseService:
             "suggested_next_steps": ["Technical assessment", "Team interview"]
         }
     
+    async def insert_ai_analysis_logs(self, rows: List[Dict[str, Any]]):
+        """Bulk insert LLM call records into ai_analysis_logs"""
+        if not self.client or not rows:
+            return
+        
+        # The Supabase client is synchronous; keep the batch insert off the event loop
+        await asyncio.to_thread(
+            lambda: self.client.table("ai_analysis_logs").insert(rows).execute()
+        )
+    
+    async def add_transcript_entries(self, session_id: str, start_index: int, entries: List[Dict[str, Any]]):
+        """Store transcript entries that no longer fit in the live session"""
+        if not self.client or not entries:
+            return
+        
+        rows = [
+            {
+                "session_id": session_id,
+                "sequence_number": start_index + i,
+                "text": entry["text"],
+                "timestamp": entry["timestamp"],
+                "confidence": entry["confidence"]
+            }
+            for i, entry in enumerate(entries)
+        ]
+        await asyncio.to_thread(
+            lambda: self.client.table("transcript_entries").upsert(rows, on_conflict="session_id,sequence_number").execute()
+        )
+    
+    async def save_batch_job(self, row: Dict[str, Any]):
+        """Insert or update a batch pipeline job"""
+        if not self.client:
+            return
+        
+        await asyncio.to_thread(
+            lambda: self.client.table("batch_jobs").upsert(json.loads(json.dumps(row, default=str))).execute()
+        )
+    
+    async def get_batch_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a batch pipeline job by id"""
+        if not self.client:
+            return None
+        
+        try:
+            response = await asyncio.to_thread(
+                lambda: self.client.table("batch_jobs").select("*").eq("id", job_id).limit(1).execute()
+            )
+            return response.data[0] if response.data else None
+        except Exception as e:
+            print(f"Error getting batch job: {e}")
+            return None
+    
+    async def claim_batch_jobs(self, worker_id: str, lease_until: float, now: float) -> List[Dict[str, Any]]:
+        """Take over unfinished batch jobs whose worker stopped renewing its lease"""
+        if not self.client:
+            return []
+        
+        def claim():
+            rows = self.client.table("batch_jobs")\
+                .select("*")\
+                .in_("status", ["queued", "submitted"])\
+                .lt("lease_until", now)\
+                .execute().data
+            claimed = []
+            for row in rows:
+                # Conditional on the lease that was read, so two workers starting together can't both take a job
+                response = self.client.table("batch_jobs")\
+                    .update({"worker_id": worker_id, "lease_until": lease_until})\
+                    .eq("id", row["id"])\
+                    .eq("lease_until", row["lease_until"])\
+                    .execute()
+                if response.data:
+                    claimed.append({**row, "worker_id": worker_id, "lease_until": lease_until})
+            return claimed
+        
+        return await asyncio.to_thread(claim)
+    
+    async def renew_batch_jobs(self, job_ids: List[str], worker_id: str, lease_until: float):
+        """Extend this worker's lease on the batch jobs it is still running"""
+        if not self.client or not job_ids:
+            return
+        
+        await asyncio.to_thread(
+            lambda: self.client.table("batch_jobs")\
+                .update({"lease_until": lease_until})\
+                .in_("id", job_ids)\
+                .eq("worker_id", worker_id)\
+                .execute()
+        )
+    
     async def health_check(self) -> bool:
         """Check database connection health"""
         if self.client:
@@ -0,0 +1,117 @@
+"""
+Running Evaluation Aggregates
+Per-session statistics over response evaluations, updated in O(1) per response so
+prompts never have to walk the full response history
+"""
+
+import os
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+SCORE_DIMENSIONS = (
+    "technical_accuracy",
+    "communication_clarity",
+    "depth_of_knowledge",
+    "problem_solving",
+    "relevance",
+    "overall_score"
+)
+
+@dataclass
+class RunningStat:
+    count: int = 0
+    mean: float = 0.0
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    ewma: Optional[float] = None
+
+    def update(self, value: float, alpha: float):
+        self.count += 1
+        self.mean += (value - self.mean) / self.count
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.ewma = value if self.ewma is None else alpha * value + (1 - alpha) * self.ewma
+
+class TopKCounter:
+    """Space-saving counter: keeps at most `capacity` items, replacing the least frequent"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def add(self, item: str):
+        item = " ".join(item.split())
+        if not item:
+            return
+        key = item.lower()
+        if key in self.counts:
+            self.counts[key] += 1
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = 1
+        else:
+            evicted = min(self.counts, key=self.counts.get)
+            self.counts[key] = self.counts.pop(evicted) + 1
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda entry: -entry[1])[:k]
+
+class EvaluationAggregates:
+    def __init__(self, alpha: Optional[float] = None, top_k: Optional[int] = None):
+        self.alpha = alpha or float(os.getenv("EVALUATION_EWMA_ALPHA", "0.4"))
+        self.top_k = top_k or int(os.getenv("EVALUATION_TOP_K", "5"))
+        self.responses = 0
+        self.stats: Dict[str, RunningStat] = {dimension: RunningStat() for dimension in SCORE_DIMENSIONS}
+        # Track a few more candidates than we report so ranks stay stable
+        self.strengths = TopKCounter(self.top_k * 2)
+        self.red_flags = TopKCounter(self.top_k * 2)
+
+    def update(self, evaluation: Dict[str, Any]):
+        """Fold one response evaluation into the running aggregates"""
+        self.responses += 1
+        for dimension, stat in self.stats.items():
+            value = evaluation.get(dimension)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                stat.update(float(value), self.alpha)
+        for strength in evaluation.get("strengths") or []:
+            self.strengths.add(str(strength))
+        for flag in evaluation.get("red_flags") or []:
+            self.red_flags.add(str(flag))
+
+    def to_prompt_context(self) -> str:
+        """Compact text block for per-turn and summary prompts"""
+        if not self.responses:
+            return "No previous responses"
+
+        lines = [f"Responses evaluated: {self.responses}"]
+        for dimension, stat in self.stats.items():
+            if stat.count:
+                lines.append(
+                    f"{dimension}: mean {stat.mean:.1f}, min {stat.minimum:g}, max {stat.maximum:g}, recent trend {stat.ewma:.1f}"
+                )
+        strengths = self.strengths.top(self.top_k)
+        if strengths:
+            lines.append("Recurring strengths: " + "; ".join(f"{item} (x{count})" for item, count in strengths))
+        red_flags = self.red_flags.top(self.top_k)
+        if red_flags:
+            lines.append("Red flags: " + "; ".join(f"{item} (x{count})" for item, count in red_flags))
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "alpha": self.alpha,
+            "top_k": self.top_k,
+            "responses": self.responses,
+            "stats": {dimension: asdict(stat) for dimension, stat in self.stats.items()},
+            "strengths": self.strengths.counts,
+            "red_flags": self.red_flags.counts
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EvaluationAggregates":
+        aggregates = cls(alpha=data.get("alpha"), top_k=data.get("top_k"))
+        aggregates.responses = data.get("responses", 0)
+        for dimension, stat in data.get("stats", {}).items():
+            aggregates.stats[dimension] = RunningStat(**stat)
+        aggregates.strengths.counts = dict(data.get("strengths", {}))
+        aggregates.red_flags.counts = dict(data.get("red_flags", {}))
+        return aggregates
@@ -0,0 +1,215 @@
+"""
+Session Ingest Queue
+Decouples reading audio chunks off a WebSocket from processing them: the receive
+loop only enqueues, and one processor task per session runs the decode / STT / AI
+pipeline in chunk_index order, dropping duplicates and skipping gaps that don't
+fill in time. The buffer is bounded; the client is told to pause and resume
+sending as it fills and drains
+"""
+
+import os
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+QUEUED = "queued"
+DUPLICATE = "duplicate"
+REJECTED = "rejected"
+
+class IngestQueue:
+    def __init__(
+        self,
+        session_id: str,
+        process: Callable[[Any], Awaitable[Any]],
+        notify: Callable[[Dict[str, Any]], Awaitable[None]],
+        max_buffered: Optional[int] = None,
+        reorder_timeout: Optional[float] = None,
+        start_index: Optional[int] = None,
+        buffered: Optional[Dict[int, Any]] = None,
+        after: Optional[asyncio.Task] = None
+    ):
+        """buffered and after come from a queue this one replaces: its unprocessed chunks, and
+        its processor, which must finish the chunk in hand before this one starts"""
+        self.session_id = session_id
+        self._process = process
+        self._notify = notify
+        self.max_buffered = max_buffered or int(os.getenv("INGEST_MAX_BUFFERED", "16"))
+        # How long a gap in chunk indices may hold up later chunks before it is skipped
+        self.reorder_timeout = reorder_timeout or float(os.getenv("INGEST_REORDER_TIMEOUT_SECONDS", "1.0"))
+        self.high_watermark = max(1, self.max_buffered * 3 // 4)
+        self.low_watermark = self.max_buffered // 4
+
+        self._buffer: Dict[int, Any] = {
+            index: item for index, item in (buffered or {}).items() if start_index is None or index >= start_index
+        }
+        self._next_index = start_index
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self.paused = False
+        self.counts: Counter = Counter()
+        self._after = after
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def next_index(self) -> Optional[int]:
+        """First chunk index this queue has not accepted yet"""
+        if self._buffer:
+            return max(self._buffer) + 1
+        return self._next_index
+
+    async def offer(self, chunk_index: int, item: Any) -> str:
+        """Buffer a chunk for processing; never waits on the pipeline"""
+        self.counts["received"] += 1
+        if (self._next_index is not None and chunk_index < self._next_index) or chunk_index in self._buffer:
+            self.counts["duplicates"] += 1
+            return DUPLICATE
+
+        if self._closing or len(self._buffer) >= self.max_buffered:
+            self.counts["rejected"] += 1
+            await self._signal("rejected", chunk_index=chunk_index)
+            return REJECTED
+
+        if self._next_index is None:
+            self._next_index = chunk_index
+        self._buffer[chunk_index] = item
+        self._wakeup.set()
+        if not self.paused and len(self._buffer) >= self.high_watermark:
+            self.paused = True
+            self.counts["pauses"] += 1
+            await self._signal("pause")
+        return QUEUED
+
+    async def _run(self):
+        if self._after is not None:
+            await asyncio.wait([self._after])
+            self._after = None
+        while True:
+            if self._next_index in self._buffer:
+                item = self._buffer.pop(self._next_index)
+                self._next_index += 1
+                if self.paused and len(self._buffer) <= self.low_watermark:
+                    self.paused = False
+                    await self._signal("resume")
+                try:
+                    await self._process(item)
+                    self.counts["processed"] += 1
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.counts["errors"] += 1
+                    print(f"Ingest error for session {self.session_id}: {e}")
+                continue
+
+            if not self._buffer:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # Gap: wait briefly for the missing chunk, then move on to the next one we have
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.reorder_timeout)
+            except asyncio.TimeoutError:
+                resume_at = min(self._buffer)
+                self.counts["skipped"] += resume_at - self._next_index
+                self._next_index = resume_at
+
+    async def _signal(self, state: str, **data):
+        try:
+            await self._notify({
+                "type": "backpressure",
+                "data": {"state": state, "buffered": len(self._buffer), "max_buffered": self.max_buffered, **data}
+            })
+        except Exception as e:
+            print(f"Backpressure signal failed for session {self.session_id}: {e}")
+
+    def hand_off(self) -> Tuple[Optional[int], Dict[int, Any]]:
+        """Stop after the chunk in hand and give up the rest: (next index to process, buffered chunks)"""
+        buffered, self._buffer = self._buffer, {}
+        self._closing = True
+        self._wakeup.set()
+        return self._next_index, buffered
+
+    async def close(self, drain: bool = True, timeout: Optional[float] = None) -> bool:
+        """Stop accepting chunks; process what is buffered (up to timeout) unless drain is False
+
+        Returns False if the queue was already closing.
+        """
+        first = not self._closing
+        self._closing = True
+        self._wakeup.set()
+        if drain:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        if not self._task.done():
+            self._task.cancel()
+            self.counts["abandoned"] += len(self._buffer)
+        self._buffer.clear()
+        return first
+
+class IngestQueues:
+    """The open ingest queue of each connected session on this worker"""
+
+    def __init__(self, drain_timeout: Optional[float] = None):
+        self.drain_timeout = drain_timeout or float(os.getenv("INGEST_DRAIN_TIMEOUT_SECONDS", "30"))
+        self._queues: Dict[str, IngestQueue] = {}
+        self._closed_counts: Counter = Counter()
+        self._background_tasks = set()
+
+    def open(
+        self,
+        session_id: str,
+        process: Callable[[Any], Awaitable[Any]],
+        notify: Callable[[Dict[str, Any]], Awaitable[None]],
+        start_index: Optional[int] = None
+    ) -> IngestQueue:
+        previous = self._queues.get(session_id)
+        if previous is None:
+            queue = IngestQueue(session_id, process, notify, start_index=start_index)
+        else:
+            # A reconnect replaces the old socket. The new queue takes over the old one's unprocessed
+            # chunks and starts once the old processor has finished the chunk in hand, so the session's
+            # chunks are still processed one at a time and in order
+            next_index, buffered = previous.hand_off()
+            if next_index is not None:
+                start_index = max(start_index or 0, next_index)
+            queue = IngestQueue(
+                session_id, process, notify,
+                start_index=start_index, buffered=buffered, after=previous._task
+            )
+            task = asyncio.create_task(self._retire(session_id, previous, drain=True))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        self._queues[session_id] = queue
+        return queue
+
+    async def close(self, session_id: str, queue: Optional[IngestQueue] = None, drain: bool = True):
+        """Close the session's queue, or only `queue` if given (so a stale connection can't close its replacement)"""
+        queue = queue or self._queues.get(session_id)
+        if queue is not None:
+            await self._retire(session_id, queue, drain)
+
+    async def _retire(self, session_id: str, queue: IngestQueue, drain: bool):
+        if self._queues.get(session_id) is queue:
+            del self._queues[session_id]
+        if await queue.close(drain, self.drain_timeout):
+            self._closed_counts.update(queue.counts)
+
+    def stats(self) -> Dict[str, Any]:
+        totals = Counter(self._closed_counts)
+        for queue in self._queues.values():
+            totals.update(queue.counts)
+        return {
+            "sessions": len(self._queues),
+            "buffered": sum(queue.buffered for queue in self._queues.values()),
+            "paused": sum(1 for queue in self._queues.values() if queue.paused),
+            **{name: totals[name] for name in ("received", "processed", "duplicates", "skipped", "rejected", "errors")}
+        }
@@ -0,0 +1,177 @@
+"""
+Hierarchical Interview Summarizer
+Map step of map-reduce summary generation: transcript and response segments are
+summarized concurrently as the interview progresses and cached per session
+"""
+
+import os
+import json
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from common.json_stream import extract_json_object
+
+SegmentKey = Tuple[str, int]  # ("transcript" | "responses", segment index)
+Offsets = Optional[Dict[str, int]]  # Entries dropped from the front of each list; segment indices stay absolute
+
+class HierarchicalSummarizer:
+    def __init__(
+        self,
+        complete: Callable[[str], Awaitable[str]],
+        response_segment_size: Optional[int] = None,
+        transcript_segment_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        self._complete = complete
+        self.response_segment_size = response_segment_size or int(os.getenv("SUMMARY_RESPONSE_SEGMENT_SIZE", "4"))
+        self.transcript_segment_size = transcript_segment_size or int(os.getenv("SUMMARY_TRANSCRIPT_SEGMENT_SIZE", "30"))
+        self._semaphore = asyncio.Semaphore(max_concurrency or int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4")))
+
+        self._segments: Dict[str, Dict[SegmentKey, str]] = {}
+        self._pending: Dict[str, Dict[SegmentKey, asyncio.Task]] = {}
+
+    def observe(self, session_id: str, transcript: List[Dict], responses: List[Dict], offsets: Offsets = None):
+        """Summarize every newly completed segment in the background"""
+        for key, items in self._complete_segments(transcript, responses, offsets):
+            self._schedule(session_id, key, items)
+
+    async def collect(
+        self,
+        session_id: str,
+        transcript: List[Dict],
+        responses: List[Dict],
+        offsets: Offsets = None
+    ) -> Dict[str, List[str]]:
+        """Summarize whatever is still missing, including partial tail segments, and return all segments in order"""
+        tail: List[Tuple[SegmentKey, List[Dict]]] = []
+        for key, items in self._all_segments(transcript, responses, offsets):
+            if self._is_full(key, items):
+                self._schedule(session_id, key, items)
+            elif key not in self._segments.get(session_id, {}) and key not in self._pending.get(session_id, {}):
+                # Tail segments are still growing, so they are summarized but not cached; a head segment
+                # cut short by spilled entries is only summarized if it wasn't while it was complete
+                tail.append((key, items))
+
+        pending = list(self._pending.get(session_id, {}).items())
+        work = tail + [(key, None) for key, _ in pending]
+        results = await asyncio.gather(
+            *[self._summarize(key, items) for key, items in tail],
+            *[task for _, task in pending],
+            return_exceptions=True
+        )
+
+        segments = dict(self._segments.get(session_id, {}))
+        for (key, _), result in zip(work, results):
+            if isinstance(result, str):
+                segments[key] = result
+
+        ordered: Dict[str, List[str]] = {"transcript": [], "responses": []}
+        for kind, index in sorted(segments):
+            ordered[kind].append(segments[(kind, index)])
+        return ordered
+
+    def discard(self, session_id: str):
+        """Drop cached segment summaries once the final summary is stored"""
+        self._segments.pop(session_id, None)
+        for task in self._pending.pop(session_id, {}).values():
+            task.cancel()
+
+    def _segment_size(self, kind: str) -> int:
+        return self.transcript_segment_size if kind == "transcript" else self.response_segment_size
+
+    def _is_full(self, key: SegmentKey, items: List[Dict]) -> bool:
+        return len(items) >= self._segment_size(key[0])
+
+    def _all_segments(
+        self,
+        transcript: List[Dict],
+        responses: List[Dict],
+        offsets: Offsets = None
+    ) -> List[Tuple[SegmentKey, List[Dict]]]:
+        segments = []
+        for kind, entries in (("transcript", transcript), ("responses", responses)):
+            size = self._segment_size(kind)
+            offset = (offsets or {}).get(kind, 0)
+            for index in range(offset // size, (offset + len(entries) + size - 1) // size):
+                start = max(index * size - offset, 0)
+                segments.append(((kind, index), entries[start:(index + 1) * size - offset]))
+        return segments
+
+    def _complete_segments(
+        self,
+        transcript: List[Dict],
+        responses: List[Dict],
+        offsets: Offsets = None
+    ) -> List[Tuple[SegmentKey, List[Dict]]]:
+        return [
+            (key, items) for key, items in self._all_segments(transcript, responses, offsets)
+            if self._is_full(key, items)
+        ]
+
+    def _schedule(self, session_id: str, key: SegmentKey, items: List[Dict]):
+        if key in self._segments.get(session_id, {}) or key in self._pending.get(session_id, {}):
+            return
+
+        task = asyncio.create_task(self._summarize(key, items))
+        self._pending.setdefault(session_id, {})[key] = task
+        task.add_done_callback(lambda done: self._store(session_id, key, done))
+
+    def _store(self, session_id: str, key: SegmentKey, task: asyncio.Task):
+        pending = self._pending.get(session_id)
+        if pending is None:
+            return  # Session was discarded while the segment was in flight
+        pending.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._segments.setdefault(session_id, {})[key] = task.result()
+
+    async def _summarize(self, key: SegmentKey, items: List[Dict]) -> str:
+        """Summarize one segment into a compact JSON string"""
+        kind, index = key
+        prompt = self._build_segment_prompt(kind, index, items)
+
+        async with self._semaphore:
+            response = await self._complete(prompt)
+
+        _, data = extract_json_object(response)
+        if data is None:
+            return response.strip()[:1000]
+        return json.dumps(data, separators=(",", ":"))
+
+    def _build_segment_prompt(self, kind: str, index: int, items: List[Dict]) -> str:
+        size = self._segment_size(kind)
+        start = index * size + 1
+        end = start + len(items) - 1
+
+        if kind == "transcript":
+            body = "\n".join(entry.get("text", "") for entry in items)
+            label = f"Transcript excerpts {start}-{end}"
+        else:
+            body = "\n\n".join(self._format_response(entry) for entry in items)
+            label = f"Candidate responses {start}-{end}"
+
+        return f"""
+Summarize this part of a job interview so it can be combined with other parts later.
+
+{label}:
+{body}
+
+Return a compact JSON object with:
+{{
+    "summary": "Two or three sentences on what the candidate said and how well",
+    "average_score": 0-100,
+    "strengths": ["observed", "strengths"],
+    "weaknesses": ["observed", "weaknesses"],
+    "notable_responses": ["standout", "answers"],
+    "red_flags": ["any", "concerns"]
+}}
+"""
+
+    @staticmethod
+    def _format_response(entry: Dict[str, Any]) -> str:
+        evaluation = (entry.get("ai_response") or {}).get("evaluation_json", {})
+        return (
+            f"Answer: {entry.get('transcript', '')}\n"
+            f"Score: {evaluation.get('overall_score', 'N/A')}/100; "
+            f"strengths: {', '.join(evaluation.get('strengths', []))}; "
+            f"improve: {', '.join(evaluation.get('areas_for_improvement', []))}"
+        )
@@ -0,0 +1,224 @@
+"""
+WebSocket Message Router
+Delivers session messages to whichever worker holds the session's WebSocket.
+A worker registers the sessions it has sockets for; any worker can publish to a
+session, and the message is handed to the owner's local delivery callback. The
+Redis backend uses one pub/sub channel per session (subscribing is registering);
+the in-process backend connects routers that share a bus, for tests and single
+process deployments. Hop latency (publish to delivery) is recorded on receipt
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Only needed for MESSAGE_ROUTER=redis
+    redis = None
+
+# Called on the owning worker with (session_id, message)
+Deliver = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+BROADCAST = "*"
+
+class MessageRouter:
+    backend = "base"
+
+    def __init__(self, deliver: Optional[Deliver] = None, window: Optional[int] = None):
+        self.worker_id = uuid.uuid4().hex[:12]
+        self._deliver = deliver
+        self.sessions: Set[str] = set()
+        window = window or int(os.getenv("MESSAGE_ROUTER_METRICS_WINDOW", "1000"))
+        self._hops: Deque[float] = deque(maxlen=window)
+        self.published = 0
+        self.delivered = 0
+        self.undeliverable = 0
+        self.errors = 0
+
+    def set_deliver(self, deliver: Deliver):
+        self._deliver = deliver
+
+    async def register(self, session_id: str) -> None:
+        """This worker now holds the session's socket"""
+        self.sessions.add(session_id)
+
+    async def unregister(self, session_id: str) -> None:
+        self.sessions.discard(session_id)
+
+    async def publish(self, session_id: str, message: Dict[str, Any]) -> bool:
+        """Send to the worker holding the session; False if no worker holds it"""
+        raise NotImplementedError
+
+    async def broadcast(self, message: Dict[str, Any]) -> None:
+        """Send to every other worker, each delivering to all of its own sessions"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    def _envelope(self, session_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        self.published += 1
+        return {"session_id": session_id, "message": message, "sent_at": time.time(), "origin": self.worker_id}
+
+    async def _receive(self, envelope: Dict[str, Any]) -> None:
+        # Wall-clock timestamps: workers on different hosts need synchronized clocks (NTP) for this to be meaningful
+        if envelope["session_id"] == BROADCAST and envelope.get("origin") == self.worker_id:
+            return  # The publishing worker has already delivered to its own sessions
+        self._hops.append((time.time() - envelope["sent_at"]) * 1000)
+        session_ids = self.sessions if envelope["session_id"] == BROADCAST else [envelope["session_id"]]
+        for session_id in list(session_ids):
+            if session_id not in self.sessions or self._deliver is None:
+                continue
+            try:
+                await self._deliver(session_id, envelope["message"])
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Message delivery error for session {session_id}: {e}")
+
+    @staticmethod
+    def _percentiles(samples: Deque[float]) -> Dict[str, Optional[float]]:
+        if not samples:
+            return {"p50": None, "p90": None, "p99": None}
+        ordered = sorted(samples)
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+        return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "worker_id": self.worker_id,
+            "sessions": len(self.sessions),
+            "published": self.published,
+            "delivered": self.delivered,
+            "undeliverable": self.undeliverable,
+            "errors": self.errors,
+            "hop_latency_ms": self._percentiles(self._hops)
+        }
+
+class InProcessBus:
+    """Shared by the InProcessRouters that stand in for separate workers"""
+
+    def __init__(self):
+        self.owners: Dict[str, "InProcessRouter"] = {}
+        self.routers: Set["InProcessRouter"] = set()
+
+class InProcessRouter(MessageRouter):
+    backend = "memory"
+
+    def __init__(self, bus: Optional[InProcessBus] = None, **options):
+        super().__init__(**options)
+        self.bus = bus or InProcessBus()
+        self.bus.routers.add(self)
+
+    async def register(self, session_id: str) -> None:
+        await super().register(session_id)
+        self.bus.owners[session_id] = self
+
+    async def unregister(self, session_id: str) -> None:
+        await super().unregister(session_id)
+        if self.bus.owners.get(session_id) is self:
+            del self.bus.owners[session_id]
+
+    async def publish(self, session_id: str, message: Dict[str, Any]) -> bool:
+        # Round-trip through JSON like the Redis backend, so tests catch messages that can't cross workers
+        envelope = json.loads(json.dumps(self._envelope(session_id, message)))
+        owner = self.bus.owners.get(session_id)
+        if owner is None:
+            self.undeliverable += 1
+            return False
+        await owner._receive(envelope)
+        return True
+
+    async def broadcast(self, message: Dict[str, Any]) -> None:
+        envelope = json.loads(json.dumps(self._envelope(BROADCAST, message)))
+        await asyncio.gather(*(router._receive(dict(envelope)) for router in list(self.bus.routers)))
+
+    async def close(self) -> None:
+        for session_id in list(self.sessions):
+            await self.unregister(session_id)
+        self.bus.routers.discard(self)
+
+class RedisRouter(MessageRouter):
+    """Redis pub/sub: the owning worker subscribes to the session's channel; PUBLISH reports receivers"""
+
+    backend = "redis"
+
+    def __init__(self, client, prefix: Optional[str] = None, **options):
+        super().__init__(**options)
+        self._client = client
+        self.prefix = prefix or os.getenv("MESSAGE_ROUTER_PREFIX", "ws_route:")
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _channel(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}"
+
+    async def _ensure_listening(self):
+        if self._pubsub is None:
+            self._pubsub = self._client.pubsub()
+            await self._pubsub.subscribe(self._channel(BROADCAST))
+            self._listener = asyncio.create_task(self._listen())
+
+    async def register(self, session_id: str) -> None:
+        await self._ensure_listening()
+        await super().register(session_id)
+        await self._pubsub.subscribe(self._channel(session_id))
+
+    async def unregister(self, session_id: str) -> None:
+        await super().unregister(session_id)
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self._channel(session_id))
+
+    async def publish(self, session_id: str, message: Dict[str, Any]) -> bool:
+        receivers = await self._client.publish(
+            self._channel(session_id),
+            json.dumps(self._envelope(session_id, message), separators=(",", ":"), default=str)
+        )
+        if not receivers:
+            self.undeliverable += 1
+        return bool(receivers)
+
+    async def broadcast(self, message: Dict[str, Any]) -> None:
+        await self._client.publish(
+            self._channel(BROADCAST),
+            json.dumps(self._envelope(BROADCAST, message), separators=(",", ":"), default=str)
+        )
+
+    async def _listen(self):
+        while True:
+            try:
+                item = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if item is None or item.get("type") != "message":
+                    continue
+                await self._receive(json.loads(item["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"Message router listener error: {e}")
+                await asyncio.sleep(1)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._pubsub is not None:
+            close = getattr(self._pubsub, "aclose", None) or self._pubsub.close
+            await close()
+
+def create_message_router(backend: Optional[str] = None, redis_url: Optional[str] = None) -> MessageRouter:
+    """Build the router selected by MESSAGE_ROUTER (memory | redis); defaults to follow SESSION_STORE"""
+    backend = (backend or os.getenv("MESSAGE_ROUTER", os.getenv("SESSION_STORE", "memory"))).lower()
+    if backend == "memory":
+        return InProcessRouter()
+    if backend == "redis":
+        if redis is None:
+            raise RuntimeError("MESSAGE_ROUTER=redis requires the redis package")
+        client = redis.from_url(redis_url or os.getenv("REDIS_URL", "redis://localhost:6379"), decode_responses=True)
+        return RedisRouter(client)
+    raise ValueError(f"Unknown MESSAGE_ROUTER backend: {backend}")
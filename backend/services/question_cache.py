@@ -0,0 +1,164 @@
+"""
+Opening Question Cache
+Keeps a pool of pre-generated opening questions per (position, interview type, difficulty)
+so interview start does not wait on an LLM round trip
+"""
+
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from common.ttl_cache import TTLCache
+
+QuestionKey = Tuple[str, str, str]
+QuestionGenerator = Callable[[str, str, str], Awaitable[Dict[str, Any]]]
+
+class InitialQuestionCache:
+    def __init__(
+        self,
+        generator: QuestionGenerator,
+        pool_size: Optional[int] = None,
+        low_watermark: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        max_keys: Optional[int] = None
+    ):
+        self._generator = generator
+        self.enabled = os.getenv("QUESTION_CACHE_ENABLED", "true").lower() != "false"
+        self.pool_size = pool_size or int(os.getenv("QUESTION_CACHE_POOL_SIZE", "4"))
+        self.low_watermark = low_watermark if low_watermark is not None else int(os.getenv("QUESTION_CACHE_LOW_WATERMARK", "2"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("QUESTION_CACHE_TTL", "21600"))  # 6 hours
+
+        # Each key holds a deque of (generated_at, question) variants
+        self._pools: TTLCache[Deque[Tuple[float, Dict[str, Any]]]] = TTLCache(
+            max_size=max_keys or int(os.getenv("QUESTION_CACHE_MAX_KEYS", "256")),
+            ttl_seconds=self.ttl_seconds
+        )
+        self._refilling: Dict[QuestionKey, asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
+        self.served_from_pool = 0
+        self.generated_inline = 0
+
+    @staticmethod
+    def make_key(position: str, interview_type: str, difficulty: str) -> QuestionKey:
+        """Normalize inputs so trivially different spellings share a pool"""
+        return (
+            " ".join(position.lower().split()),
+            interview_type.strip().lower(),
+            difficulty.strip().lower()
+        )
+
+    async def get(self, position: str, interview_type: str, difficulty: str) -> Dict[str, Any]:
+        """Serve an opening question, generating inline only when the pool is empty"""
+        if not self.enabled:
+            return await self._generator(position, interview_type, difficulty)
+
+        key = self.make_key(position, interview_type, difficulty)
+        question = self._take(key)
+
+        if question is not None:
+            self.served_from_pool += 1
+            self._maybe_refill(key, position, interview_type, difficulty)
+            return question
+
+        self.generated_inline += 1
+        self._maybe_refill(key, position, interview_type, difficulty)
+        return await self._generator(position, interview_type, difficulty)
+
+    async def warm(self, combinations: Iterable[Tuple[str, str, str]]):
+        """Fill pools ahead of traffic, e.g. at application startup"""
+        tasks = []
+        for position, interview_type, difficulty in combinations:
+            key = self.make_key(position, interview_type, difficulty)
+            task = self._maybe_refill(key, position, interview_type, difficulty)
+            if task:
+                tasks.append(task)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _take(self, key: QuestionKey) -> Optional[Dict[str, Any]]:
+        """Pop a random fresh variant from the pool, discarding expired ones"""
+        pool = self._pools.get(key)
+        if not pool:
+            return None
+
+        cutoff = time.monotonic() - self.ttl_seconds
+        while pool and pool[0][0] < cutoff:
+            pool.popleft()
+        if not pool:
+            return None
+
+        index = random.randrange(len(pool))
+        pool.rotate(-index)
+        _, question = pool.popleft()
+        return dict(question)
+
+    def _pool_size(self, key: QuestionKey) -> int:
+        pool = self._pools.peek(key)
+        return len(pool) if pool else 0
+
+    def _maybe_refill(self, key: QuestionKey, position: str, interview_type: str, difficulty: str) -> Optional[asyncio.Task]:
+        """Start a background refill if the pool is low and none is running"""
+        if key in self._refilling or self._pool_size(key) > self.low_watermark:
+            return self._refilling.get(key)
+
+        task = asyncio.create_task(self._refill(key, position, interview_type, difficulty))
+        self._refilling[key] = task
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def _refill(self, key: QuestionKey, position: str, interview_type: str, difficulty: str):
+        """Generate variants concurrently until the pool is back to full size"""
+        try:
+            missing = self.pool_size - self._pool_size(key)
+            if missing <= 0:
+                return
+
+            results = await asyncio.gather(
+                *[self._generator(position, interview_type, difficulty) for _ in range(missing)],
+                return_exceptions=True
+            )
+
+            pool = self._pools.peek(key)
+            if pool is None:
+                pool = deque()
+            seen = {question.get("question") for _, question in pool}
+            now = time.monotonic()
+
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"Opening question refill error: {result}")
+                    continue
+                if result.get("question") in seen:
+                    continue
+                seen.add(result.get("question"))
+                pool.append((now, result))
+
+            self._pools.set(key, pool)
+        finally:
+            self._refilling.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters for the health endpoint"""
+        total = self.served_from_pool + self.generated_inline
+        return {
+            "enabled": self.enabled,
+            "keys": len(self._pools),
+            "pooled_questions": sum(self._pool_size(key) for key in self._pools.keys()),
+            "served_from_pool": self.served_from_pool,
+            "generated_inline": self.generated_inline,
+            "pool_hit_rate": round(self.served_from_pool / total, 4) if total else 0.0,
+            "refills_in_flight": len(self._refilling)
+        }
+
+def parse_warm_keys(value: str) -> List[Tuple[str, str, str]]:
+    """Parse "position:type:difficulty;..." from QUESTION_CACHE_WARM_KEYS"""
+    combinations = []
+    for item in value.split(";"):
+        parts = [part.strip() for part in item.split(":")]
+        if len(parts) == 3 and all(parts):
+            combinations.append((parts[0], parts[1], parts[2]))
+    return combinations
@@ -0,0 +1,262 @@
+"""
+Session Checkpoints
+Periodic, incremental copies of live session state on local disk, so a session
+outlives the worker that held it. Each session has an append-only JSONL file: a
+snapshot line followed by delta lines holding only changed scalar fields and list
+entries added since the previous checkpoint. The file is compacted back to a
+single snapshot after enough deltas. Restoring folds the lines back into session
+state; nothing is re-transcribed or re-evaluated. Files of sessions that expired or
+were never resumed are deleted
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+from .session_store import SessionStore, encode_record
+
+# Default CHECKPOINT_DIR: backend/checkpoints/sessions, wherever the server is started from
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "checkpoints", "sessions")
+
+class CheckpointFiles:
+    """One append-only JSONL file per session under CHECKPOINT_DIR"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = os.path.abspath(directory or os.getenv("CHECKPOINT_DIR") or DEFAULT_CHECKPOINT_DIR)
+
+    def prepare(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9_.-]", "_", session_id) + ".jsonl")
+
+    def append(self, session_id: str, record: Dict[str, Any]) -> None:
+        with open(self._path(session_id), "a", encoding="utf-8") as f:
+            f.write(encode_record(record) + "\n")
+
+    def rewrite(self, session_id: str, record: Dict[str, Any]) -> None:
+        # Write aside and swap in, so a crash mid-compaction leaves the previous file intact
+        path = self._path(session_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(encode_record(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def read(self, session_id: str) -> List[Dict[str, Any]]:
+        try:
+            with open(self._path(session_id), encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return []
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break  # A line torn by a crash mid-write ends the usable checkpoint
+        return records
+
+    def delete(self, session_id: str) -> None:
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def sweep(self, max_age: float) -> int:
+        """Delete checkpoints not written to for max_age seconds; returns how many"""
+        cutoff = time.time() - max_age
+        removed = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith((".jsonl", ".tmp")):
+                    continue
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+class SessionCheckpointer:
+    def __init__(
+        self,
+        store: SessionStore,
+        files: Optional[CheckpointFiles] = None,
+        interval: Optional[float] = None,
+        compact_after: Optional[int] = None,
+        max_age: Optional[float] = None
+    ):
+        self.store = store
+        self.files = files or CheckpointFiles()
+        self.interval = interval or float(os.getenv("CHECKPOINT_INTERVAL_SECONDS", "5"))
+        self.compact_after = compact_after or int(os.getenv("CHECKPOINT_COMPACT_AFTER", "50"))
+        # A checkpoint untouched this long belongs to a session the store has expired anyway
+        self.max_age = max_age or float(os.getenv("CHECKPOINT_MAX_AGE_SECONDS", os.getenv("SESSION_TTL_SECONDS", "86400")))
+        # What the session's file already covers: encoded scalars, absolute list lengths,
+        # the store's offsets when it was written, line count
+        self._marks: Dict[str, Dict[str, Any]] = {}
+        self.tracked: Set[str] = set()
+        self.checkpoints = 0
+        self.compactions = 0
+        self.restores = 0
+        self.swept = 0
+        self.errors = 0
+        self.last_duration_ms: Optional[float] = None
+
+    def track(self, session_id: str):
+        self.tracked.add(session_id)
+
+    def _encode_items(self, field: str, items: List[Any]) -> List[Any]:
+        return [item.to_record() for item in items] if field in self.store.record_types else list(items)
+
+    def _decode_items(self, field: str, items: List[Any]) -> List[Any]:
+        record_type = self.store.record_types.get(field)
+        return [record_type.from_record(item) for item in items] if record_type is not None else items
+
+    async def checkpoint(self, session_id: str) -> bool:
+        """Write whatever changed since the last checkpoint; False if there was nothing to write
+
+        Only a snapshot reads the whole session; a delta reads list entries past the mark.
+        """
+        mark = self._marks.get(session_id)
+        snapshot = mark is None or mark["lines"] >= self.compact_after
+        if snapshot:
+            session = await self.store.load(session_id)
+        else:
+            session = await self.store.load_since(session_id, mark["lengths"], mark["offsets"])
+        if session is None:
+            return False
+        offsets = session.pop("offsets")
+        # Where each list read starts: the kept entries for a snapshot, the mark or past it for a delta
+        starts = {
+            field: offsets[field] if snapshot else max(mark["lengths"][field], offsets[field])
+            for field in self.store.list_fields
+        }
+        scalars = {field: encode_record(value) for field, value in session.items() if field not in self.store.list_fields}
+        lengths = {field: starts[field] + len(session[field]) for field in self.store.list_fields}
+
+        if snapshot:
+            record = {
+                "at": time.time(),
+                "snapshot": True,
+                "set": {field: json.loads(value) for field, value in scalars.items()},
+                "add": {
+                    field: [offsets[field], self._encode_items(field, session[field])]
+                    for field in self.store.list_fields
+                }
+            }
+            await asyncio.to_thread(self.files.rewrite, session_id, record)
+            if mark is not None:
+                self.compactions += 1
+            lines = 1
+        else:
+            changed = {field: json.loads(value) for field, value in scalars.items() if mark["scalars"].get(field) != value}
+            # Entries spilled to the database since the last checkpoint are skipped; start records the gap
+            added = {
+                field: [starts[field], self._encode_items(field, session[field])]
+                for field in self.store.list_fields if session[field]
+            }
+            if not changed and not added:
+                return False
+            await asyncio.to_thread(self.files.append, session_id, {"at": time.time(), "set": changed, "add": added})
+            lines = mark["lines"] + 1
+
+        self._marks[session_id] = {"scalars": scalars, "lengths": lengths, "offsets": offsets, "lines": lines}
+        self.checkpoints += 1
+        return True
+
+    async def checkpoint_all(self) -> int:
+        started = time.perf_counter()
+        written = 0
+        for session_id in list(self.tracked):
+            try:
+                if not await self.store.exists(session_id):
+                    # Expired or deleted elsewhere; nothing left to protect
+                    await self.discard(session_id)
+                    continue
+                written += await self.checkpoint(session_id)
+            except Exception as e:
+                self.errors += 1
+                print(f"Session checkpoint error for {session_id}: {e}")
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        return written
+
+    async def sweep(self) -> int:
+        """Delete checkpoints of sessions no worker resumed, e.g. abandoned across a restart"""
+        try:
+            removed = await asyncio.to_thread(self.files.sweep, self.max_age)
+        except Exception as e:
+            self.errors += 1
+            print(f"Session checkpoint sweep error: {e}")
+            return 0
+        self.swept += removed
+        return removed
+
+    async def run(self):
+        await asyncio.to_thread(self.files.prepare)
+        sweep_interval = min(self.max_age, 3600)
+        next_sweep = 0.0
+        while True:
+            if time.monotonic() >= next_sweep:
+                await self.sweep()
+                next_sweep = time.monotonic() + sweep_interval
+            await asyncio.sleep(self.interval)
+            await self.checkpoint_all()
+
+    def _fold(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        fields: Dict[str, Any] = {}
+        lists = {field: [0, []] for field in self.store.list_fields}
+        for record in records:
+            if record.get("snapshot"):
+                fields = {}
+                lists = {field: [0, []] for field in self.store.list_fields}
+            fields.update(record.get("set", {}))
+            for field, (start, items) in record.get("add", {}).items():
+                offset, kept = lists[field]
+                end = offset + len(kept)
+                if start > end:
+                    # The entries in between were spilled to the database
+                    offset, kept = start, []
+                lists[field] = [offset, kept[:max(0, start - offset)] + items]
+        for field, (offset, kept) in lists.items():
+            limit = self.store.list_limits.get(field)
+            if limit and len(kept) > limit:
+                offset, kept = offset + len(kept) - limit, kept[-limit:]
+            fields[field] = self._decode_items(field, kept)
+            lists[field] = offset
+        return {"fields": fields, "offsets": lists}
+
+    async def restore(self, session_id: str) -> bool:
+        """Rebuild a session in the store from its checkpoint file; False if there is none"""
+        records = await asyncio.to_thread(self.files.read, session_id)
+        if not records:
+            return False
+        state = self._fold(records)
+        await self.store.create(session_id, state["fields"], offsets=state["offsets"])
+        self.restores += 1
+        self.track(session_id)
+        self._marks.pop(session_id, None)  # Next checkpoint is a fresh snapshot of the restored state
+        return True
+
+    async def discard(self, session_id: str):
+        """The interview is over; its checkpoint is no longer needed"""
+        self.tracked.discard(session_id)
+        self._marks.pop(session_id, None)
+        await asyncio.to_thread(self.files.delete, session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.files.directory,
+            "tracked": len(self.tracked),
+            "checkpoints": self.checkpoints,
+            "compactions": self.compactions,
+            "restores": self.restores,
+            "swept": self.swept,
+            "errors": self.errors,
+            "last_duration_ms": self.last_duration_ms
+        }
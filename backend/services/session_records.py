@@ -0,0 +1,90 @@
+"""
+Session Records
+Compact record types for the per-session lists in the session store. Entries are
+stored as positional arrays, so field names aren't repeated in every entry
+"""
+
+from typing import Any, Dict, List, Optional
+
+# Evaluation fields later prompts read; the full evaluation is in the responses table
+RESPONSE_EVALUATION_KEYS = ("overall_score", "strengths", "areas_for_improvement")
+
+class TranscriptEntry:
+    __slots__ = ("text", "timestamp", "confidence")
+
+    def __init__(self, text: str, timestamp: float, confidence: float):
+        self.text = text
+        self.timestamp = timestamp
+        self.confidence = confidence
+
+    def to_record(self) -> List[Any]:
+        return [self.text, self.timestamp, self.confidence]
+
+    @classmethod
+    def from_record(cls, record: List[Any]) -> "TranscriptEntry":
+        return cls(*record)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"text": self.text, "timestamp": self.timestamp, "confidence": self.confidence}
+
+class ResponseRecord:
+    """One evaluated answer, keeping only what the follow-up and summary prompts use"""
+
+    __slots__ = ("transcript", "assistant_reply", "evaluation", "next_question", "interview_complete", "timestamp")
+
+    def __init__(
+        self,
+        transcript: str,
+        assistant_reply: str,
+        evaluation: Dict[str, Any],
+        next_question: Optional[str],
+        interview_complete: bool,
+        timestamp: str
+    ):
+        self.transcript = transcript
+        self.assistant_reply = assistant_reply
+        self.evaluation = evaluation
+        self.next_question = next_question
+        self.interview_complete = interview_complete
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_ai_response(cls, transcript: str, ai_response: Dict[str, Any], timestamp: str) -> "ResponseRecord":
+        evaluation = ai_response.get("evaluation_json") or {}
+        return cls(
+            transcript=transcript,
+            assistant_reply=ai_response.get("assistant_reply", ""),
+            evaluation={key: evaluation[key] for key in RESPONSE_EVALUATION_KEYS if key in evaluation},
+            next_question=ai_response.get("next_question"),
+            interview_complete=bool(ai_response.get("interview_complete")),
+            timestamp=timestamp
+        )
+
+    def to_record(self) -> List[Any]:
+        return [
+            self.transcript, self.assistant_reply, self.evaluation,
+            self.next_question, self.interview_complete, self.timestamp
+        ]
+
+    @classmethod
+    def from_record(cls, record: List[Any]) -> "ResponseRecord":
+        return cls(*record)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The shape the interviewer and summarizer prompts read"""
+        return {
+            "transcript": self.transcript,
+            "ai_response": {
+                "assistant_reply": self.assistant_reply,
+                "evaluation_json": self.evaluation,
+                "next_question": self.next_question,
+                "interview_complete": self.interview_complete
+            },
+            "timestamp": self.timestamp
+        }
+
+# Typed list fields of a session; other fields are stored as plain JSON
+SESSION_RECORD_TYPES = {
+    "transcript": TranscriptEntry,
+    "responses": ResponseRecord
+}
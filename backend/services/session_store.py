@@ -0,0 +1,646 @@
+"""
+Interview Session Store
+Live interview session state kept outside the worker process, so a request for a
+session can be served by any uvicorn worker. Every field is its own compact JSON
+record: scalar fields are replaced whole, list fields grow by atomic appends.
+List fields are ring buffers: once one outgrows its limit the oldest entries are
+handed to a spill callback (the database) and dropped from the session
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .session_records import SESSION_RECORD_TYPES
+
+try:
+    import redis.asyncio as redis
+    from redis.exceptions import WatchError
+except ImportError:  # Only needed for SESSION_STORE=redis
+    redis = None
+
+    class WatchError(Exception):
+        pass
+
+# Fields that only ever grow; stored as lists so appends never rewrite earlier entries
+LIST_FIELDS = ("transcript", "questions", "responses")
+
+# Called with (session_id, field, index of the first entry, entries) for entries dropped from a list
+SpillHandler = Callable[[str, str, int, List[Any]], Awaitable[None]]
+
+def encode_record(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+def decode_record(raw: Any) -> Any:
+    return json.loads(raw) if raw is not None else None
+
+def default_list_limits() -> Dict[str, int]:
+    return {
+        "transcript": int(os.getenv("SESSION_TRANSCRIPT_LIMIT", "300")),
+        "questions": int(os.getenv("SESSION_QUESTIONS_LIMIT", "50")),
+        "responses": int(os.getenv("SESSION_RESPONSES_LIMIT", "50"))
+    }
+
+class SessionConflictError(Exception):
+    """A field kept changing under a read-modify-write until the retries ran out"""
+
+class SessionStore:
+    """Operations both backends provide; values must be JSON-serializable"""
+
+    backend = "base"
+
+    def __init__(
+        self,
+        list_fields=LIST_FIELDS,
+        record_types: Optional[Dict[str, Any]] = None,
+        list_limits: Optional[Dict[str, int]] = None,
+        on_spill: Optional[SpillHandler] = None,
+        ttl_seconds: Optional[int] = None,
+        completed_ttl_seconds: Optional[int] = None
+    ):
+        self.list_fields = tuple(list_fields)
+        self.record_types = SESSION_RECORD_TYPES if record_types is None else record_types
+        self.list_limits = default_list_limits() if list_limits is None else list_limits
+        self.on_spill = on_spill
+        # Abandoned sessions expire on their own; every write pushes the expiry back
+        self.ttl_seconds = ttl_seconds or int(os.getenv("SESSION_TTL_SECONDS", "86400"))
+        self.completed_ttl_seconds = completed_ttl_seconds or int(os.getenv("SESSION_COMPLETED_TTL_SECONDS", "900"))
+        self.conflicts = 0
+        self.spilled = 0
+        self.spill_errors = 0
+        self._background_tasks = set()
+
+    async def create(self, session_id: str, fields: Dict[str, Any], offsets: Optional[Dict[str, int]] = None) -> None:
+        """Start a session, replacing any previous state under the same id
+
+        offsets gives, per list field, how many entries came before the ones in fields
+        (a session restored from a checkpoint).
+        """
+        raise NotImplementedError
+
+    async def exists(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    async def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Every field of the session plus "offsets" (entries already spilled per list), or None"""
+        raise NotImplementedError
+
+    async def load_since(
+        self,
+        session_id: str,
+        lengths: Dict[str, int],
+        offsets: Optional[Dict[str, int]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Like load, but each list only holds its entries from absolute position lengths[field] on
+
+        "offsets" means what it does for load, so a list's first entry is at
+        max(lengths[field], offsets[field]). offsets passed in are the caller's guess at
+        them (the last ones it saw); a stale guess costs a retry, not a wrong answer.
+        """
+        session = await self.load(session_id)
+        if session is None:
+            return None
+        for field in self.list_fields:
+            offset = session["offsets"][field]
+            session[field] = session[field][max(lengths.get(field, 0), offset) - offset:]
+        return session
+
+    async def get_field(self, session_id: str, field: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    async def set_field(self, session_id: str, field: str, value: Any) -> None:
+        raise NotImplementedError
+
+    async def update_field(self, session_id: str, field: str, update: Callable[[Any], Any]) -> Any:
+        """Replace a field with update(current value) without losing concurrent updates; returns the new value"""
+        raise NotImplementedError
+
+    async def append(self, session_id: str, field: str, item: Any) -> int:
+        """Append to a list field; returns how many entries it has ever had, spilled ones included"""
+        raise NotImplementedError
+
+    async def get_list(self, session_id: str, field: str) -> List[Any]:
+        return await self.tail(session_id, field, 0)
+
+    async def window(self, session_id: str, field: str) -> Tuple[int, List[Any]]:
+        """(number of entries spilled before the first one kept, kept entries)"""
+        raise NotImplementedError
+
+    async def tail(self, session_id: str, field: str, count: int) -> List[Any]:
+        """Last `count` entries of a list field (all kept entries for count 0)"""
+        raise NotImplementedError
+
+    async def length(self, session_id: str, field: str) -> int:
+        raise NotImplementedError
+
+    async def expire(self, session_id: str, seconds: int) -> None:
+        raise NotImplementedError
+
+    async def complete(self, session_id: str) -> None:
+        """Mark a session completed and let it expire after the completed-session TTL"""
+        if await self.exists(session_id):
+            await self.set_field(session_id, "status", "completed")
+            await self.expire(session_id, self.completed_ttl_seconds)
+
+    async def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    async def evict_expired(self) -> int:
+        """Drop expired sessions; backends that expire keys themselves have nothing to do"""
+        return 0
+
+    async def memory_usage(self, session_id: str) -> int:
+        """Approximate bytes held for one session"""
+        raise NotImplementedError
+
+    async def memory_report(self, top: int = 10) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    def _check_list(self, field: str):
+        if field not in self.list_fields:
+            raise KeyError(f"{field} is not a list field")
+
+    def _encode_item(self, field: str, item: Any) -> str:
+        return encode_record(item.to_record() if field in self.record_types else item)
+
+    def _decode_item(self, field: str, raw: Any) -> Any:
+        record_type = self.record_types.get(field)
+        value = decode_record(raw)
+        return record_type.from_record(value) if record_type is not None else value
+
+    def _overflow(self, field: str, length: int) -> int:
+        """Entries to spill; trimming happens in batches so most appends don't touch the database"""
+        limit = self.list_limits.get(field)
+        if not limit or length < limit + max(1, limit // 10):
+            return 0
+        return length - limit
+
+    def _spill(self, session_id: str, field: str, start: int, raw_items: List[Any]):
+        if not raw_items:
+            return
+        self.spilled += len(raw_items)
+        if self.on_spill is None:
+            return
+        items = [self._decode_item(field, raw) for raw in raw_items]
+        task = asyncio.create_task(self._spill_in_background(session_id, field, start, items))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _spill_in_background(self, session_id: str, field: str, start: int, items: List[Any]):
+        try:
+            await self.on_spill(session_id, field, start, items)
+        except Exception as e:
+            self.spill_errors += 1
+            print(f"Session spill error for {session_id}/{field}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "conflicts": self.conflicts,
+            "spilled": self.spilled,
+            "spill_errors": self.spill_errors
+        }
+
+def _offset_field(field: str) -> str:
+    return f"{field}_offset"
+
+class InMemorySessionStore(SessionStore):
+    """Single-process backend; keeps the same encoded records as Redis so both behave alike"""
+
+    backend = "memory"
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, **options):
+        super().__init__(**options)
+        self._clock = clock
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._expires_at: Dict[str, float] = {}
+        self.evictions = 0
+
+    def _live(self, session_id: str) -> Optional[Dict[str, Any]]:
+        record = self._sessions.get(session_id)
+        if record is not None and self._expires_at.get(session_id, float("inf")) <= self._clock():
+            self._evict(session_id)
+            return None
+        return record
+
+    def _touch(self, session_id: str):
+        self._expires_at[session_id] = self._clock() + self.ttl_seconds
+
+    def _evict(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        self._expires_at.pop(session_id, None)
+        self.evictions += 1
+
+    async def create(self, session_id: str, fields: Dict[str, Any], offsets: Optional[Dict[str, int]] = None) -> None:
+        record = {field: [] for field in self.list_fields}
+        for field, value in fields.items():
+            if field in self.list_fields:
+                record[field] = [self._encode_item(field, item) for item in value or []]
+            else:
+                record[field] = encode_record(value)
+        for field, offset in (offsets or {}).items():
+            record[_offset_field(field)] = encode_record(offset)
+        self._sessions[session_id] = record
+        self._touch(session_id)
+
+    async def exists(self, session_id: str) -> bool:
+        return self._live(session_id) is not None
+
+    def _offset(self, record: Dict[str, Any], field: str) -> int:
+        return decode_record(record.get(_offset_field(field))) or 0
+
+    async def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        record = self._live(session_id)
+        if record is None:
+            return None
+        session = {"offsets": {field: self._offset(record, field) for field in self.list_fields}}
+        for field, value in record.items():
+            if field in self.list_fields:
+                session[field] = [self._decode_item(field, item) for item in value]
+            elif not field.endswith("_offset"):
+                session[field] = decode_record(value)
+        return session
+
+    async def load_since(
+        self,
+        session_id: str,
+        lengths: Dict[str, int],
+        offsets: Optional[Dict[str, int]] = None
+    ) -> Optional[Dict[str, Any]]:
+        record = self._live(session_id)
+        if record is None:
+            return None
+        session = {"offsets": {field: self._offset(record, field) for field in self.list_fields}}
+        for field, value in record.items():
+            if field in self.list_fields:
+                offset = session["offsets"][field]
+                items = value[max(lengths.get(field, 0), offset) - offset:]
+                session[field] = [self._decode_item(field, item) for item in items]
+            elif not field.endswith("_offset"):
+                session[field] = decode_record(value)
+        return session
+
+    async def get_field(self, session_id: str, field: str, default: Any = None) -> Any:
+        record = self._live(session_id)
+        if record is None or field not in record:
+            return default
+        if field in self.list_fields:
+            return [self._decode_item(field, item) for item in record[field]]
+        return decode_record(record[field])
+
+    async def set_field(self, session_id: str, field: str, value: Any) -> None:
+        record = self._live(session_id)
+        if record is not None:
+            record[field] = encode_record(value)
+            self._touch(session_id)
+
+    async def update_field(self, session_id: str, field: str, update: Callable[[Any], Any]) -> Any:
+        # No await between read and write, so nothing else can interleave
+        record = self._live(session_id)
+        if record is None:
+            return None
+        value = update(decode_record(record.get(field)))
+        record[field] = encode_record(value)
+        self._touch(session_id)
+        return value
+
+    async def append(self, session_id: str, field: str, item: Any) -> int:
+        self._check_list(field)
+        record = self._live(session_id)
+        if record is None:
+            return 0
+        entries = record[field]
+        entries.append(self._encode_item(field, item))
+        offset = self._offset(record, field)
+        overflow = self._overflow(field, len(entries))
+        if overflow:
+            spilled = entries[:overflow]
+            del entries[:overflow]
+            record[_offset_field(field)] = encode_record(offset + overflow)
+            self._spill(session_id, field, offset, spilled)
+            offset += overflow
+        self._touch(session_id)
+        return offset + len(entries)
+
+    async def window(self, session_id: str, field: str) -> Tuple[int, List[Any]]:
+        self._check_list(field)
+        record = self._live(session_id)
+        if record is None:
+            return 0, []
+        return self._offset(record, field), [self._decode_item(field, item) for item in record[field]]
+
+    async def tail(self, session_id: str, field: str, count: int) -> List[Any]:
+        self._check_list(field)
+        record = self._live(session_id)
+        if record is None:
+            return []
+        items = record[field][-count:] if count else record[field]
+        return [self._decode_item(field, item) for item in items]
+
+    async def length(self, session_id: str, field: str) -> int:
+        self._check_list(field)
+        record = self._live(session_id)
+        return len(record[field]) if record is not None else 0
+
+    async def expire(self, session_id: str, seconds: int) -> None:
+        if self._live(session_id) is not None:
+            self._expires_at[session_id] = self._clock() + seconds
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._expires_at.pop(session_id, None)
+
+    async def evict_expired(self) -> int:
+        now = self._clock()
+        expired = [session_id for session_id, expires_at in self._expires_at.items() if expires_at <= now]
+        for session_id in expired:
+            self._evict(session_id)
+        return len(expired)
+
+    def _record_size(self, record: Dict[str, Any]) -> int:
+        size = sys.getsizeof(record)
+        for field, value in record.items():
+            size += sys.getsizeof(field)
+            if isinstance(value, list):
+                size += sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+            else:
+                size += sys.getsizeof(value)
+        return size
+
+    async def memory_usage(self, session_id: str) -> int:
+        record = self._live(session_id)
+        return self._record_size(record) if record is not None else 0
+
+    async def memory_report(self, top: int = 10) -> Dict[str, Any]:
+        await self.evict_expired()
+        sizes = {session_id: self._record_size(record) for session_id, record in self._sessions.items()}
+        largest = sorted(sizes.items(), key=lambda entry: -entry[1])[:top]
+        return {
+            "sessions": len(sizes),
+            "total_bytes": sum(sizes.values()),
+            "largest": [
+                {
+                    "session_id": session_id,
+                    "bytes": size,
+                    "status": decode_record(self._sessions[session_id].get("status"))
+                }
+                for session_id, size in largest
+            ]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "sessions": len(self._sessions), "evictions": self.evictions}
+
+class RedisSessionStore(SessionStore):
+    """Shared backend: one hash per session for scalar fields plus one Redis list per list field
+
+    Works with any redis.asyncio-compatible client, including fakeredis for tests.
+    """
+
+    backend = "redis"
+
+    def __init__(self, client, prefix: Optional[str] = None, max_retries: int = 10, **options):
+        super().__init__(**options)
+        self._client = client
+        self.prefix = prefix or os.getenv("SESSION_STORE_PREFIX", "interview_session:")
+        self.max_retries = max_retries
+
+    def _key(self, session_id: str) -> str:
+        # The hash tag keeps all of a session's keys in one cluster slot, so transactions can span them
+        return f"{self.prefix}{{{session_id}}}"
+
+    def _list_key(self, session_id: str, field: str) -> str:
+        return f"{self._key(session_id)}:{field}"
+
+    def _all_keys(self, session_id: str) -> List[str]:
+        return [self._key(session_id)] + [self._list_key(session_id, field) for field in self.list_fields]
+
+    async def create(self, session_id: str, fields: Dict[str, Any], offsets: Optional[Dict[str, int]] = None) -> None:
+        key = self._key(session_id)
+        scalars = {field: encode_record(value) for field, value in fields.items() if field not in self.list_fields}
+        scalars.update({_offset_field(field): offset for field, offset in (offsets or {}).items()})
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.delete(*self._all_keys(session_id))
+            pipe.hset(key, mapping=scalars)
+            pipe.expire(key, self.ttl_seconds)
+            for field in self.list_fields:
+                items = fields.get(field) or []
+                if items:
+                    list_key = self._list_key(session_id, field)
+                    pipe.rpush(list_key, *[self._encode_item(field, item) for item in items])
+                    pipe.expire(list_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def exists(self, session_id: str) -> bool:
+        return bool(await self._client.exists(self._key(session_id)))
+
+    async def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.hgetall(self._key(session_id))
+            for field in self.list_fields:
+                pipe.lrange(self._list_key(session_id, field), 0, -1)
+            results = await pipe.execute()
+
+        scalars, lists = results[0], results[1:]
+        if not scalars:
+            return None
+        scalars = {(field.decode() if isinstance(field, bytes) else field): value for field, value in scalars.items()}
+        session = {
+            "offsets": {field: int(scalars.pop(_offset_field(field), 0) or 0) for field in self.list_fields}
+        }
+        session.update({field: decode_record(value) for field, value in scalars.items()})
+        for field, items in zip(self.list_fields, lists):
+            session[field] = [self._decode_item(field, item) for item in items]
+        return session
+
+    async def load_since(
+        self,
+        session_id: str,
+        lengths: Dict[str, int],
+        offsets: Optional[Dict[str, int]] = None
+    ) -> Optional[Dict[str, Any]]:
+        key = self._key(session_id)
+        guess = {field: (offsets or {}).get(field, 0) for field in self.list_fields}
+        for _ in range(self.max_retries):
+            # Ranges are relative to the kept entries, so they are only right if no entries were
+            # spilled since the guess; the hash read in the same transaction tells whether they were
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.hgetall(key)
+                for field in self.list_fields:
+                    pipe.lrange(self._list_key(session_id, field), max(0, lengths.get(field, 0) - guess[field]), -1)
+                results = await pipe.execute()
+
+            scalars, lists = results[0], results[1:]
+            if not scalars:
+                return None
+            scalars = {(field.decode() if isinstance(field, bytes) else field): value for field, value in scalars.items()}
+            current = {field: int(scalars.pop(_offset_field(field), 0) or 0) for field in self.list_fields}
+            if current != guess:
+                guess = current
+                continue
+            session = {"offsets": current}
+            session.update({field: decode_record(value) for field, value in scalars.items()})
+            for field, items in zip(self.list_fields, lists):
+                session[field] = [self._decode_item(field, item) for item in items]
+            return session
+        raise SessionConflictError(f"Could not read session {session_id}")
+
+    async def get_field(self, session_id: str, field: str, default: Any = None) -> Any:
+        if field in self.list_fields:
+            return await self.get_list(session_id, field)
+        raw = await self._client.hget(self._key(session_id), field)
+        return decode_record(raw) if raw is not None else default
+
+    async def _transaction(self, session_id: str, watch_keys: List[str], body: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Optimistic transaction: WATCH the session's keys, run body(pipe), which reads and then
+        queues its writes after pipe.multi(), and retry if another worker wrote first
+
+        Returns None without writing if the session doesn't exist, so writes never recreate an
+        expired or deleted session.
+        """
+        key = self._key(session_id)
+        for _ in range(self.max_retries):
+            async with self._client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(key, *watch_keys)
+                    if not await pipe.exists(key):
+                        await pipe.unwatch()
+                        return None
+                    result = await body(pipe)
+                    await pipe.execute()
+                    return result
+                except WatchError:
+                    self.conflicts += 1
+        raise SessionConflictError(f"Could not write to session {session_id}")
+
+    async def set_field(self, session_id: str, field: str, value: Any) -> None:
+        key = self._key(session_id)
+
+        async def write(pipe):
+            pipe.multi()
+            pipe.hset(key, field, encode_record(value))
+            pipe.expire(key, self.ttl_seconds)
+
+        await self._transaction(session_id, [], write)
+
+    async def update_field(self, session_id: str, field: str, update: Callable[[Any], Any]) -> Any:
+        """Read-modify-write that retries if another worker wrote to the session first"""
+        key = self._key(session_id)
+
+        async def write(pipe):
+            value = update(decode_record(await pipe.hget(key, field)))
+            pipe.multi()
+            pipe.hset(key, field, encode_record(value))
+            pipe.expire(key, self.ttl_seconds)
+            return value
+
+        return await self._transaction(session_id, [], write)
+
+    async def append(self, session_id: str, field: str, item: Any) -> int:
+        self._check_list(field)
+        key = self._key(session_id)
+        list_key = self._list_key(session_id, field)
+        encoded = self._encode_item(field, item)
+
+        async def write(pipe):
+            # Push, trim and offset move together, so concurrent appends never trim or spill
+            # the same entries twice and the offset always matches what was trimmed
+            length = await pipe.llen(list_key) + 1
+            offset = int(await pipe.hget(key, _offset_field(field)) or 0)
+            overflow = self._overflow(field, length)
+            spilled = await pipe.lrange(list_key, 0, overflow - 1) if overflow else []
+            pipe.multi()
+            pipe.rpush(list_key, encoded)
+            if overflow:
+                pipe.ltrim(list_key, overflow, -1)
+                pipe.hset(key, _offset_field(field), offset + overflow)
+            pipe.expire(list_key, self.ttl_seconds)
+            pipe.expire(key, self.ttl_seconds)
+            return offset, spilled, offset + length
+
+        result = await self._transaction(session_id, [list_key], write)
+        if result is None:
+            return 0
+        offset, spilled, total = result
+        self._spill(session_id, field, offset, spilled)
+        return total
+
+    async def window(self, session_id: str, field: str) -> Tuple[int, List[Any]]:
+        self._check_list(field)
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.hget(self._key(session_id), _offset_field(field))
+            pipe.lrange(self._list_key(session_id, field), 0, -1)
+            offset, items = await pipe.execute()
+        return int(offset or 0), [self._decode_item(field, item) for item in items]
+
+    async def tail(self, session_id: str, field: str, count: int) -> List[Any]:
+        self._check_list(field)
+        items = await self._client.lrange(self._list_key(session_id, field), -count if count else 0, -1)
+        return [self._decode_item(field, item) for item in items]
+
+    async def length(self, session_id: str, field: str) -> int:
+        self._check_list(field)
+        return await self._client.llen(self._list_key(session_id, field))
+
+    async def expire(self, session_id: str, seconds: int) -> None:
+        async with self._client.pipeline(transaction=True) as pipe:
+            for key in self._all_keys(session_id):
+                pipe.expire(key, seconds)
+            await pipe.execute()
+
+    async def delete(self, session_id: str) -> None:
+        await self._client.delete(*self._all_keys(session_id))
+
+    async def memory_usage(self, session_id: str) -> int:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key in self._all_keys(session_id):
+                pipe.memory_usage(key)
+            sizes = await pipe.execute()
+        return sum(size or 0 for size in sizes)
+
+    async def memory_report(self, top: int = 10) -> Dict[str, Any]:
+        """Walks the store's keys with SCAN; meant for the metrics endpoint, not per-request use"""
+        sizes: Dict[str, int] = {}
+        async for key in self._client.scan_iter(match=f"{self.prefix}*", count=500):
+            key = key.decode() if isinstance(key, bytes) else key
+            session_id = key[len(self.prefix):].split("}", 1)[0].lstrip("{")
+            sizes[session_id] = sizes.get(session_id, 0) + (await self._client.memory_usage(key) or 0)
+        largest = sorted(sizes.items(), key=lambda entry: -entry[1])[:top]
+        return {
+            "sessions": len(sizes),
+            "total_bytes": sum(sizes.values()),
+            "largest": [
+                {
+                    "session_id": session_id,
+                    "bytes": size,
+                    "status": await self.get_field(session_id, "status")
+                }
+                for session_id, size in largest
+            ]
+        }
+
+    async def close(self) -> None:
+        close = getattr(self._client, "aclose", None) or self._client.close
+        await close()
+
+def create_session_store(
+    backend: Optional[str] = None,
+    redis_url: Optional[str] = None,
+    on_spill: Optional[SpillHandler] = None
+) -> SessionStore:
+    """Build the store selected by SESSION_STORE (memory | redis)"""
+    backend = (backend or os.getenv("SESSION_STORE", "memory")).lower()
+    if backend == "memory":
+        return InMemorySessionStore(on_spill=on_spill)
+    if backend == "redis":
+        if redis is None:
+            raise RuntimeError("SESSION_STORE=redis requires the redis package")
+        client = redis.from_url(redis_url or os.getenv("REDIS_URL", "redis://localhost:6379"), decode_responses=True)
+        return RedisSessionStore(client, on_spill=on_spill)
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
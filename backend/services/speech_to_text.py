@@ -27,10 +27,15 @@ class SpeechToTextService:
         self.api_key = os.getenv("STT_API_KEY", os.getenv("OPENAI_API_KEY"))
         
         # Initialize based on provider
+        # Base URLs let the service run against local stand-in servers (see standin/)
         if self.provider == "openai":
-            self.client = AsyncOpenAI(api_key=self.api_key)
+            self.client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=os.getenv("STT_BASE_URL") or os.getenv("OPENAI_BASE_URL") or None
+            )
         elif self.provider == "deepgram":
-            self.deepgram_url = "https://api.deepgram.com/v1/listen"
+            base_url = os.getenv("DEEPGRAM_BASE_URL", "https://api.deepgram.com").rstrip("/")
+            self.deepgram_url = f"{base_url}/v1/listen"
             self.headers = {
                 "Authorization": f"Token {self.api_key}",
                 "Content-Type": "audio/wav"
@@ -0,0 +1,101 @@
+"""
+WebSocket Wire Codecs
+Encodings for outbound WebSocket messages, negotiated per connection through the
+WebSocket subprotocol (or an ?encoding= query parameter): compact JSON text frames,
+using orjson when it is installed, or MessagePack binary frames. A message sent to
+many connections is encoded once per codec, and encode time and size are recorded
+by message type
+"""
+
+import json
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # The stdlib encoder produces the same JSON, only slower
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Clients can't negotiate msgpack without it
+    msgpack = None
+
+# Subprotocol names offered by clients, e.g. Sec-WebSocket-Protocol: interview.msgpack, interview.json
+SUBPROTOCOL_PREFIX = "interview."
+
+class JsonCodec:
+    name = "json"
+    binary = False
+
+    def encode(self, message: Dict[str, Any]) -> str:
+        if orjson is not None:
+            return orjson.dumps(message, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        return json.dumps(message, separators=(",", ":"), default=str)
+
+class MsgpackCodec:
+    name = "msgpack"
+    binary = True
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        return msgpack.packb(message, default=str)
+
+JSON = JsonCodec()
+CODECS: Dict[str, Any] = {"json": JSON}
+if msgpack is not None:
+    CODECS["msgpack"] = MsgpackCodec()
+
+def negotiate_codec(subprotocols: Iterable[str] = (), requested: Optional[str] = None) -> Tuple[Any, Optional[str]]:
+    """(codec, subprotocol to accept) from the client's offered subprotocols in preference order, else ?encoding="""
+    for subprotocol in subprotocols:
+        name = subprotocol[len(SUBPROTOCOL_PREFIX):] if subprotocol.startswith(SUBPROTOCOL_PREFIX) else None
+        if name in CODECS:
+            return CODECS[name], subprotocol
+    return CODECS.get((requested or "").lower(), JSON), None
+
+class SerializationStats:
+    """Encode count, bytes and time per message type and codec"""
+
+    def __init__(self):
+        self._totals: Dict[Tuple[str, str], list] = defaultdict(lambda: [0, 0, 0])  # count, bytes, ns
+
+    def record(self, message_type: str, codec: str, size: int, elapsed_ns: int):
+        totals = self._totals[(message_type, codec)]
+        totals[0] += 1
+        totals[1] += size
+        totals[2] += elapsed_ns
+
+    def stats(self) -> Dict[str, Any]:
+        by_type: Dict[str, Dict[str, Any]] = {}
+        for (message_type, codec), (count, size, elapsed_ns) in sorted(self._totals.items()):
+            by_type.setdefault(message_type, {})[codec] = {
+                "encoded": count,
+                "avg_bytes": round(size / count),
+                "avg_encode_us": round(elapsed_ns / count / 1000, 2),
+                "total_encode_ms": round(elapsed_ns / 1_000_000, 3)
+            }
+        return by_type
+
+class OutboundMessage:
+    """A message plus its encodings, so fan-out encodes once per codec instead of once per connection"""
+
+    __slots__ = ("message", "_encoded")
+
+    def __init__(self, message: Dict[str, Any]):
+        self.message = message
+        self._encoded: Dict[str, Union[str, bytes]] = {}
+
+    @property
+    def type(self) -> Optional[str]:
+        return self.message.get("type")
+
+    def encode(self, codec, stats: Optional[SerializationStats] = None) -> Union[str, bytes]:
+        payload = self._encoded.get(codec.name)
+        if payload is None:
+            started = time.perf_counter_ns()
+            payload = codec.encode(self.message)
+            if stats is not None:
+                stats.record(self.type or "unknown", codec.name, len(payload), time.perf_counter_ns() - started)
+            self._encoded[codec.name] = payload
+        return payload
@@ -0,0 +1 @@
+"""Local stand-in servers for AI and speech providers, used for offline load testing"""
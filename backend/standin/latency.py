@@ -0,0 +1,85 @@
+"""
+Latency and Fault Models
+Configurable delay distributions and error injection for the stand-in servers
+"""
+
+import os
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal", "exponential")
+
+@dataclass
+class LatencyModel:
+    """Delay distribution in seconds, parsed from e.g. "lognormal:median=0.8,sigma=0.5" """
+    distribution: str = "constant"
+    params: Dict[str, float] = field(default_factory=lambda: {"value": 0.0})
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    @classmethod
+    def parse(cls, spec: str, rng: Optional[random.Random] = None) -> "LatencyModel":
+        name, _, raw_params = spec.partition(":")
+        name = name.strip() or "constant"
+        if name not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {name}")
+
+        params = {}
+        for item in raw_params.split(","):
+            if "=" in item:
+                key, value = item.split("=", 1)
+                params[key.strip()] = float(value)
+        return cls(name, params, rng or random.Random())
+
+    def sample(self) -> float:
+        p = self.params
+        if self.distribution == "constant":
+            value = p.get("value", 0.0)
+        elif self.distribution == "uniform":
+            value = self.rng.uniform(p.get("low", 0.0), p.get("high", 1.0))
+        elif self.distribution == "normal":
+            value = self.rng.gauss(p.get("mean", 0.5), p.get("stddev", 0.1))
+        elif self.distribution == "lognormal":
+            value = self.rng.lognormvariate(math.log(p.get("median", 0.5)), p.get("sigma", 0.5))
+        else:  # exponential
+            value = self.rng.expovariate(1.0 / p.get("mean", 0.5))
+        return min(max(0.0, value), p.get("max", 120.0))
+
+@dataclass
+class FaultModel:
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: int = 1
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    def draw(self) -> Optional[str]:
+        """Return "rate_limit", "error" or None for a successful call"""
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return "rate_limit"
+        if roll < self.rate_limit_rate + self.error_rate:
+            return "error"
+        return None
+
+@dataclass
+class StandinProfile:
+    """Everything that shapes one provider family's simulated behaviour"""
+    latency: LatencyModel
+    token_latency: LatencyModel
+    faults: FaultModel
+
+    @classmethod
+    def from_env(cls, prefix: str, default_latency: str, default_token_latency: str = "constant:value=0") -> "StandinProfile":
+        seed = os.getenv("STANDIN_SEED")
+        rng = random.Random(f"{seed}:{prefix}") if seed is not None else random.Random()
+        return cls(
+            latency=LatencyModel.parse(os.getenv(f"STANDIN_{prefix}_LATENCY", default_latency), rng),
+            token_latency=LatencyModel.parse(os.getenv(f"STANDIN_{prefix}_TOKEN_LATENCY", default_token_latency), rng),
+            faults=FaultModel(
+                error_rate=float(os.getenv(f"STANDIN_{prefix}_ERROR_RATE", "0")),
+                rate_limit_rate=float(os.getenv(f"STANDIN_{prefix}_RATE_LIMIT_RATE", "0")),
+                retry_after_seconds=int(os.getenv(f"STANDIN_{prefix}_RETRY_AFTER", "1")),
+                rng=rng
+            )
+        )
@@ -0,0 +1,220 @@
+"""
+LLM Stand-in Routes
+Enough of the OpenAI chat completions and Anthropic messages protocols, including
+server-sent-event token streaming, for the backend's clients to talk to
+"""
+
+import json
+import time
+import uuid
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .content import count_tokens, respond, split_tokens
+from .latency import StandinProfile
+from .prompt_cache import PromptCacheModel
+
+router = APIRouter(tags=["standin-llm"])
+
+openai_profile = StandinProfile.from_env("OPENAI", "lognormal:median=0.6,sigma=0.4", "normal:mean=0.015,stddev=0.005")
+anthropic_profile = StandinProfile.from_env("ANTHROPIC", "lognormal:median=0.8,sigma=0.4", "normal:mean=0.02,stddev=0.005")
+# Separate caches: OpenAI matches any message-boundary prefix, Anthropic only marked breakpoints
+openai_cache = PromptCacheModel.from_env()
+anthropic_cache = PromptCacheModel.from_env()
+
+def _message_text(content: Any) -> str:
+    """Flatten string or content-block message content"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return ""
+
+def _prompt_text(messages: List[Dict[str, Any]], system: Any = None) -> str:
+    parts = [_message_text(system)] if system else []
+    parts.extend(_message_text(message.get("content")) for message in messages)
+    return "\n".join(parts)
+
+def _openai_prefixes(messages: List[Dict[str, Any]]) -> List[str]:
+    """Every prefix ending on a message boundary; OpenAI caches matching prefixes automatically"""
+    prefixes, parts = [], []
+    for message in messages:
+        parts.append(f"{message.get('role')}:{_message_text(message.get('content'))}")
+        prefixes.append("\n".join(parts))
+    return prefixes[:-1]
+
+def _anthropic_prefixes(system: Any, messages: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+    """Prefixes ending at blocks marked with cache_control, and every block boundary up to
+    20 blocks behind a marked block, where the real API also looks for cache hits"""
+    prefixes, boundaries, parts = [], [], []
+    blocks = [("system", block) for block in (system if isinstance(system, list) else [])]
+    for message in messages:
+        content = message.get("content")
+        content = content if isinstance(content, list) else [{"type": "text", "text": content or ""}]
+        blocks.extend((message.get("role"), block) for block in content)
+    marked = []
+    for role, block in blocks:
+        if isinstance(block, dict):
+            parts.append(f"{role}:{block.get('text', '')}")
+            boundaries.append("\n".join(parts))
+            if block.get("cache_control"):
+                prefixes.append(boundaries[-1])
+                marked.append(len(boundaries) - 1)
+    readable = sorted({index for mark in marked for index in range(max(0, mark - 20), mark + 1)})
+    return prefixes, [boundaries[index] for index in readable]
+
+def _openai_error(fault: str, profile: StandinProfile) -> JSONResponse:
+    if fault == "rate_limit":
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": str(profile.faults.retry_after_seconds)},
+            content={"error": {"message": "Rate limit reached (stand-in)", "type": "requests", "param": None, "code": "rate_limit_exceeded"}}
+        )
+    return JSONResponse(
+        status_code=500,
+        content={"error": {"message": "The server had an error (stand-in)", "type": "server_error", "param": None, "code": None}}
+    )
+
+def _anthropic_error(fault: str, profile: StandinProfile) -> JSONResponse:
+    if fault == "rate_limit":
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": str(profile.faults.retry_after_seconds)},
+            content={"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limit reached (stand-in)"}}
+        )
+    return JSONResponse(
+        status_code=529,
+        content={"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded (stand-in)"}}
+    )
+
+def _sse(data: Dict[str, Any], event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+async def _tokens(text: str, profile: StandinProfile) -> AsyncIterator[str]:
+    for token in split_tokens(text):
+        await asyncio.sleep(profile.token_latency.sample())
+        yield token
+
+@router.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    profile = openai_profile
+
+    prompt = _prompt_text(body.get("messages", []))
+    prompt_tokens = count_tokens(prompt)
+    cached, _ = openai_cache.lookup(_openai_prefixes(body.get("messages", [])))
+    # Like the real API, cached tokens are reported in 128-token increments
+    cached = cached // 128 * 128
+
+    await asyncio.sleep(profile.latency.sample() * openai_cache.latency_factor(cached, prompt_tokens))
+    fault = profile.faults.draw()
+    if fault:
+        return _openai_error(fault, profile)
+
+    text = respond(prompt)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+    model = body.get("model", "standin")
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": count_tokens(text),
+        "total_tokens": prompt_tokens + count_tokens(text),
+        "prompt_tokens_details": {"cached_tokens": cached}
+    }
+
+    if not body.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage
+        }
+
+    async def events():
+        def chunk(delta: Dict[str, Any], finish_reason=None) -> str:
+            return _sse({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            })
+
+        yield chunk({"role": "assistant", "content": ""})
+        async for token in _tokens(text, profile):
+            yield chunk({"content": token})
+        yield chunk({}, "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield _sse({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": usage
+            })
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.post("/v1/messages")
+async def messages(request: Request):
+    body = await request.json()
+    profile = anthropic_profile
+
+    prompt = _prompt_text(body.get("messages", []), body.get("system"))
+    total_tokens = count_tokens(prompt)
+    cache_read, cache_write = anthropic_cache.lookup(*_anthropic_prefixes(body.get("system"), body.get("messages", [])))
+    # input_tokens counts only what was neither read from nor written to the cache
+    input_tokens = max(0, total_tokens - cache_read - cache_write)
+    cache_usage = {"cache_read_input_tokens": cache_read, "cache_creation_input_tokens": cache_write}
+
+    await asyncio.sleep(profile.latency.sample() * anthropic_cache.latency_factor(cache_read, total_tokens))
+    fault = profile.faults.draw()
+    if fault:
+        return _anthropic_error(fault, profile)
+
+    text = respond(prompt)
+    message_id = f"msg_{uuid.uuid4().hex[:24]}"
+    model = body.get("model", "standin")
+
+    if not body.get("stream"):
+        return {
+            "id": message_id,
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": count_tokens(text), **cache_usage}
+        }
+
+    async def events():
+        yield _sse({
+            "type": "message_start",
+            "message": {
+                "id": message_id, "type": "message", "role": "assistant", "model": model,
+                "content": [], "stop_reason": None, "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": 1, **cache_usage}
+            }
+        }, "message_start")
+        yield _sse({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}, "content_block_start")
+        yield _sse({"type": "ping"}, "ping")
+        async for token in _tokens(text, profile):
+            yield _sse({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": token}}, "content_block_delta")
+        yield _sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+        yield _sse({
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": count_tokens(text)}
+        }, "message_delta")
+        yield _sse({"type": "message_stop"}, "message_stop")
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -0,0 +1,74 @@
+"""
+Prompt Cache Emulation
+Remembers prompt prefixes the way provider-side prompt caches do, so cached token
+counts and the latency saved on long interviews can be observed without a real provider
+"""
+
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from .content import count_tokens
+
+class PromptCacheModel:
+    def __init__(self, enabled: bool, min_tokens: int, ttl_seconds: float, speedup: float, max_entries: int = 10000):
+        self.enabled = enabled
+        self.min_tokens = min_tokens
+        self.ttl_seconds = ttl_seconds
+        self.speedup = speedup  # Share of base latency saved when the whole prompt is cached
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "PromptCacheModel":
+        return cls(
+            enabled=os.getenv("STANDIN_PROMPT_CACHE", "true").lower() == "true",
+            min_tokens=int(os.getenv("STANDIN_PROMPT_CACHE_MIN_TOKENS", "1024")),
+            ttl_seconds=float(os.getenv("STANDIN_PROMPT_CACHE_TTL", "300")),
+            speedup=float(os.getenv("STANDIN_PROMPT_CACHE_SPEEDUP", "0.8"))
+        )
+
+    def _hit(self, prefix: str) -> bool:
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        expires_at = self._entries.get(key)
+        if expires_at is None or expires_at <= time.monotonic():
+            return False
+        # Reads refresh the entry, as with Anthropic's ephemeral cache
+        self._entries[key] = time.monotonic() + self.ttl_seconds
+        self._entries.move_to_end(key)
+        return True
+
+    def _store(self, prefix: str):
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        self._entries[key] = time.monotonic() + self.ttl_seconds
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def lookup(self, prefixes: List[str], readable: Optional[List[str]] = None) -> Tuple[int, int]:
+        """Given cacheable prefixes (shortest first), return (cached tokens read, tokens written)
+
+        readable, when given, lists every prefix that may hit, e.g. the block boundaries
+        Anthropic checks behind each breakpoint; only prefixes are written
+        """
+        if not self.enabled:
+            return 0, 0
+        eligible = [prefix for prefix in prefixes if count_tokens(prefix) >= self.min_tokens]
+        read = 0
+        for prefix in reversed(readable if readable is not None else eligible):
+            if count_tokens(prefix) >= self.min_tokens and self._hit(prefix):
+                read = count_tokens(prefix)
+                break
+        written = 0
+        if eligible and count_tokens(eligible[-1]) > read:
+            written = count_tokens(eligible[-1]) - read
+        for prefix in eligible:
+            self._store(prefix)
+        return read, written
+
+    def latency_factor(self, cached_tokens: int, total_tokens: int) -> float:
+        if not total_tokens:
+            return 1.0
+        return 1.0 - self.speedup * min(1.0, cached_tokens / total_tokens)
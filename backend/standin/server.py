@@ -0,0 +1,36 @@
+"""
+Stand-in Provider Server
+Serves the LLM and speech-to-text stand-ins from one process so the backend can
+be load-tested without network access
+
+Usage:
+    python -m standin.server --port 8090
+
+Then point the backend at it:
+    OPENAI_BASE_URL=http://localhost:8090/v1
+    ANTHROPIC_BASE_URL=http://localhost:8090
+    DEEPGRAM_BASE_URL=http://localhost:8090
+"""
+
+import argparse
+
+from fastapi import FastAPI
+import uvicorn
+
+from . import llm, stt
+
+app = FastAPI(title="AI Interview Provider Stand-ins", version="1.0.0")
+app.include_router(llm.router)
+app.include_router(stt.router)
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the provider stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
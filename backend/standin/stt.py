@@ -0,0 +1,97 @@
+"""
+Speech-to-Text Stand-in Routes
+OpenAI audio transcription and Deepgram pre-recorded listen endpoints with
+deterministic transcripts derived from the audio bytes
+"""
+
+import uuid
+import asyncio
+import hashlib
+
+from fastapi import APIRouter, File, Form, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from .latency import StandinProfile
+
+router = APIRouter(tags=["standin-stt"])
+
+whisper_profile = StandinProfile.from_env("WHISPER", "lognormal:median=0.5,sigma=0.3")
+deepgram_profile = StandinProfile.from_env("DEEPGRAM", "lognormal:median=0.3,sigma=0.3")
+
+TRANSCRIPTS = [
+    "I have extensive experience in full-stack development, particularly with React and Node.js.",
+    "In my previous role, I led a team of five developers to deliver a complex e-commerce platform.",
+    "I'm passionate about clean code and test-driven development practices.",
+    "My approach to problem-solving involves breaking down complex issues into manageable components.",
+    "I believe in continuous learning and staying updated with the latest technologies.",
+]
+
+def _transcript(audio: bytes) -> str:
+    digest = hashlib.sha256(audio).digest()
+    return TRANSCRIPTS[int.from_bytes(digest[:4], "big") % len(TRANSCRIPTS)]
+
+def _duration(audio: bytes) -> float:
+    # 16kHz, 16-bit mono WAV
+    return round(len(audio) / (16000 * 2), 3)
+
+async def _simulate(profile: StandinProfile, audio: bytes):
+    """Sleep for the sampled latency scaled by audio length; return a fault if one was drawn"""
+    await asyncio.sleep(profile.latency.sample() * max(1.0, _duration(audio) / 5))
+    return profile.faults.draw()
+
+@router.post("/v1/audio/transcriptions")
+async def openai_transcriptions(
+    file: UploadFile = File(...),
+    model: str = Form("whisper-1"),
+    response_format: str = Form("json"),
+    language: str = Form("en")
+):
+    audio = await file.read()
+    fault = await _simulate(whisper_profile, audio)
+    if fault == "rate_limit":
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": str(whisper_profile.faults.retry_after_seconds)},
+            content={"error": {"message": "Rate limit reached (stand-in)", "type": "requests", "param": None, "code": "rate_limit_exceeded"}}
+        )
+    if fault:
+        return JSONResponse(status_code=500, content={"error": {"message": "Server error (stand-in)", "type": "server_error", "param": None, "code": None}})
+
+    text = _transcript(audio)
+    if response_format == "verbose_json":
+        return {"task": "transcribe", "language": language, "duration": _duration(audio), "text": text, "segments": []}
+    if response_format == "text":
+        return PlainTextResponse(text)
+    return {"text": text}
+
+@router.post("/v1/listen")
+async def deepgram_listen(request: Request):
+    audio = await request.body()
+    fault = await _simulate(deepgram_profile, audio)
+    if fault == "rate_limit":
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": str(deepgram_profile.faults.retry_after_seconds)},
+            content={"err_code": "TOO_MANY_REQUESTS", "err_msg": "Too many requests (stand-in)", "request_id": str(uuid.uuid4())}
+        )
+    if fault:
+        return JSONResponse(status_code=500, content={"err_code": "INTERNAL_SERVER_ERROR", "err_msg": "Server error (stand-in)", "request_id": str(uuid.uuid4())})
+
+    text = _transcript(audio)
+    return {
+        "metadata": {
+            "request_id": str(uuid.uuid4()),
+            "duration": _duration(audio),
+            "channels": 1,
+            "models": [request.query_params.get("model", "nova-2")]
+        },
+        "results": {
+            "channels": [{
+                "alternatives": [{
+                    "transcript": text,
+                    "confidence": 0.93,
+                    "words": [{"word": word.strip(".,").lower(), "confidence": 0.93} for word in text.split()]
+                }]
+            }]
+        }
+    }
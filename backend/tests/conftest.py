@@ -0,0 +1,16 @@
+import os
+import sys
+
+# Tests import the backend packages (services, app) the way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.core.config requires these; the unit tests never connect to any of them
+for name, value in {
+    "SECRET_KEY": "test",
+    "DATABASE_URL": "sqlite:///" + os.path.join(os.path.dirname(os.path.abspath(__file__)), ".test.db"),
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "test",
+    "SUPABASE_SERVICE_KEY": "test",
+    "OPENAI_API_KEY": "test"
+}.items():
+    os.environ.setdefault(name, value)
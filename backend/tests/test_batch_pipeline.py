@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+from services.batch_pipeline import (
+    COMPLETED, QUEUED, SUBMITTED, BatchJob, BatchPipeline, BatchTask, DatabaseBatchJobStore, LocalBatchExecutor
+)
+
+def run(coro):
+    return asyncio.run(coro)
+
+class FakeBatchJobTable:
+    """The DatabaseService batch_jobs methods over a dict, shared by the pipelines standing in for workers"""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def save_batch_job(self, row):
+        self.rows[row["id"]] = dict(row)
+
+    async def get_batch_job(self, job_id):
+        row = self.rows.get(job_id)
+        return dict(row) if row else None
+
+    async def claim_batch_jobs(self, worker_id, lease_until, now):
+        claimed = []
+        for row in self.rows.values():
+            if row["status"] in (QUEUED, SUBMITTED) and row["lease_until"] < now:
+                row.update(worker_id=worker_id, lease_until=lease_until)
+                claimed.append(dict(row))
+        return claimed
+
+    async def renew_batch_jobs(self, job_ids, worker_id, lease_until):
+        for job_id in job_ids:
+            if self.rows[job_id]["worker_id"] == worker_id:
+                self.rows[job_id]["lease_until"] = lease_until
+
+def make_pipeline(table, complete, written, **options):
+    pipeline = BatchPipeline(LocalBatchExecutor(complete), store=DatabaseBatchJobStore(table), flush_seconds=0.01, **options)
+
+    async def build_request(payload):
+        return {"messages": [{"role": "user", "content": payload["prompt"]}]}
+
+    async def on_result(job):
+        written.append((job.id, job.result))
+
+    pipeline.register("summary", BatchTask(build_request=build_request, parse=lambda payload, content: content.upper(), on_result=on_result))
+    return pipeline
+
+async def echo(job):
+    return job.request["messages"][0]["content"]
+
+def test_job_is_saved_and_readable_from_another_worker():
+    async def scenario():
+        table, written = FakeBatchJobTable(), []
+        pipeline = make_pipeline(table, echo, written)
+        job = await pipeline.submit("summary", {"prompt": "done"})
+        for _ in range(100):
+            if written:
+                break
+            await asyncio.sleep(0.01)
+        other = make_pipeline(table, echo, [])
+        return job, written, await other.get(job.id)
+
+    job, written, seen = run(scenario())
+    assert written == [(job.id, "DONE")]
+    assert seen.status == COMPLETED
+    assert seen.result == "DONE"
+    assert seen.worker_id is None
+
+def test_expired_lease_is_recovered_by_the_next_worker():
+    async def scenario():
+        table, written = FakeBatchJobTable(), []
+        # A worker that stopped mid-batch: the job is saved as submitted with a lease that has run out
+        stale = BatchJob(id="j1", kind="summary", payload={"prompt": "again"}, status=SUBMITTED,
+                         request={"messages": [{"role": "user", "content": "again"}]},
+                         worker_id="gone", lease_until=time.time() - 1)
+        live = BatchJob(id="j2", kind="summary", payload={"prompt": "held"}, status=SUBMITTED,
+                        request={"messages": [{"role": "user", "content": "held"}]},
+                        worker_id="alive", lease_until=time.time() + 300)
+        for job in (stale, live):
+            await table.save_batch_job(job.to_record())
+
+        pipeline = make_pipeline(table, echo, written)
+        recovered = await pipeline.recover()
+        for _ in range(100):
+            if written:
+                break
+            await asyncio.sleep(0.01)
+        return recovered, written, table.rows
+
+    recovered, written, rows = run(scenario())
+    assert recovered == 1
+    assert written == [("j1", "AGAIN")]
+    assert rows["j1"]["status"] == COMPLETED
+    assert rows["j2"]["worker_id"] == "alive"
+
+def test_leases_are_renewed_while_a_job_runs():
+    async def scenario():
+        table, release = FakeBatchJobTable(), asyncio.Event()
+
+        async def slow(job):
+            await release.wait()
+            return "slow"
+
+        pipeline = make_pipeline(table, slow, [], lease_seconds=0.06)
+        job = await pipeline.submit("summary", {"prompt": "slow"})
+        first_lease = table.rows[job.id]["lease_until"]
+        await asyncio.sleep(0.1)
+        renewed_lease = table.rows[job.id]["lease_until"]
+        release.set()
+        await asyncio.sleep(0.05)
+        return first_lease, renewed_lease, table.rows[job.id]
+
+    first_lease, renewed_lease, row = run(scenario())
+    assert renewed_lease > first_lease
+    assert row["status"] == COMPLETED
+    assert row["lease_until"] is None
@@ -0,0 +1,133 @@
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, Deadline
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_breaker(clock, **options):
+    options.setdefault("window_seconds", 60)
+    options.setdefault("min_calls", 4)
+    options.setdefault("failure_rate_threshold", 0.5)
+    options.setdefault("slow_call_seconds", 5)
+    options.setdefault("slow_call_rate_threshold", 0.8)
+    options.setdefault("open_seconds", 30)
+    return CircuitBreaker("test", clock=clock, **options)
+
+def trip(breaker):
+    for _ in range(breaker.min_calls):
+        assert breaker.allow_request()
+        breaker.record_failure(0.1)
+
+def test_deadline_counts_down_on_the_injected_clock():
+    clock = Clock()
+    deadline = Deadline(10, clock=clock)
+    clock.now = 4
+    assert deadline.remaining() == 6
+    assert not deadline.expired
+    clock.now = 12
+    assert deadline.remaining() == 0
+    assert deadline.expired
+
+def test_stays_closed_below_min_calls_and_opens_on_failure_rate():
+    clock = Clock()
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure(0.1)
+    assert breaker.state == CLOSED  # Every call failed, but too few to judge
+
+    clock.now = 61
+    for _ in range(3):
+        breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED  # 1 of 4 failed
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN  # 3 of 6 failed
+    assert breaker.times_opened == 1
+    assert not breaker.allow_request()
+    assert breaker.total_rejected == 1
+
+def test_slow_calls_open_the_breaker():
+    clock = Clock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_success(6)
+    assert breaker.state == OPEN
+
+def test_outcomes_outside_the_window_are_forgotten():
+    clock = Clock()
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure(0.1)
+    clock.now = 61
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.status()["window_calls"] == 1
+
+def test_half_open_admits_one_probe_and_closes_on_success():
+    clock = Clock()
+    breaker = make_breaker(clock)
+    trip(breaker)
+    clock.now = 29
+    assert not breaker.allow_request()
+
+    clock.now = 30
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()  # Only the one probe while it is in flight
+
+    breaker.record_success(0.2)
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+    assert breaker.status()["window_calls"] == 0
+
+def test_failed_or_slow_probe_reopens():
+    clock = Clock()
+    breaker = make_breaker(clock)
+    trip(breaker)
+    clock.now = 30
+    assert breaker.allow_request()
+    breaker.record_failure(0.2)
+    assert breaker.state == OPEN
+    assert breaker.opened_at == 30
+
+    clock.now = 60
+    assert breaker.allow_request()
+    breaker.record_success(6)  # Answered, but too slowly to trust
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 3
+
+def test_release_gives_back_a_cancelled_probe():
+    clock = Clock()
+    breaker = make_breaker(clock)
+    trip(breaker)
+    clock.now = 30
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+def test_release_while_closed_changes_nothing():
+    clock = Clock()
+    breaker = make_breaker(clock)
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.state == CLOSED
+    assert breaker.total_calls == 0
+
+def test_status_reports_time_left_open():
+    clock = Clock()
+    breaker = make_breaker(clock)
+    trip(breaker)
+    clock.now = 12
+    status = breaker.status()
+    assert status["state"] == OPEN
+    assert status["open_for_seconds"] == 18
+    assert status["total_failures"] == 4
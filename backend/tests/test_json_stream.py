@@ -0,0 +1,78 @@
+from common.json_stream import IncrementalJSONArrayParser, IncrementalJSONParser, extract_json_object
+
+REPLY = '{"assistant_reply": "Good answer, with \\"quotes\\".", "evaluation_json": {"overall_score": 80, "strengths": ["clear"]}, "next_question": null, "interview_complete": false}'
+
+def feed_in_chunks(parser, text, size):
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return completed
+
+def test_fields_are_emitted_as_each_one_completes():
+    parser = IncrementalJSONParser()
+    completed = []
+    for char in REPLY:
+        for key, value in parser.feed(char):
+            completed.append(key)
+            if key == "assistant_reply":
+                # The reply is out before any of the evaluation has streamed
+                assert "evaluation_json" not in parser.fields
+
+    assert completed == ["assistant_reply", "evaluation_json", "next_question", "interview_complete"]
+    assert parser.complete
+    assert parser.fields["assistant_reply"] == 'Good answer, with "quotes".'
+    assert parser.finish() == parser.fields
+
+def test_chunk_boundaries_do_not_change_the_result():
+    expected = IncrementalJSONParser()
+    expected.feed(REPLY)
+    for size in (2, 7, 64):
+        parser = IncrementalJSONParser()
+        assert [key for key, _ in feed_in_chunks(parser, REPLY, size)] == list(expected.fields)
+        assert parser.finish() == expected.finish()
+
+def test_preamble_before_the_object_is_kept_apart():
+    parser = IncrementalJSONParser()
+    completed = parser.feed('Here is my evaluation:\n{"overall_score": 72, "confidence_level": "high"} trailing text')
+
+    assert parser.preamble == "Here is my evaluation:\n"
+    assert completed == [("overall_score", 72), ("confidence_level", "high")]
+    assert parser.finish() == {"overall_score": 72, "confidence_level": "high"}
+
+def test_finish_recovers_a_truncated_object():
+    parser = IncrementalJSONParser()
+    parser.feed('{"assistant_reply": "Thanks", "evaluation_json": {"overall_score": 65, "strengths": ["concise", "accur')
+
+    assert not parser.complete
+    assert parser.finish() == {
+        "assistant_reply": "Thanks",
+        "evaluation_json": {"overall_score": 65, "strengths": ["concise", "accur"]}
+    }
+
+def test_finish_trims_back_to_the_last_complete_member():
+    parser = IncrementalJSONParser()
+    parser.feed('{"assistant_reply": "Thanks", "evaluation_json": {"overall_score": 65, "confidence_level":')
+
+    assert parser.finish() == {"assistant_reply": "Thanks", "evaluation_json": {"overall_score": 65}}
+
+def test_finish_without_an_object_returns_none():
+    parser = IncrementalJSONParser()
+    parser.feed("The model answered in prose only.")
+
+    assert parser.finish() is None
+    assert parser.preamble == "The model answered in prose only."
+
+def test_extract_json_object_splits_preamble_and_object():
+    assert extract_json_object('Sure.  {"a": 1, "b": [1, 2]}') == ("Sure.", {"a": 1, "b": [1, 2]})
+    assert extract_json_object('{"a": {"b": 1') == ("", {"a": {"b": 1}})
+    assert extract_json_object("no json here") == ("no json here", None)
+
+def test_array_elements_are_emitted_as_each_one_completes():
+    parser = IncrementalJSONArrayParser()
+    text = 'Questions:\n[{"question_text": "What is a closure?"}, "plain", 42, {"question_text": "Explain [brackets]"}]'
+
+    completed = feed_in_chunks(parser, text, 5)
+
+    assert parser.preamble == "Questions:\n"
+    assert completed == [{"question_text": "What is a closure?"}, "plain", 42, {"question_text": "Explain [brackets]"}]
+    assert parser.complete
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from services.message_router import InProcessBus, InProcessRouter, RedisRouter
+
+def run(coro):
+    return asyncio.run(coro)
+
+class Worker:
+    """A router plus the messages its local sockets received"""
+
+    def __init__(self, router):
+        self.router = router
+        self.received = []
+        router.set_deliver(self.deliver)
+
+    async def deliver(self, session_id, message):
+        self.received.append((session_id, message))
+
+def in_process_workers():
+    bus = InProcessBus()
+    return Worker(InProcessRouter(bus)), Worker(InProcessRouter(bus))
+
+def redis_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    return tuple(
+        Worker(RedisRouter(fakeredis.FakeAsyncRedis(server=server, decode_responses=True)))
+        for _ in range(2)
+    )
+
+@pytest.fixture(params=["memory", "redis"])
+def make_workers(request):
+    return in_process_workers if request.param == "memory" else redis_workers
+
+async def settle():
+    # The Redis listener delivers from its own task
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+
+def test_publish_reaches_worker_holding_the_session(make_workers):
+    async def scenario():
+        a, b = make_workers()
+        await b.router.register("s1")
+        delivered = await a.router.publish("s1", {"type": "ai_response", "data": {"score": 7}})
+        await settle()
+        await a.router.close()
+        await b.router.close()
+        return a, b, delivered
+
+    a, b, delivered = run(scenario())
+    assert delivered is True
+    assert b.received == [("s1", {"type": "ai_response", "data": {"score": 7}})]
+    assert a.received == []
+    assert b.router.stats()["delivered"] == 1
+    assert b.router.stats()["hop_latency_ms"]["p50"] is not None
+
+def test_publish_without_owner_is_undeliverable(make_workers):
+    async def scenario():
+        a, b = make_workers()
+        await b.router.register("s1")
+        await b.router.unregister("s1")
+        delivered = await a.router.publish("s1", {"type": "transcript"})
+        await settle()
+        await a.router.close()
+        await b.router.close()
+        return a, b, delivered
+
+    a, b, delivered = run(scenario())
+    assert delivered is False
+    assert b.received == []
+    assert a.router.stats()["undeliverable"] == 1
+
+def test_broadcast_reaches_other_workers_sessions_only(make_workers):
+    async def scenario():
+        a, b = make_workers()
+        await a.router.register("s1")
+        await b.router.register("s2")
+        await b.router.register("s3")
+        await a.router.broadcast({"type": "notice"})
+        await settle()
+        await a.router.close()
+        await b.router.close()
+        return a, b
+
+    a, b = run(scenario())
+    # The publishing worker delivers to its own sessions directly, not through the router
+    assert a.received == []
+    assert sorted(b.received, key=lambda entry: entry[0]) == [("s2", {"type": "notice"}), ("s3", {"type": "notice"})]
+
+def test_in_process_unregister_keeps_a_newer_owner():
+    async def scenario():
+        a, b = in_process_workers()
+        await a.router.register("s1")
+        await b.router.register("s1")  # The client reconnected to b
+        await a.router.unregister("s1")  # a notices its old socket dropped
+        delivered = await a.router.publish("s1", {"type": "pong"})
+        return b, delivered
+
+    b, delivered = run(scenario())
+    assert delivered is True
+    assert b.received == [("s1", {"type": "pong"})]
+
+def test_in_process_messages_must_be_json_serializable():
+    async def scenario():
+        a, b = in_process_workers()
+        await b.router.register("s1")
+        await a.router.publish("s1", {"type": "x", "data": {1, 2}})
+
+    with pytest.raises(TypeError):
+        run(scenario())
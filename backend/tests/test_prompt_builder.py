@@ -0,0 +1,84 @@
+from common.prompt_builder import ChatPrompt, PromptBuilder, count_tokens, truncate_to_tokens
+
+def words(prefix, count):
+    return " ".join(f"{prefix}{n}" for n in range(count))
+
+def test_everything_fits_within_a_generous_budget():
+    builder = PromptBuilder(1000)
+    prompt = builder.add("intro", "Intro.\n", required=True).add("body", "Body text.", priority=10, header="\nBody:\n").build()
+
+    assert prompt == "Intro.\n\nBody:\nBody text."
+    assert builder.report.trimmed == []
+    assert builder.report.dropped == []
+    assert builder.report.used <= 1000
+
+def test_low_priority_sections_are_trimmed_first_but_keep_their_order():
+    high, low = words("high", 60), words("low", 200)
+    builder = PromptBuilder(count_tokens(high) + 40)
+    prompt = builder.add("low", low, priority=10).add("high", high, priority=90).build()
+
+    # Rendered in the order added, budgeted by priority
+    assert prompt.endswith(high)
+    assert prompt.startswith("low0")
+    assert builder.report.trimmed == ["low"]
+    assert builder.report.used <= builder.budget
+
+def test_a_section_with_too_little_room_left_is_dropped():
+    builder = PromptBuilder(20)
+    builder.add("instructions", "x" * 72, required=True).add("context", words("ctx", 100), priority=50, header="\nContext:\n")
+
+    prompt = builder.build()
+
+    assert "Context:" not in prompt
+    assert builder.report.dropped == ["context"]
+
+def test_required_sections_survive_an_exhausted_budget():
+    builder = PromptBuilder(50, reserved=60)
+    prompt = builder.add("context", words("ctx", 50), priority=99).add("question", "What is a closure?", required=True).build()
+
+    assert "What is a closure?" in prompt
+    assert "ctx0" not in prompt
+    assert builder.report.dropped == ["context"]
+
+def test_item_sections_drop_whole_items_keeping_the_most_recent():
+    items = [f"turn {n}: " + words(f"t{n}_", 10) for n in range(10)]
+    budget = sum(count_tokens(item) + 1 for item in items[-3:])
+    builder = PromptBuilder(budget)
+
+    prompt = builder.add_items("history", items, keep="tail").build()
+
+    assert prompt == "\n".join(items[-3:])
+    assert builder.report.trimmed == ["history"]
+
+def test_tail_trimming_keeps_the_end_of_the_text():
+    text = words("w", 200)
+    trimmed = truncate_to_tokens(text, 20, keep="tail")
+
+    assert trimmed.startswith("…")
+    assert trimmed.endswith("w199")
+    assert count_tokens(trimmed) <= 21
+    assert truncate_to_tokens("short", 20) == "short"
+
+def test_chat_prompt_marks_cache_breakpoints():
+    chat = ChatPrompt(system="You are an interviewer.", cache_breakpoints=[(-1, 0)])
+    chat.add("user", "Context")
+    chat.add("user", "Answer 1")
+    chat.add("assistant", "Reply 1", cache=True)
+    chat.add("user", "Answer 2")
+
+    request = chat.anthropic_request()
+
+    assert request["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert [message["role"] for message in request["messages"]] == ["user", "assistant", "user"]
+    assert request["messages"][1]["content"][0]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in request["messages"][0]["content"][1]
+    assert chat.openai_messages()[1] == {"role": "user", "content": "Context\n\nAnswer 1"}
+
+def test_a_required_section_is_trimmed_only_past_the_whole_budget():
+    builder = PromptBuilder(40)
+    prompt = builder.add("instructions", words("rule", 100), required=True).build()
+
+    assert prompt.startswith("rule0")
+    assert prompt.endswith("…")
+    assert builder.report.trimmed == ["instructions"]
+    assert builder.report.sections["instructions"] <= 40
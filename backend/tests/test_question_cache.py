@@ -0,0 +1,123 @@
+import asyncio
+
+from services.question_cache import InitialQuestionCache, parse_warm_keys
+
+def run(coro):
+    return asyncio.run(coro)
+
+class Generator:
+    """Numbered opening questions; fails while `failing` is set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+
+    async def __call__(self, position, interview_type, difficulty):
+        self.calls += 1
+        if self.failing:
+            raise RuntimeError("provider down")
+        return {"question": f"{position} question {self.calls}", "type": interview_type}
+
+async def settle(cache):
+    while cache._refilling:
+        await asyncio.gather(*cache._refilling.values(), return_exceptions=True)
+
+def test_keys_ignore_case_and_spacing():
+    assert InitialQuestionCache.make_key("  Backend   Engineer ", "Technical ", "MID") == ("backend engineer", "technical", "mid")
+
+def test_empty_pool_generates_inline_then_refills():
+    async def scenario():
+        generator = Generator()
+        cache = InitialQuestionCache(generator, pool_size=3, low_watermark=1)
+        first = await cache.get("Backend Engineer", "technical", "mid")
+        await settle(cache)
+        pooled = cache._pool_size(cache.make_key("Backend Engineer", "technical", "mid"))
+        second = await cache.get("backend engineer", "technical", "mid")
+        return generator, cache, first, pooled, second
+
+    generator, cache, first, pooled, second = run(scenario())
+    assert first["question"].startswith("Backend Engineer question")
+    assert pooled == 3
+    assert second["question"] != first["question"]
+    assert cache.generated_inline == 1
+    assert cache.served_from_pool == 1
+    assert generator.calls == 4
+
+def test_pool_is_topped_up_once_it_drops_to_the_low_watermark():
+    async def scenario():
+        generator = Generator()
+        cache = InitialQuestionCache(generator, pool_size=3, low_watermark=1)
+        await cache.warm([("Backend Engineer", "technical", "mid")])
+        key = cache.make_key("Backend Engineer", "technical", "mid")
+        await cache.get("Backend Engineer", "technical", "mid")
+        no_refill = dict(cache._refilling)
+        await cache.get("Backend Engineer", "technical", "mid")
+        refilling = key in cache._refilling
+        await settle(cache)
+        return generator, cache._pool_size(key), no_refill, refilling
+
+    generator, pooled, no_refill, refilling = run(scenario())
+    assert no_refill == {}  # 2 left is above the watermark
+    assert refilling
+    assert pooled == 3
+    assert generator.calls == 5
+
+def test_served_questions_are_copies():
+    async def scenario():
+        cache = InitialQuestionCache(Generator(), pool_size=2, low_watermark=0)
+        await cache.warm([("Data Scientist", "behavioral", "senior")])
+        question = await cache.get("Data Scientist", "behavioral", "senior")
+        question["question"] = "changed"
+        return await cache.get("Data Scientist", "behavioral", "senior")
+
+    assert run(scenario())["question"] != "changed"
+
+def test_failed_refill_falls_back_to_inline_generation():
+    async def scenario():
+        generator = Generator()
+        generator.failing = True
+        cache = InitialQuestionCache(generator, pool_size=2, low_watermark=1)
+        await cache.warm([("Frontend Engineer", "technical", "junior")])
+        generator.failing = False
+        question = await cache.get("Frontend Engineer", "technical", "junior")
+        await settle(cache)
+        return cache, question
+
+    cache, question = run(scenario())
+    assert question["question"].startswith("Frontend Engineer question")
+    assert cache.generated_inline == 1
+    assert cache.stats()["pooled_questions"] == 2
+
+def test_expired_variants_are_not_served():
+    async def scenario():
+        cache = InitialQuestionCache(Generator(), pool_size=2, low_watermark=0, ttl_seconds=60)
+        await cache.warm([("SRE", "technical", "mid")])
+        pool = cache._pools.peek(cache.make_key("SRE", "technical", "mid"))
+        for index, (generated_at, question) in enumerate(pool):
+            pool[index] = (generated_at - 120, question)
+        await cache.get("SRE", "technical", "mid")
+        return cache
+
+    cache = run(scenario())
+    assert cache.generated_inline == 1
+    assert cache.served_from_pool == 0
+
+def test_disabled_cache_always_generates(monkeypatch):
+    monkeypatch.setenv("QUESTION_CACHE_ENABLED", "false")
+
+    async def scenario():
+        generator = Generator()
+        cache = InitialQuestionCache(generator, pool_size=3)
+        await cache.get("Backend Engineer", "technical", "mid")
+        await cache.get("Backend Engineer", "technical", "mid")
+        return generator, cache
+
+    generator, cache = run(scenario())
+    assert generator.calls == 2
+    assert cache.stats()["keys"] == 0
+
+def test_parse_warm_keys_skips_malformed_entries():
+    assert parse_warm_keys("Backend Engineer:technical:mid; bad entry ;SRE::mid;Data Scientist:behavioral:senior") == [
+        ("Backend Engineer", "technical", "mid"),
+        ("Data Scientist", "behavioral", "senior")
+    ]
@@ -0,0 +1,133 @@
+import uuid
+from datetime import datetime, timezone
+
+from app.models.database import QuestionBank
+from app.services.question_dedup import (
+    NUM_PERM, LSHIndex, _canonical_rank, absorb_new_question, cluster_duplicates, jaccard, merge_duplicate,
+    minhash, shingles
+)
+
+RATE_LIMITER = "How would you design a rate limiter for a distributed API service?"
+REWORDED = "How would you design a distributed rate limiter for an API service?"
+CLOSE = "How would you design a rate limiter for a distributed API gateway service?"
+UNRELATED = "Explain how Python generators differ from list comprehensions in memory usage."
+
+def bank_row(**fields):
+    fields.setdefault("id", uuid.uuid4())
+    fields.setdefault("question_text", RATE_LIMITER)
+    fields.setdefault("skills_tested", ["system design"])
+    fields.setdefault("topics", ["rate limiting"])
+    return QuestionBank(**fields)
+
+def test_shingles_ignore_word_order_stopwords_and_plurals():
+    assert shingles(RATE_LIMITER) == shingles(REWORDED)
+    assert shingles("Describe the queues you use") == shingles("queue use")
+    assert jaccard(shingles(RATE_LIMITER), shingles(CLOSE)) >= 0.75
+    assert jaccard(set(), set()) == 1.0
+
+def test_minhash_is_deterministic_and_tracks_similarity():
+    signature = minhash(shingles(RATE_LIMITER))
+    assert len(signature) == NUM_PERM
+    assert signature == minhash(sorted(shingles(RATE_LIMITER)))
+    agreement = lambda a, b: sum(x == y for x, y in zip(a, b)) / NUM_PERM
+    assert agreement(signature, minhash(shingles(CLOSE))) > agreement(signature, minhash(shingles(UNRELATED)))
+
+def test_lsh_finds_near_duplicates_and_forgets_removed_ids():
+    index = LSHIndex()
+    index.add("limiter", minhash(shingles(RATE_LIMITER)))
+    index.add("generators", minhash(shingles(UNRELATED)))
+
+    assert index.candidates(minhash(shingles(REWORDED))) == {"limiter"}
+    assert "generators" not in index.candidates(minhash(shingles(CLOSE)))
+
+    index.add("close", minhash(shingles(CLOSE)))
+    index.remove("limiter", minhash(shingles(RATE_LIMITER)))
+    assert "limiter" not in index.candidates(minhash(shingles(RATE_LIMITER)))
+    assert index.candidates(minhash(shingles(UNRELATED))) == {"generators"}
+
+def test_lsh_recall_for_similar_pairs():
+    # Pairs at Jaccard ~0.8 should nearly always become candidates
+    base = [f"topic{n}" for n in range(20)]
+    found = 0
+    for trial in range(50):
+        variant = base[:16] + [f"other{trial}_{n}" for n in range(2)]
+        index = LSHIndex()
+        index.add("base", minhash(base))
+        found += "base" in index.candidates(minhash(variant))
+    assert found >= 45
+
+def test_cluster_duplicates_keeps_the_first_row_as_canonical():
+    rows = [
+        ("a", "technical", "mid", RATE_LIMITER),
+        ("b", "technical", "mid", UNRELATED),
+        ("c", "technical", "mid", REWORDED),
+        ("d", "technical", "senior", RATE_LIMITER),  # Same text at another difficulty is a different question
+        ("e", "technical", "mid", CLOSE)
+    ]
+    signatures = [minhash(shingles(text)) for *_, text in rows]
+
+    clusters, verified = cluster_duplicates(rows, signatures, 0.75)
+
+    assert clusters == [["a", "c", "e"]]
+    assert verified >= 2
+
+def test_cluster_duplicates_does_not_chain_through_intermediate_rows():
+    words = [f"w{n}" for n in range(12)]
+    rows = [
+        ("a", "technical", "mid", " ".join(words[:8])),
+        ("b", "technical", "mid", " ".join(words[2:10])),
+        ("c", "technical", "mid", " ".join(words[4:12]))
+    ]
+    signatures = [minhash(shingles(text)) for *_, text in rows]
+
+    # b is close enough to a, c only to b, so c must not join a's cluster
+    clusters, _ = cluster_duplicates(rows, signatures, 0.6)
+
+    assert clusters == [["a", "b"]]
+
+def test_canonical_rank_prefers_curated_then_usage_then_age():
+    curated = bank_row(source="curated", usage_count=1, quality_score=0.5)
+    popular = bank_row(source="ai_generated", usage_count=50, quality_score=0.9)
+    older = bank_row(source="ai_generated", usage_count=50, quality_score=0.9, created_at=datetime(2023, 1, 1, tzinfo=timezone.utc))
+    newer = bank_row(source="ai_generated", usage_count=50, quality_score=0.9, created_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+    assert _canonical_rank(curated) > _canonical_rank(popular)
+    assert _canonical_rank(older) > _canonical_rank(newer)
+
+def test_merge_duplicate_weights_statistics_by_usage():
+    canonical = bank_row(usage_count=30, success_rate=0.8, average_response_time=100, quality_score=0.6,
+                         topics=["rate limiting"], skills_tested=["system design"])
+    duplicate = bank_row(question_text=REWORDED, usage_count=10, success_rate=0.4, average_response_time=200,
+                         quality_score=0.9, topics=["rate limiting", "redis"], skills_tested=["caching"],
+                         follow_up_questions=["What about bursts?"])
+
+    merge_duplicate(canonical, duplicate)
+
+    assert canonical.usage_count == 40
+    assert abs(canonical.success_rate - 0.7) < 1e-9
+    assert canonical.average_response_time == 125
+    assert canonical.quality_score == 0.9
+    assert canonical.topics == ["rate limiting", "redis"]
+    assert canonical.skills_tested == ["system design", "caching"]
+    assert canonical.follow_up_questions == ["What about bursts?"]
+    assert duplicate.is_active is False
+    assert duplicate.duplicate_of_id == canonical.id
+    assert duplicate.usage_count == 0
+
+def test_merge_duplicate_keeps_known_statistics_when_one_side_has_none():
+    canonical = bank_row(usage_count=0, success_rate=None, average_response_time=None)
+    duplicate = bank_row(usage_count=5, success_rate=0.6, average_response_time=90)
+
+    merge_duplicate(canonical, duplicate)
+
+    assert canonical.success_rate == 0.6
+    assert canonical.average_response_time == 90
+    assert canonical.usage_count == 5
+
+def test_absorb_new_question_adds_coverage_without_usage():
+    canonical = bank_row(usage_count=3)
+    absorb_new_question(canonical, {"topics": ["token bucket"], "skills_tested": ["system design", "algorithms"]})
+
+    assert canonical.topics == ["rate limiting", "token bucket"]
+    assert canonical.skills_tested == ["system design", "algorithms"]
+    assert canonical.usage_count == 3
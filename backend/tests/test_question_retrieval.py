@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from app.services.question_retrieval import IndexedQuestion, QuestionIndex
+
+def question(question_id, text, terms=("python",), usage_count=0, difficulty="mid"):
+    return IndexedQuestion(
+        id=question_id,
+        question_text=text,
+        question_type="technical",
+        difficulty=difficulty,
+        terms=frozenset(terms),
+        topics=list(terms),
+        quality_score=0.8,
+        usage_count=usage_count
+    )
+
+def test_usage_is_pending_until_taken_and_restored_on_failure():
+    index = QuestionIndex()
+    index.load([question(1, "What is a generator"), question(2, "Explain the GIL")])
+    index.record_usage([1, 1, 2, 99])
+
+    assert index.take_usage() == {1: 2, 2: 1}
+    assert index.take_usage() == {}
+    index.restore_usage({1: 2})
+    index.record_usage([1])
+    assert index.take_usage() == {1: 3}
+
+def test_refresh_keeps_unwritten_usage_and_drops_deactivated_rows():
+    index = QuestionIndex()
+    index.load([question(1, "What is a generator"), question(2, "Explain the GIL")], datetime(2024, 1, 1))
+    index.record_usage([1])
+    synced_at = datetime(2024, 1, 2)
+    # Another worker wrote its own usage (5) and deactivated question 2 as a duplicate
+    index.refresh([(1, question(1, "What is a generator", usage_count=5)), (2, None), (3, question(3, "Describe asyncio"))], synced_at)
+
+    assert index.synced_at == synced_at
+    assert len(index) == 2
+    assert index._questions[1].usage_count == 6
+    picked = index.search("technical", "mid", ["python"], 5).questions
+    assert [entry["question_text"] for entry in picked] == ["Describe asyncio", "What is a generator"]
+
+def test_usage_lowers_freshness_score():
+    index = QuestionIndex(usage_scale=1.0)
+    index.load([question(1, "What is a generator"), question(2, "Explain the GIL")])
+    index.record_usage([1] * 10)
+
+    picked = index.search("technical", "mid", ["python"], 1).questions
+    assert picked[0]["question_text"] == "Explain the GIL"
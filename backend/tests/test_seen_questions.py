@@ -0,0 +1,93 @@
+import asyncio
+import uuid
+
+from app.services.seen_questions import QuestionFingerprint, SeenQuestionFilter, SeenQuestionStore, simhash
+
+ASKED = "How would you design a rate limiter for a distributed API service?"
+REPHRASED = "How would you design a rate limiter for distributed API services"
+UNRELATED = "Explain how Python generators differ from list comprehensions in memory usage."
+
+def run(coro):
+    return asyncio.run(coro)
+
+def make_store(capacity=100):
+    store = SeenQuestionStore(capacity=capacity, error_rate=0.01, near_duplicates=True)
+    # No database: loads find nothing and stores report no other copy
+    store._load = lambda user_id: None
+    store._store = lambda user_id, data: None
+    return store
+
+def test_simhash_is_stable_and_close_for_rephrasings():
+    assert simhash(ASKED) == simhash(ASKED)
+    assert simhash("Tell me about it") is None  # Too few content words
+    distance = bin(simhash(ASKED) ^ simhash(REPHRASED)).count("1")
+    assert distance < bin(simhash(ASKED) ^ simhash(UNRELATED)).count("1")
+
+def test_filter_reports_asked_questions_and_their_rephrasings():
+    seen = SeenQuestionFilter.for_capacity(100, 0.01)
+    assert not seen.seen(QuestionFingerprint.of(ASKED))
+
+    seen.add(QuestionFingerprint.of(ASKED))
+
+    assert seen.count == 1
+    assert seen.seen(QuestionFingerprint.of("  how would you DESIGN a rate limiter for a distributed API service "))
+    assert seen.seen(QuestionFingerprint.of(REPHRASED))
+    assert not seen.seen(QuestionFingerprint.of(REPHRASED), near_duplicates=False)
+    assert not seen.seen(QuestionFingerprint.of(UNRELATED))
+    assert not seen.seen(None)
+
+def test_false_positive_rate_stays_near_the_target_at_capacity():
+    seen = SeenQuestionFilter.for_capacity(200, 0.01)
+    for n in range(200):
+        seen.add(QuestionFingerprint.of(f"Question number {n} about topic{n} and subject{n}"))
+    false_positives = sum(
+        seen.seen(QuestionFingerprint.of(f"Unasked prompt {n} covering area{n} and field{n}"), near_duplicates=False)
+        for n in range(1000)
+    )
+    assert false_positives <= 30
+
+def test_bytes_round_trip_and_reject_corrupt_data():
+    seen = SeenQuestionFilter.for_capacity(50, 0.01)
+    seen.add(QuestionFingerprint.of(ASKED))
+
+    restored = SeenQuestionFilter.from_bytes(seen.to_bytes())
+
+    assert restored.compatible(seen)
+    assert restored.count == 1
+    assert restored.bits == seen.bits
+    assert restored.seen(QuestionFingerprint.of(ASKED))
+    assert SeenQuestionFilter.from_bytes(seen.to_bytes()[:-1]) is None
+    assert SeenQuestionFilter.from_bytes(b"") is None
+
+def test_union_merges_questions_recorded_by_another_process():
+    first = SeenQuestionFilter.for_capacity(50, 0.01)
+    second = SeenQuestionFilter.for_capacity(50, 0.01)
+    first.add(QuestionFingerprint.of(ASKED))
+    second.add(QuestionFingerprint.of(UNRELATED))
+    second.add(QuestionFingerprint.of("Describe a time you disagreed with a teammate about architecture"))
+
+    first.union(second)
+
+    assert first.seen(QuestionFingerprint.of(ASKED))
+    assert first.seen(QuestionFingerprint.of(UNRELATED))
+    assert first.count == 2
+    assert not first.compatible(SeenQuestionFilter.for_capacity(500, 0.01))
+
+def test_store_records_questions_and_rotates_a_full_filter():
+    async def scenario():
+        store = make_store(capacity=3)
+        user_id = uuid.uuid4()
+        await store.record(user_id, [ASKED, UNRELATED, "Describe a time you disagreed with a teammate about architecture"])
+        full = await store.get(user_id)
+        before = store.is_seen(full, ASKED)
+        await store.record(user_id, ["What trade-offs come with eventual consistency in databases?"])
+        rotated = await store.get(user_id)
+        await asyncio.sleep(0)  # Let the background persist run
+        return store, before, rotated
+
+    store, before, rotated = run(scenario())
+    assert before
+    assert store.rotations == 1
+    assert rotated.count == 1
+    assert not store.is_seen(rotated, ASKED)
+    assert store.is_seen(rotated, "What trade-offs come with eventual consistency in databases?")
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import time
+
+from services.session_checkpoint import CheckpointFiles, SessionCheckpointer
+from services.session_records import TranscriptEntry
+from services.session_store import InMemorySessionStore
+
+LIMITS = {"transcript": 10, "questions": 5, "responses": 5}
+
+def run(coro):
+    return asyncio.run(coro)
+
+def make_checkpointer(directory, store=None, **options):
+    files = CheckpointFiles(str(directory))
+    files.prepare()
+    return SessionCheckpointer(store or InMemorySessionStore(list_limits=LIMITS), files, **options)
+
+def test_restore_rebuilds_session_with_offsets(tmp_path):
+    async def scenario():
+        checkpointer = make_checkpointer(tmp_path, compact_after=4)
+        store = checkpointer.store
+        await store.create("s1", {"status": "active", "last_chunk_index": None})
+        for n in range(30):
+            await store.append("s1", "transcript", TranscriptEntry(f"t{n}", n, 0.9))
+            await store.set_field("s1", "last_chunk_index", n)
+            await checkpointer.checkpoint("s1")
+        expected = await store.load("s1")
+
+        restored = make_checkpointer(tmp_path, InMemorySessionStore(list_limits=LIMITS))
+        assert await restored.restore("s1")
+        return checkpointer, expected, await restored.store.load("s1")
+
+    checkpointer, expected, session = run(scenario())
+    assert checkpointer.compactions > 0
+    assert session["offsets"] == expected["offsets"]
+    assert [entry.text for entry in session["transcript"]] == [entry.text for entry in expected["transcript"]]
+    assert session["last_chunk_index"] == 29
+
+def test_deltas_read_only_entries_past_the_mark(tmp_path):
+    class CountingStore(InMemorySessionStore):
+        loads = 0
+
+        async def load(self, session_id):
+            self.loads += 1
+            return await super().load(session_id)
+
+    async def scenario():
+        checkpointer = make_checkpointer(tmp_path, CountingStore(list_limits=LIMITS), compact_after=100)
+        store = checkpointer.store
+        await store.create("s1", {"status": "active"})
+        for n in range(25):
+            await store.append("s1", "transcript", TranscriptEntry(f"t{n}", n, 0.9))
+            await checkpointer.checkpoint("s1")
+        unchanged = await checkpointer.checkpoint("s1")
+
+        restored = make_checkpointer(tmp_path, InMemorySessionStore(list_limits=LIMITS))
+        assert await restored.restore("s1")
+        return store.loads, unchanged, await store.load("s1"), await restored.store.load("s1")
+
+    loads, unchanged, expected, session = run(scenario())
+    assert loads == 1
+    assert unchanged is False
+    assert session["offsets"] == expected["offsets"]
+    assert [entry.text for entry in session["transcript"]] == [entry.text for entry in expected["transcript"]]
+
+def test_expired_session_checkpoint_is_deleted(tmp_path):
+    async def scenario():
+        checkpointer = make_checkpointer(tmp_path)
+        await checkpointer.store.create("s1", {"status": "active"})
+        checkpointer.track("s1")
+        await checkpointer.checkpoint_all()
+        written = os.listdir(tmp_path)
+        await checkpointer.store.delete("s1")
+        await checkpointer.checkpoint_all()
+        return written, os.listdir(tmp_path), checkpointer.tracked
+
+    written, remaining, tracked = run(scenario())
+    assert written == ["s1.jsonl"]
+    assert remaining == []
+    assert tracked == set()
+
+def test_sweep_deletes_only_stale_checkpoints(tmp_path):
+    files = CheckpointFiles(str(tmp_path))
+    files.prepare()
+    files.append("old", {"set": {}})
+    files.append("new", {"set": {}})
+    stale = time.time() - 7200
+    os.utime(files._path("old"), (stale, stale))
+
+    assert files.sweep(3600) == 1
+    assert os.listdir(tmp_path) == ["new.jsonl"]
+
+def test_directory_is_created_on_prepare_not_construction(tmp_path):
+    directory = tmp_path / "nested" / "checkpoints"
+    files = CheckpointFiles(str(directory))
+    assert not directory.exists()
+    files.prepare()
+    assert directory.is_dir()
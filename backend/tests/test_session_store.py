@@ -0,0 +1,214 @@
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from services.session_store import InMemorySessionStore, RedisSessionStore, SessionConflictError
+
+LIMITS = {"transcript": 20, "questions": 10, "responses": 10}
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def run(coro):
+    return asyncio.run(coro)
+
+def make_store(backend, spills=None, server=None, **options):
+    async def on_spill(session_id, field, start, items):
+        spills.append((field, start, list(items)))
+
+    options.setdefault("list_limits", LIMITS)
+    if spills is not None:
+        options["on_spill"] = on_spill
+    if backend == "memory":
+        return InMemorySessionStore(**options)
+    client = fakeredis.FakeAsyncRedis(server=server or fakeredis.FakeServer(), decode_responses=True)
+    return RedisSessionStore(client, **options)
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    return request.param
+
+def test_append_spills_oldest_entries_and_tracks_offset(backend):
+    async def scenario():
+        spills = []
+        store = make_store(backend, spills)
+        await store.create("s1", {"status": "active"})
+        totals = [await store.append("s1", "questions", {"n": n}) for n in range(25)]
+        await asyncio.sleep(0)  # Spills run as background tasks
+        offset, items = await store.window("s1", "questions")
+        return totals, offset, items, spills
+
+    totals, offset, items, spills = run(scenario())
+    assert totals == list(range(1, 26))
+    assert offset + len(items) == 25
+    assert len(items) <= LIMITS["questions"] + LIMITS["questions"] // 10
+    assert [item["n"] for item in items] == list(range(offset, 25))
+    # Spilled batches are contiguous from the start and end where the kept entries begin
+    spilled = [item["n"] for _, start, batch in spills for item in batch]
+    assert spilled == list(range(offset))
+    assert [start for _, start, _ in spills] == [0] + [
+        sum(len(batch) for _, _, batch in spills[:i]) for i in range(1, len(spills))
+    ]
+
+def test_concurrent_appends_keep_offset_consistent(backend):
+    async def scenario():
+        store = make_store(backend, max_retries=1000) if backend == "redis" else make_store(backend)
+        await store.create("s1", {"status": "active"})
+        pending = iter(range(200))
+        totals = []
+
+        async def writer():
+            for n in pending:
+                totals.append(await store.append("s1", "questions", {"n": n}))
+
+        await asyncio.gather(*(writer() for _ in range(8)))
+        return totals, await store.window("s1", "questions")
+
+    totals, (offset, items) = run(scenario())
+    assert sorted(totals) == list(range(1, 201))
+    assert offset + len(items) == 200
+    assert len(items) <= LIMITS["questions"] + LIMITS["questions"] // 10
+
+def test_load_reports_offsets_and_decoded_fields(backend):
+    async def scenario():
+        store = make_store(backend)
+        await store.create("s1", {"status": "active", "current_question_index": 2, "questions": [{"n": 0}]})
+        for n in range(1, 15):
+            await store.append("s1", "questions", {"n": n})
+        return await store.load("s1")
+
+    session = run(scenario())
+    assert session["status"] == "active"
+    assert session["current_question_index"] == 2
+    assert session["offsets"]["questions"] + len(session["questions"]) == 15
+    assert session["offsets"]["transcript"] == 0
+
+def test_update_field_folds_values(backend):
+    async def scenario():
+        store = make_store(backend)
+        await store.create("s1", {"count": 0})
+        await asyncio.gather(*(store.update_field("s1", "count", lambda value: value + 1) for _ in range(5)))
+        return await store.get_field("s1", "count")
+
+    assert run(scenario()) == 5
+
+def test_update_field_retries_after_conflicting_write():
+    server = fakeredis.FakeServer()
+    other_worker = fakeredis.FakeRedis(server=server, decode_responses=True)
+    store = make_store("redis", server=server)
+    calls = []
+
+    def update(value):
+        calls.append(value)
+        if len(calls) == 1:
+            # Another worker writes to the session between this worker's read and its commit
+            other_worker.hset(store._key("s1"), "status", '"paused"')
+        return (value or 0) + 1
+
+    async def scenario():
+        await store.create("s1", {"count": 0, "status": "active"})
+        result = await store.update_field("s1", "count", update)
+        return result, await store.get_field("s1", "status")
+
+    result, status = run(scenario())
+    assert result == 1
+    assert status == "paused"
+    assert len(calls) == 2
+    assert store.conflicts == 1
+
+def test_update_field_gives_up_after_max_retries():
+    server = fakeredis.FakeServer()
+    other_worker = fakeredis.FakeRedis(server=server, decode_responses=True)
+    store = make_store("redis", server=server, max_retries=3)
+
+    def update(value):
+        other_worker.hset(store._key("s1"), "status", '"busy"')
+        return value
+
+    async def scenario():
+        await store.create("s1", {"count": 0})
+        await store.update_field("s1", "count", update)
+
+    with pytest.raises(SessionConflictError):
+        run(scenario())
+    assert store.conflicts == 3
+
+def test_writes_to_missing_session_do_not_recreate_it(backend):
+    async def scenario():
+        store = make_store(backend)
+        await store.create("s1", {"status": "active"})
+        await store.delete("s1")
+        await store.set_field("s1", "last_chunk_index", 3)
+        appended = await store.append("s1", "questions", {"n": 0})
+        updated = await store.update_field("s1", "count", lambda value: 1)
+        return appended, updated, await store.exists("s1"), await store.load("s1")
+
+    assert run(scenario()) == (0, None, False, None)
+
+def test_redis_writes_refresh_ttl_and_complete_shortens_it():
+    store = make_store("redis", ttl_seconds=600, completed_ttl_seconds=30)
+
+    async def scenario():
+        await store.create("s1", {"status": "active"})
+        await store.append("s1", "questions", {"n": 0})
+        client = store._client
+        live = (await client.ttl(store._key("s1")), await client.ttl(store._list_key("s1", "questions")))
+        await store.complete("s1")
+        done = (await client.ttl(store._key("s1")), await client.ttl(store._list_key("s1", "questions")))
+        return live, done, await store.get_field("s1", "status")
+
+    live, done, status = run(scenario())
+    assert all(500 < ttl <= 600 for ttl in live)
+    assert all(0 < ttl <= 30 for ttl in done)
+    assert status == "completed"
+
+def test_memory_sessions_expire_and_complete_shortens_ttl():
+    clock = Clock()
+    store = InMemorySessionStore(clock=clock, list_limits=LIMITS, ttl_seconds=600, completed_ttl_seconds=30)
+
+    async def scenario():
+        await store.create("active", {"status": "active"})
+        await store.create("done", {"status": "active"})
+        await store.complete("done")
+        clock.now = 31
+        after_completed_ttl = (await store.exists("active"), await store.exists("done"))
+        await store.set_field("active", "status", "active")  # Writes push the expiry back
+        clock.now = 31 + 599
+        still_alive = await store.exists("active")
+        clock.now = 31 + 601
+        evicted = await store.evict_expired()
+        return after_completed_ttl, still_alive, evicted, await store.exists("active")
+
+    after_completed_ttl, still_alive, evicted, exists = run(scenario())
+    assert after_completed_ttl == (True, False)
+    assert still_alive is True
+    assert evicted == 1
+    assert exists is False
+
+def test_load_since_returns_only_entries_past_the_mark(backend):
+    async def scenario():
+        store = make_store(backend)
+        await store.create("s1", {"status": "active"})
+        for n in range(8):
+            await store.append("s1", "questions", {"n": n})
+        unchanged = await store.load_since("s1", {"questions": 8}, {"questions": 0})
+        # Enough appends to spill past the mark, read with the now stale offset guess
+        for n in range(8, 30):
+            await store.append("s1", "questions", {"n": n})
+        await store.set_field("s1", "status", "paused")
+        session = await store.load_since("s1", {"questions": 8}, {"questions": 0})
+        return unchanged, session
+
+    unchanged, session = run(scenario())
+    assert unchanged["questions"] == []
+    assert unchanged["status"] == "active"
+    offset = session["offsets"]["questions"]
+    assert offset > 8
+    assert [item["n"] for item in session["questions"]] == list(range(offset, 30))
+    assert session["status"] == "paused"
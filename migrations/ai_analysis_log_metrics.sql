@@ -0,0 +1,80 @@
+/**
+ * AI Analysis Log Metrics Migration
+ *
+ * Adds per-call latency and outcome columns to ai_analysis_logs and views for
+ * finding the slowest and most token-hungry prompts
+ */
+
+-- ============================================================================
+-- 1. Per-call instrumentation columns
+-- ============================================================================
+
+ALTER TABLE ai_analysis_logs
+ALTER COLUMN interview_id DROP NOT NULL;
+
+ALTER TABLE ai_analysis_logs
+ADD COLUMN IF NOT EXISTS provider VARCHAR(20),
+ADD COLUMN IF NOT EXISTS turn_index INTEGER,
+ADD COLUMN IF NOT EXISTS time_to_first_token_ms INTEGER,
+ADD COLUMN IF NOT EXISTS outcome VARCHAR(20) NOT NULL DEFAULT 'success';
+
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_logs_type_created
+ON ai_analysis_logs(processing_type, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_logs_interview
+ON ai_analysis_logs(interview_id)
+WHERE interview_id IS NOT NULL;
+
+-- ============================================================================
+-- 2. Latency percentiles per processing type (last 7 days)
+-- ============================================================================
+
+CREATE OR REPLACE VIEW ai_latency_percentiles AS
+SELECT
+    processing_type,
+    model_version,
+    COUNT(*) AS calls,
+    COUNT(*) FILTER (WHERE outcome <> 'success') AS failed_calls,
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY processing_time_ms) AS p50_ms,
+    PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY processing_time_ms) AS p90_ms,
+    PERCENTILE_CONT(0.99) WITHIN GROUP (ORDER BY processing_time_ms) AS p99_ms,
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY time_to_first_token_ms) AS p50_ttft_ms,
+    PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY time_to_first_token_ms) AS p90_ttft_ms,
+    AVG(input_tokens)::INTEGER AS avg_input_tokens,
+    AVG(output_tokens)::INTEGER AS avg_output_tokens
+FROM ai_analysis_logs
+WHERE created_at > NOW() - INTERVAL '7 days'
+GROUP BY processing_type, model_version;
+
+-- ============================================================================
+-- 3. Tokens per interview turn
+-- ============================================================================
+
+CREATE OR REPLACE VIEW ai_tokens_per_turn AS
+SELECT
+    interview_id,
+    COUNT(*) FILTER (WHERE processing_type = 'response_analysis') AS turns,
+    SUM(input_tokens) AS input_tokens,
+    SUM(output_tokens) AS output_tokens,
+    (SUM(COALESCE(input_tokens, 0) + COALESCE(output_tokens, 0))
+        / NULLIF(COUNT(*) FILTER (WHERE processing_type = 'response_analysis'), 0))::INTEGER AS tokens_per_turn,
+    SUM(processing_time_ms) AS total_processing_ms
+FROM ai_analysis_logs
+WHERE interview_id IS NOT NULL
+GROUP BY interview_id;
+
+-- ============================================================================
+-- 4. Tokens and latency of each interview turn
+-- ============================================================================
+
+CREATE OR REPLACE VIEW ai_turn_usage AS
+SELECT
+    interview_id,
+    turn_index,
+    COUNT(*) AS calls,
+    SUM(input_tokens) AS input_tokens,
+    SUM(output_tokens) AS output_tokens,
+    SUM(processing_time_ms) AS total_processing_ms
+FROM ai_analysis_logs
+WHERE interview_id IS NOT NULL AND turn_index IS NOT NULL
+GROUP BY interview_id, turn_index;
@@ -0,0 +1,32 @@
+/**
+ * AI Prompt Cache Metrics Migration
+ *
+ * Records how many input tokens of each call were served from the provider's
+ * prompt cache, and a view of cache hit rates per processing type
+ */
+
+-- ============================================================================
+-- 1. Cached input token column
+-- ============================================================================
+
+ALTER TABLE ai_analysis_logs
+ADD COLUMN IF NOT EXISTS cached_input_tokens INTEGER;
+
+-- ============================================================================
+-- 2. Prompt cache hit rates per processing type (last 7 days)
+-- ============================================================================
+
+CREATE OR REPLACE VIEW ai_prompt_cache_hit_rates AS
+SELECT
+    processing_type,
+    provider,
+    COUNT(*) AS calls,
+    COUNT(*) FILTER (WHERE cached_input_tokens > 0) AS calls_with_hit,
+    SUM(cached_input_tokens) AS cached_input_tokens,
+    SUM(input_tokens) AS input_tokens,
+    ROUND(SUM(cached_input_tokens)::NUMERIC / NULLIF(SUM(input_tokens), 0), 4) AS cached_token_share
+FROM ai_analysis_logs
+WHERE outcome = 'success'
+  AND cached_input_tokens IS NOT NULL
+  AND created_at > NOW() - INTERVAL '7 days'
+GROUP BY processing_type, provider;
@@ -0,0 +1,30 @@
+/**
+ * Batch Jobs Migration
+ *
+ * Jobs of the batch pipeline (deferred post-interview summaries), shared by
+ * every worker so any of them can report a job's status. The worker running
+ * an unfinished job keeps renewing lease_until; a job whose lease has run out
+ * is taken over by the next worker to start
+ */
+
+-- ============================================================================
+-- 1. Batch job table
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS batch_jobs (
+    id UUID PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    payload JSONB NOT NULL,
+    request JSONB,
+    result JSONB,
+    error TEXT,
+    batch_id VARCHAR(255),
+    worker_id VARCHAR(64),
+    lease_until DOUBLE PRECISION,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    completed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_batch_jobs_unfinished
+ON batch_jobs(lease_until) WHERE status IN ('queued', 'submitted');
@@ -0,0 +1,37 @@
+/**
+ * Evaluation Cache Migration
+ *
+ * Persistent tier for cached response analyses, keyed by a hash of the
+ * normalized question, response, evaluation criteria and model version
+ */
+
+-- ============================================================================
+-- 1. Cache table
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS evaluation_cache (
+    cache_key VARCHAR(64) PRIMARY KEY,
+    model_version VARCHAR NOT NULL,
+    analysis JSONB NOT NULL,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_evaluation_cache_expires
+ON evaluation_cache(expires_at);
+
+-- ============================================================================
+-- 2. Expired entry cleanup
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION purge_expired_evaluation_cache()
+RETURNS INTEGER AS $$
+DECLARE
+    removed INTEGER;
+BEGIN
+    DELETE FROM evaluation_cache WHERE expires_at <= NOW();
+    GET DIAGNOSTICS removed = ROW_COUNT;
+    RETURN removed;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,15 @@
+/**
+ * GitHub Profile Digest Migration
+ *
+ * Stores a prompt-ready digest of each user's GitHub profile together with
+ * the HTTP validators used to refresh it with conditional requests
+ */
+
+-- ============================================================================
+-- 1. Digest columns
+-- ============================================================================
+
+ALTER TABLE users
+ADD COLUMN IF NOT EXISTS github_profile_digest TEXT,
+ADD COLUMN IF NOT EXISTS github_profile_validators JSONB,
+ADD COLUMN IF NOT EXISTS github_profile_refreshed_at TIMESTAMP WITH TIME ZONE;
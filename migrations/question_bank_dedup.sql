@@ -0,0 +1,17 @@
+/**
+ * Question Bank Deduplication Migration
+ *
+ * Near-duplicate questions are merged into a canonical row; the retired
+ * duplicates stay for history, inactive and pointing at the canonical question
+ */
+
+-- ============================================================================
+-- 1. Canonical question reference
+-- ============================================================================
+
+ALTER TABLE question_bank
+ADD COLUMN IF NOT EXISTS duplicate_of_id UUID REFERENCES question_bank(id);
+
+CREATE INDEX IF NOT EXISTS idx_question_bank_duplicate_of
+ON question_bank(duplicate_of_id)
+WHERE duplicate_of_id IS NOT NULL;
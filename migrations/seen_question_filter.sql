@@ -0,0 +1,13 @@
+/**
+ * Seen Question Filter Migration
+ *
+ * Per-user Bloom filter of asked question fingerprints, so question
+ * selection can skip repeats without scanning interview history
+ */
+
+-- ============================================================================
+-- 1. Filter column
+-- ============================================================================
+
+ALTER TABLE users
+ADD COLUMN IF NOT EXISTS seen_question_filter BYTEA;
@@ -0,0 +1,20 @@
+/**
+ * Study Plans Migration
+ *
+ * Each user's current study plan, with a digest of the profile, recent
+ * performance and targets it was generated from; a plan is regenerated
+ * only when that digest changes or a refresh is requested
+ */
+
+-- ============================================================================
+-- 1. Study plan table
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS study_plans (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    input_digest VARCHAR(64) NOT NULL,
+    plan JSONB NOT NULL,
+    model_version VARCHAR NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
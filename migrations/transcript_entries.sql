@@ -0,0 +1,22 @@
+/**
+ * Transcript Entries Migration
+ *
+ * Transcript chunks of live interviews that no longer fit in the session
+ * store's per-session ring buffer; the most recent entries stay in the
+ * session and older ones are written here as they are dropped
+ */
+
+-- ============================================================================
+-- 1. Transcript entry table
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS transcript_entries (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    session_id VARCHAR(255) NOT NULL REFERENCES interviews(session_id) ON DELETE CASCADE,
+    sequence_number INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    timestamp DOUBLE PRECISION,
+    confidence DOUBLE PRECISION,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE (session_id, sequence_number)
+);